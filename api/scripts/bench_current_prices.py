@@ -0,0 +1,152 @@
+"""
+Benchmark for /api/v1/prices/current
+
+Compares the old N+1 query path (one stats fetchrow per karat) against the
+batched CURRENT_PRICES_QUERY while varying the number of karats and sources.
+Runs inside a throwaway schema so production tables are never touched.
+
+Usage: python scripts/bench_current_prices.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+import random
+from datetime import datetime, timedelta
+import asyncpg
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.main import CURRENT_PRICES_QUERY  # noqa: E402
+
+load_dotenv()
+
+DATABASE_URL = os.getenv('DATABASE_URL')
+SQL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sql')
+SCHEMA = f'bench_{os.getpid()}'
+
+KARAT_COUNTS = [1, 2, 4]
+SOURCE_COUNTS = [1, 5, 20]
+DAYS = 30
+POINTS_PER_DAY = 4
+ITERATIONS = 50
+
+# The latest_gold_prices view as the old path read it, scanning gold_prices.
+# The view itself now reads latest_prices (sql/create_latest_prices.sql), so
+# querying it here would time the new table, not the old path.
+LEGACY_LATEST_QUERY = """
+    SELECT
+        karat,
+        (buy_price + sell_price) / 2 AS current_price,
+        timestamp AS last_updated
+    FROM (
+        SELECT DISTINCT ON (karat)
+            karat,
+            FIRST_VALUE(buy_price) OVER (PARTITION BY karat ORDER BY timestamp DESC) AS buy_price,
+            FIRST_VALUE(sell_price) OVER (PARTITION BY karat ORDER BY timestamp DESC) AS sell_price,
+            FIRST_VALUE(timestamp) OVER (PARTITION BY karat ORDER BY timestamp DESC) AS timestamp
+        FROM gold_prices
+        WHERE karat IN (18, 21, 22, 24)
+    ) subquery
+"""
+
+
+async def current_prices_n_plus_one(conn, since):
+    """Old path: read latest prices, then one stats query per karat"""
+    latest = await conn.fetch(f"""
+        SELECT karat, current_price, last_updated
+        FROM ({LEGACY_LATEST_QUERY}) latest_gold_prices
+        ORDER BY karat
+    """)
+    results = []
+    for row in latest:
+        stats = await conn.fetchrow("""
+            SELECT
+                AVG((buy_price + sell_price) / 2) AS avg_24h,
+                MIN((buy_price + sell_price) / 2) AS low_24h,
+                MAX((buy_price + sell_price) / 2) AS high_24h
+            FROM gold_prices
+            WHERE karat = $1
+              AND timestamp >= $2
+        """, row['karat'], since)
+        results.append((row, stats))
+    return results
+
+
+async def current_prices_batched(conn, since):
+    """New path: one set-based query"""
+    return await conn.fetch(CURRENT_PRICES_QUERY, since)
+
+
+async def seed(conn, karats, sources):
+    """Fill the scratch gold_prices table with synthetic history"""
+    await conn.execute("TRUNCATE gold_prices, latest_prices")
+
+    end_date = datetime.utcnow()
+    start_date = end_date - timedelta(days=DAYS)
+
+    records = []
+    for i in range(DAYS * POINTS_PER_DAY):
+        current_time = start_date + timedelta(hours=i * 24 / POINTS_PER_DAY)
+        for karat in karats:
+            for s in range(sources):
+                buy_price = 29700 + random.randint(-500, 500)
+                records.append((current_time, karat, buy_price, buy_price + 200, f'source_{s}', 'bench', 'new'))
+
+    await conn.copy_records_to_table(
+        'gold_prices',
+        records=records,
+        columns=['timestamp', 'karat', 'buy_price', 'sell_price', 'source', 'raw_text', 'gold_type'],
+        schema_name=SCHEMA
+    )
+    # Rebuilds latest_prices from the seeded history
+    await run_sql_file(conn, 'create_latest_prices.sql')
+    await conn.execute("ANALYZE gold_prices")
+    return len(records)
+
+
+async def run_sql_file(conn, filename):
+    """Execute one of the api/sql scripts in the scratch schema"""
+    with open(os.path.join(SQL_DIR, filename)) as f:
+        await conn.execute(f.read())
+
+
+async def measure(conn, fn, since):
+    """Return mean latency in milliseconds over ITERATIONS runs"""
+    await fn(conn, since)  # warm-up
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        await fn(conn, since)
+    return (time.perf_counter() - start) / ITERATIONS * 1000
+
+
+async def run_benchmark():
+    conn = await asyncpg.connect(DATABASE_URL)
+
+    try:
+        await conn.execute(f"CREATE SCHEMA {SCHEMA}")
+        await conn.execute(f"SET search_path TO {SCHEMA}")
+        await run_sql_file(conn, 'create_tables.sql')
+        await run_sql_file(conn, 'create_latest_prices.sql')
+
+        print(f"{'karats':>6} {'sources':>7} {'rows':>7} {'n+1 (ms)':>10} {'batched (ms)':>13} {'speedup':>8}")
+
+        for karat_count in KARAT_COUNTS:
+            karats = [18, 21, 22, 24][:karat_count]
+            for sources in SOURCE_COUNTS:
+                rows = await seed(conn, karats, sources)
+                since = datetime.utcnow() - timedelta(hours=24)
+
+                legacy_ms = await measure(conn, current_prices_n_plus_one, since)
+                batched_ms = await measure(conn, current_prices_batched, since)
+
+                print(f"{karat_count:>6} {sources:>7} {rows:>7} {legacy_ms:>10.2f} {batched_ms:>13.2f} "
+                      f"{legacy_ms / batched_ms:>7.1f}x")
+    finally:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(run_benchmark())
@@ -42,6 +42,16 @@ async def seed_history():
                 VALUES ($1, $2, $3, $4, 'seed_data', 'Historical Seed', 'new')
                 ON CONFLICT (timestamp, karat, source) DO NOTHING
             """, current_time, karat, buy_price, sell_price)
+            await conn.execute("""
+                INSERT INTO latest_prices (karat, source, timestamp, buy_price, sell_price)
+                VALUES ($1, 'seed_data', $2, $3, $4)
+                ON CONFLICT (karat, source) DO UPDATE
+                SET timestamp = EXCLUDED.timestamp,
+                    buy_price = EXCLUDED.buy_price,
+                    sell_price = EXCLUDED.sell_price,
+                    updated_at = NOW()
+                WHERE latest_prices.timestamp <= EXCLUDED.timestamp
+            """, karat, current_time, buy_price, sell_price)
             
     print("Seeding complete.")
     await conn.close()
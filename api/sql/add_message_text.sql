@@ -0,0 +1,7 @@
+-- Full post text, so prices can be re-parsed locally (scraper/src/reparse.py).
+-- '' for posts without text; NULL only on rows recorded before this column,
+-- which the next reconcile sync treats as unprocessed and fills in.
+ALTER TABLE channel_messages ADD COLUMN IF NOT EXISTS text TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_channel_messages_posted_at
+ON channel_messages (posted_at);
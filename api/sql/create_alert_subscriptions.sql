@@ -0,0 +1,17 @@
+-- Price alert subscriptions, loaded into the API's in-memory alert index.
+-- last_triggered_at enforces the cooldown and lets only one dispatcher claim
+-- a crossing.
+CREATE TABLE IF NOT EXISTS alert_subscriptions (
+    id BIGSERIAL PRIMARY KEY,
+    telegram_user_id VARCHAR(64) NOT NULL,
+    karat INTEGER NOT NULL,
+    direction VARCHAR(5) NOT NULL CHECK (direction IN ('above', 'below')),
+    threshold NUMERIC(12, 2) NOT NULL,
+    active BOOLEAN NOT NULL DEFAULT TRUE,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    last_triggered_at TIMESTAMPTZ,
+    UNIQUE (telegram_user_id, karat, direction, threshold)
+);
+
+CREATE INDEX IF NOT EXISTS idx_alert_subscriptions_active
+    ON alert_subscriptions (karat) WHERE active;
@@ -0,0 +1,10 @@
+-- Messages the scrapers have already processed. The content hash lets a
+-- reconciliation pass skip unchanged posts and reprocess edited ones.
+CREATE TABLE IF NOT EXISTS channel_messages (
+    channel VARCHAR(100) NOT NULL,
+    message_id BIGINT NOT NULL,
+    posted_at TIMESTAMPTZ NOT NULL,
+    content_hash CHAR(40) NOT NULL,
+    processed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (channel, message_id)
+);
@@ -0,0 +1,42 @@
+-- Latest price per (karat, source), upserted by the scrapers on every write.
+-- Lets the "current price" lookup read a handful of rows instead of sorting
+-- the whole gold_prices history. Only prices with both sides are kept, as
+-- one-sided rows have no mid price.
+CREATE TABLE IF NOT EXISTS latest_prices (
+    karat INTEGER NOT NULL,
+    source VARCHAR(100) NOT NULL,
+    timestamp TIMESTAMPTZ NOT NULL,
+    buy_price NUMERIC(12, 2),
+    sell_price NUMERIC(12, 2),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (karat, source)
+);
+
+-- Seed from existing history. Re-running is safe: older rows never win.
+INSERT INTO latest_prices (karat, source, timestamp, buy_price, sell_price)
+SELECT DISTINCT ON (karat, source)
+    karat, source, timestamp, buy_price, sell_price
+FROM gold_prices
+WHERE buy_price IS NOT NULL AND sell_price IS NOT NULL
+ORDER BY karat, source, timestamp DESC
+ON CONFLICT (karat, source) DO UPDATE
+SET timestamp = EXCLUDED.timestamp,
+    buy_price = EXCLUDED.buy_price,
+    sell_price = EXCLUDED.sell_price,
+    updated_at = NOW()
+WHERE latest_prices.timestamp <= EXCLUDED.timestamp;
+
+-- Keep the view for existing consumers, now backed by latest_prices
+DROP VIEW IF EXISTS latest_gold_prices;
+CREATE VIEW latest_gold_prices AS
+SELECT DISTINCT ON (karat)
+    karat,
+    (buy_price + sell_price) / 2 AS current_price,
+    buy_price,
+    sell_price,
+    timestamp AS last_updated,
+    source
+FROM latest_prices
+WHERE karat IN (18, 21, 22, 24)
+  AND buy_price IS NOT NULL AND sell_price IS NOT NULL
+ORDER BY karat, timestamp DESC;
@@ -0,0 +1,111 @@
+-- Incrementally maintained rollups for history charts.
+-- Replaces the plain historical_gold_prices_daily / gold_prices_hourly views,
+-- which re-scanned gold_prices on every read, with TimescaleDB continuous
+-- aggregates that are refreshed in the background by a policy.
+
+CREATE EXTENSION IF NOT EXISTS timescaledb;
+
+-- Turn gold_prices into a hypertable partitioned on timestamp.
+-- Unique constraints on a hypertable must include the partition column, so a
+-- surrogate primary key on id alone is replaced by a plain index.
+DO $$
+DECLARE
+    pk_name TEXT;
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM timescaledb_information.hypertables
+        WHERE hypertable_name = 'gold_prices'
+    ) THEN
+        SELECT con.conname INTO pk_name
+        FROM pg_constraint con
+        WHERE con.conrelid = 'gold_prices'::regclass
+          AND con.contype = 'p'
+          AND NOT EXISTS (
+              SELECT 1 FROM pg_attribute att
+              WHERE att.attrelid = con.conrelid
+                AND att.attnum = ANY (con.conkey)
+                AND att.attname = 'timestamp'
+          );
+
+        IF pk_name IS NOT NULL THEN
+            EXECUTE format('ALTER TABLE gold_prices DROP CONSTRAINT %I', pk_name);
+            CREATE INDEX IF NOT EXISTS gold_prices_id_idx ON gold_prices (id);
+        END IF;
+
+        PERFORM create_hypertable(
+            'gold_prices', 'timestamp',
+            chunk_time_interval => INTERVAL '30 days',
+            migrate_data => TRUE
+        );
+    END IF;
+END
+$$;
+
+CREATE INDEX IF NOT EXISTS gold_prices_karat_timestamp_idx
+    ON gold_prices (karat, timestamp DESC);
+
+DROP VIEW IF EXISTS historical_gold_prices_daily;
+DROP VIEW IF EXISTS gold_prices_hourly;
+
+-- Hourly rollup. Keeps sum/count so coarser buckets can be re-aggregated
+-- exactly, plus OHLC of the mid price. price_points counts rows with a mid
+-- price (single-price posts have no sell side), so SUM(sum_price) /
+-- SUM(price_points) gives the exact average when re-bucketing.
+CREATE MATERIALIZED VIEW gold_prices_hourly
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT
+    karat,
+    time_bucket(INTERVAL '1 hour', timestamp) AS hour,
+    AVG((buy_price + sell_price) / 2) AS avg_price,
+    SUM((buy_price + sell_price) / 2) AS sum_price,
+    first((buy_price + sell_price) / 2, timestamp) AS open_price,
+    MAX((buy_price + sell_price) / 2) AS high_price,
+    MIN((buy_price + sell_price) / 2) AS low_price,
+    last((buy_price + sell_price) / 2, timestamp) AS close_price,
+    MIN(buy_price) AS min_buy,
+    MAX(buy_price) AS max_buy,
+    MIN(sell_price) AS min_sell,
+    MAX(sell_price) AS max_sell,
+    COUNT(*) AS data_points,
+    COUNT((buy_price + sell_price) / 2) AS price_points
+FROM gold_prices
+WHERE karat IN (18, 21, 22, 24)
+GROUP BY karat, time_bucket(INTERVAL '1 hour', timestamp)
+WITH NO DATA;
+
+-- Daily rollup for long-range charts
+CREATE MATERIALIZED VIEW historical_gold_prices_daily
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT
+    karat,
+    time_bucket(INTERVAL '1 day', timestamp) AS date,
+    AVG((buy_price + sell_price) / 2) AS avg_price,
+    SUM((buy_price + sell_price) / 2) AS sum_price,
+    first((buy_price + sell_price) / 2, timestamp) AS open_price,
+    MAX((buy_price + sell_price) / 2) AS high_price,
+    MIN((buy_price + sell_price) / 2) AS low_price,
+    last((buy_price + sell_price) / 2, timestamp) AS close_price,
+    MIN(buy_price) AS min_buy,
+    MAX(buy_price) AS max_buy,
+    MIN(sell_price) AS min_sell,
+    MAX(sell_price) AS max_sell,
+    COUNT(*) AS data_points,
+    COUNT((buy_price + sell_price) / 2) AS price_points
+FROM gold_prices
+WHERE karat IN (18, 21, 22, 24)
+GROUP BY karat, time_bucket(INTERVAL '1 day', timestamp)
+WITH NO DATA;
+
+-- Refresh policies. The start offsets cover the historical scraper's 30-day
+-- backfill window; older backfills should call schema.refresh_rollups().
+SELECT add_continuous_aggregate_policy('gold_prices_hourly',
+    start_offset => INTERVAL '45 days',
+    end_offset => INTERVAL '1 hour',
+    schedule_interval => INTERVAL '15 minutes',
+    if_not_exists => TRUE);
+
+SELECT add_continuous_aggregate_policy('historical_gold_prices_daily',
+    start_offset => INTERVAL '45 days',
+    end_offset => INTERVAL '1 day',
+    schedule_interval => INTERVAL '1 hour',
+    if_not_exists => TRUE);
@@ -0,0 +1,12 @@
+-- Per-channel scrape progress so scrapers resume instead of starting over.
+-- last_message_id is the newest message processed; everything between
+-- oldest_message_id and last_message_id has been covered.
+CREATE TABLE IF NOT EXISTS scrape_checkpoints (
+    channel VARCHAR(100) NOT NULL,
+    scraper VARCHAR(20) NOT NULL,
+    last_message_id BIGINT,
+    oldest_message_id BIGINT,
+    backfill_complete BOOLEAN NOT NULL DEFAULT FALSE,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (channel, scraper)
+);
@@ -0,0 +1,13 @@
+-- Base tables. No-ops on databases that were provisioned by hand.
+CREATE TABLE IF NOT EXISTS gold_prices (
+    id SERIAL,
+    timestamp TIMESTAMPTZ NOT NULL,
+    karat INTEGER NOT NULL,
+    buy_price NUMERIC(12, 2),
+    sell_price NUMERIC(12, 2),
+    source VARCHAR(100) NOT NULL,
+    raw_text TEXT,
+    gold_type VARCHAR(20) DEFAULT 'new',
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE (timestamp, karat, source)
+);
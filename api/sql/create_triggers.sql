@@ -0,0 +1,14 @@
+-- Notify listeners (API response cache) whenever gold_prices changes.
+-- Statement-level so a bulk insert sends one notification; Postgres also
+-- collapses identical notifications raised within the same transaction.
+CREATE OR REPLACE FUNCTION notify_gold_prices_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('gold_prices_changed', TG_OP);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS gold_prices_changed ON gold_prices;
+CREATE TRIGGER gold_prices_changed
+AFTER INSERT OR UPDATE OR DELETE ON gold_prices
+FOR EACH STATEMENT EXECUTE FUNCTION notify_gold_prices_changed();
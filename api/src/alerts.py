@@ -0,0 +1,354 @@
+"""
+Price alert engine
+Subscriptions live in alert_subscriptions and, in memory, in per-karat sorted
+threshold indexes, so a price move only visits the thresholds it crossed
+"""
+
+import bisect
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import asyncpg
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DIRECTIONS = ('above', 'below')
+
+TELEGRAM_SEND_URL = 'https://api.telegram.org/bot{token}/sendMessage'
+
+LOAD_SUBSCRIPTIONS_SQL = """
+    SELECT id, telegram_user_id, karat, direction, threshold
+    FROM alert_subscriptions
+    WHERE active
+"""
+
+# Re-subscribing to a deactivated alert revives the same row
+SUBSCRIBE_SQL = """
+    INSERT INTO alert_subscriptions (telegram_user_id, karat, direction, threshold)
+    VALUES ($1, $2, $3, $4)
+    ON CONFLICT (telegram_user_id, karat, direction, threshold) DO UPDATE
+    SET active = TRUE
+    RETURNING id
+"""
+
+UNSUBSCRIBE_SQL = """
+    UPDATE alert_subscriptions SET active = FALSE
+    WHERE id = $1 AND telegram_user_id = $2 AND active
+    RETURNING id
+"""
+
+# Claims fired alerts that are out of cooldown. Only claimed ids are sent,
+# so a crossing is delivered once even if two dispatchers see it.
+CLAIM_SQL = """
+    UPDATE alert_subscriptions SET last_triggered_at = NOW()
+    WHERE id = ANY($1::bigint[])
+      AND active
+      AND (last_triggered_at IS NULL OR last_triggered_at <= NOW() - $2::interval)
+    RETURNING id
+"""
+
+# Gives back claims whose message could not be sent, so they aren't in cooldown
+RELEASE_SQL = """
+    UPDATE alert_subscriptions SET last_triggered_at = NULL
+    WHERE id = ANY($1::bigint[])
+"""
+
+
+class Subscription(NamedTuple):
+    id: int
+    telegram_user_id: str
+    karat: int
+    direction: str
+    threshold: float
+
+
+class ThresholdIndex:
+    """Subscriptions of one karat and direction, sorted by threshold
+
+    Entries are (threshold, id) tuples; the id sentinels below bound a
+    threshold value from either side in bisect.
+    """
+
+    def __init__(self):
+        self.entries: List[Tuple[float, int]] = []
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, threshold: float, sub_id: int):
+        bisect.insort(self.entries, (threshold, sub_id))
+
+    def remove(self, threshold: float, sub_id: int):
+        i = bisect.bisect_left(self.entries, (threshold, sub_id))
+        if i < len(self.entries) and self.entries[i] == (threshold, sub_id):
+            del self.entries[i]
+
+    def above(self, low: float, high: float) -> List[int]:
+        """Ids with low < threshold <= high"""
+        start = bisect.bisect_right(self.entries, (low, float('inf')))
+        end = bisect.bisect_right(self.entries, (high, float('inf')))
+        return [sub_id for _, sub_id in self.entries[start:end]]
+
+    def below(self, low: float, high: float) -> List[int]:
+        """Ids with low <= threshold < high"""
+        start = bisect.bisect_left(self.entries, (low, float('-inf')))
+        end = bisect.bisect_left(self.entries, (high, float('-inf')))
+        return [sub_id for _, sub_id in self.entries[start:end]]
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart, in arrival order
+
+    pause() pushes every later call back, for a server that asked to wait.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            delay = self._next - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next = max(self._next, loop.time()) + self.interval
+
+    def pause(self, seconds: float):
+        self._next = max(self._next, asyncio.get_running_loop().time() + seconds)
+
+
+def retry_after(response: httpx.Response) -> float:
+    """Seconds a 429 asks to wait: Bot API `parameters.retry_after`, else the header"""
+    try:
+        return float(response.json()['parameters']['retry_after'])
+    except (ValueError, KeyError, TypeError):
+        return float(response.headers.get('Retry-After', 1))
+
+
+class TelegramDispatcher:
+    """Sends alert messages through the Bot API; logs them without a token
+
+    Sends are paced to `rate` messages/s (Telegram allows ~30/s per bot). A
+    429 pauses every send for the retry_after it names, then the message is
+    tried again, up to `attempts` times.
+    """
+
+    def __init__(self, bot_token: Optional[str], rate: float = 30, attempts: int = 3):
+        self.bot_token = bot_token
+        self.attempts = attempts
+        self._limiter = RateLimiter(rate)
+        self._client = httpx.AsyncClient(timeout=10) if bot_token else None
+
+    async def send(self, chat_id: str, text: str) -> bool:
+        if not self._client:
+            logger.info(f"Alert for {chat_id} (no BOT_TOKEN, not sent): {text}")
+            return False
+
+        for _ in range(self.attempts):
+            await self._limiter.acquire()
+            try:
+                response = await self._client.post(
+                    TELEGRAM_SEND_URL.format(token=self.bot_token),
+                    json={'chat_id': chat_id, 'text': text}
+                )
+            except httpx.HTTPError as e:
+                logger.warning(f"Alert to {chat_id} failed: {e}")
+                return False
+
+            if response.status_code == 429:
+                wait = retry_after(response)
+                logger.warning(f"Telegram rate limit, pausing alerts for {wait:g}s")
+                self._limiter.pause(wait)
+                continue
+            if response.is_error:
+                logger.warning(f"Alert to {chat_id} failed: HTTP {response.status_code}")
+                return False
+            return True
+
+        logger.warning(f"Alert to {chat_id} failed: still rate limited after {self.attempts} attempts")
+        return False
+
+    async def close(self):
+        if self._client:
+            await self._client.aclose()
+
+
+def _dzd(amount: float) -> str:
+    return f"{amount:,.0f}".replace(',', ' ')
+
+
+def format_alert(sub: Subscription, price: float) -> str:
+    side = 'au-dessus' if sub.direction == 'above' else 'en dessous'
+    return f"Or {sub.karat}K : {_dzd(price)} DZD ({side} de {_dzd(sub.threshold)} DZD)"
+
+
+class AlertEngine:
+    """Matches price moves against subscriptions and dispatches the crossings
+
+    A move from p to q visits only thresholds between p and q, found by
+    bisect, so matching costs O(log n + fired) per karat. notify() is called
+    on every price change notification; bursts collapse into one check after
+    `debounce` seconds.
+    """
+
+    def __init__(self, pool: asyncpg.Pool, loader: Callable[[], Awaitable[Dict[int, float]]],
+                 dispatcher: TelegramDispatcher, cooldown: float = 3600, batch_size: int = 500,
+                 debounce: float = 0.5):
+        self.pool = pool
+        self.loader = loader
+        self.dispatcher = dispatcher
+        self.cooldown = timedelta(seconds=cooldown)
+        self.batch_size = batch_size
+        self.debounce = debounce
+        self.subscriptions: Dict[int, Subscription] = {}
+        self.indexes: Dict[Tuple[int, str], ThresholdIndex] = defaultdict(ThresholdIndex)
+        # Price each karat was last matched at; crossings are measured from here
+        self.last_prices: Dict[int, float] = {}
+        self.fired = 0
+        self.sent = 0
+        self._dirty = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Load active subscriptions and the current prices (nothing fires)"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(LOAD_SUBSCRIPTIONS_SQL)
+        for row in rows:
+            self._add(Subscription(
+                row['id'], row['telegram_user_id'], row['karat'], row['direction'], float(row['threshold'])
+            ))
+        try:
+            self.last_prices = await self.loader()
+        except Exception as e:
+            logger.warning(f"Alert engine started without prices: {e}")
+        logger.info(f"Alert engine loaded {len(self.subscriptions)} subscription(s)")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.dispatcher.close()
+
+    async def subscribe(self, telegram_user_id: str, karat: int, direction: str,
+                        threshold: float) -> Subscription:
+        # Stored as NUMERIC(12, 2); index the same value
+        threshold = round(threshold, 2)
+        if karat not in self.last_prices:
+            # Crossings are measured from the price at subscription time
+            await self._seed_prices()
+        async with self.pool.acquire() as conn:
+            sub_id = await conn.fetchval(SUBSCRIBE_SQL, telegram_user_id, karat, direction, threshold)
+        sub = Subscription(sub_id, telegram_user_id, karat, direction, threshold)
+        if sub_id not in self.subscriptions:
+            self._add(sub)
+        return sub
+
+    async def unsubscribe(self, sub_id: int, telegram_user_id: str) -> bool:
+        async with self.pool.acquire() as conn:
+            removed = await conn.fetchval(UNSUBSCRIBE_SQL, sub_id, telegram_user_id)
+        if removed is None:
+            return False
+
+        sub = self.subscriptions.pop(sub_id, None)
+        if sub:
+            self.indexes[(sub.karat, sub.direction)].remove(sub.threshold, sub.id)
+        return True
+
+    def match(self, karat: int, price: float) -> List[Subscription]:
+        """Subscriptions crossed by moving `karat` from its last price to `price`"""
+        previous = self.last_prices.get(karat)
+        self.last_prices[karat] = price
+        if previous is None or price == previous:
+            return []
+
+        if price > previous:
+            ids = self.indexes[(karat, 'above')].above(previous, price)
+        else:
+            ids = self.indexes[(karat, 'below')].below(price, previous)
+        return [self.subscriptions[sub_id] for sub_id in ids]
+
+    def notify(self):
+        """Schedule a check; safe to call from a LISTEN callback
+
+        Runs even without subscriptions, so last_prices stays current for the
+        first subscriber.
+        """
+        self._dirty = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'subscriptions': len(self.subscriptions),
+            'fired': self.fired,
+            'sent': self.sent,
+        }
+
+    def _add(self, sub: Subscription):
+        self.subscriptions[sub.id] = sub
+        self.indexes[(sub.karat, sub.direction)].add(sub.threshold, sub.id)
+
+    async def _seed_prices(self):
+        """Record prices for karats without one; known karats are left to check()"""
+        try:
+            prices = await self.loader()
+        except Exception as e:
+            logger.warning(f"Could not load prices for a new subscription: {e}")
+            return
+        for karat, price in prices.items():
+            self.last_prices.setdefault(karat, price)
+
+    async def _run(self):
+        while self._dirty:
+            await asyncio.sleep(self.debounce)
+            self._dirty = False
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error(f"Alert check failed: {e}")
+
+    async def check(self):
+        """Match the latest prices and dispatch whatever crossed"""
+        prices = await self.loader()
+        fired = []
+        for karat, price in prices.items():
+            fired.extend((sub, price) for sub in self.match(karat, price))
+        if not fired:
+            return
+
+        self.fired += len(fired)
+        for start in range(0, len(fired), self.batch_size):
+            await self._dispatch(fired[start:start + self.batch_size])
+
+    async def _dispatch(self, batch: List[Tuple[Subscription, float]]):
+        async with self.pool.acquire() as conn:
+            claimed = {row['id'] for row in await conn.fetch(
+                CLAIM_SQL, [sub.id for sub, _ in batch], self.cooldown
+            )}
+
+        # One message per user, however many of their alerts fired
+        messages: Dict[str, List[str]] = defaultdict(list)
+        message_subs: Dict[str, List[int]] = defaultdict(list)
+        for sub, price in batch:
+            if sub.id in claimed:
+                messages[sub.telegram_user_id].append(format_alert(sub, price))
+                message_subs[sub.telegram_user_id].append(sub.id)
+
+        users = list(messages)
+        results = await asyncio.gather(*(
+            self.dispatcher.send(user_id, '\n'.join(messages[user_id])) for user_id in users
+        ))
+        self.sent += sum(results)
+
+        unsent = [sub_id for user_id, ok in zip(users, results) if not ok for sub_id in message_subs[user_id]]
+        if unsent:
+            async with self.pool.acquire() as conn:
+                await conn.execute(RELEASE_SQL, unsent)
+        logger.info(f"Alerts: {len(batch)} fired, {len(claimed)} out of cooldown, {sum(results)} message(s) sent")
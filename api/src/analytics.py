@@ -0,0 +1,214 @@
+"""
+Price analytics computed with NumPy
+Loads each karat's bucketed series as contiguous arrays (Postgres builds the
+arrays, so no per-row Python) and derives moving averages, volatility,
+spreads and karat-ratio consistency with vectorised operations
+"""
+
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+# Upper bound on buckets per karat (a year of 15-minute buckets)
+MAX_ANALYTICS_POINTS = 36_000
+
+# Millesimal fineness per karat, as stamped on Algerian jewellery
+FINENESS = {18: 750, 21: 875, 22: 916, 24: 999}
+
+# Parameters: $1 bucket width, $2 karat, $3 range start (exclusive), $4 range end.
+# Buckets without a mid price (single-sided posts only) are left out.
+SERIES_QUERY = """
+    SELECT
+        array_agg(EXTRACT(EPOCH FROM bucket)::float8 ORDER BY bucket) AS ts,
+        array_agg(close_price::float8 ORDER BY bucket) AS close,
+        array_agg(spread::float8 ORDER BY bucket) AS spread
+    FROM (
+        SELECT
+            time_bucket($1::interval, timestamp) AS bucket,
+            last((buy_price + sell_price) / 2, timestamp)
+                FILTER (WHERE buy_price IS NOT NULL AND sell_price IS NOT NULL) AS close_price,
+            AVG(sell_price - buy_price) AS spread
+        FROM gold_prices
+        WHERE karat = $2
+          AND timestamp > $3
+          AND timestamp <= $4
+        GROUP BY bucket
+        HAVING COUNT((buy_price + sell_price) / 2) > 0
+    ) buckets
+"""
+
+LAST_TIMESTAMPS_QUERY = """
+    SELECT karat, MAX(timestamp) AS last_timestamp
+    FROM latest_prices
+    WHERE karat = ANY($1::int[])
+    GROUP BY karat
+"""
+
+
+class Series(NamedTuple):
+    """One karat's bucketed prices; NaN where a bucket has no spread"""
+    ts: np.ndarray
+    close: np.ndarray
+    spread: np.ndarray
+
+    @classmethod
+    def from_row(cls, row) -> 'Series':
+        if row is None or row['ts'] is None:
+            empty = np.empty(0, dtype=np.float64)
+            return cls(empty, empty, empty)
+        # NULL spreads arrive as None, which becomes NaN in a float64 array
+        return cls(
+            np.asarray(row['ts'], dtype=np.float64),
+            np.asarray(row['close'], dtype=np.float64),
+            np.asarray(row['spread'], dtype=np.float64)
+        )
+
+
+def sma(values: np.ndarray, window: int) -> np.ndarray:
+    """Simple moving average; element i covers values[i:i + window]"""
+    if len(values) < window:
+        return np.empty(0)
+    sums = np.cumsum(np.concatenate(([0.0], values)))
+    return (sums[window:] - sums[:-window]) / window
+
+
+def ema(values: np.ndarray, window: int) -> np.ndarray:
+    """Exponential moving average (alpha = 2 / (window + 1)), seeded with values[0]
+
+    y[t] = decay * y[t-1] + alpha * x[t] has the closed form
+    y[t] = decay^t * (y[0] + alpha * sum(x[i] / decay^i)), evaluated with a
+    cumsum. decay^-i grows without bound, so the series is taken in blocks
+    short enough to keep that factor below 1e8; only the blocks loop.
+    """
+    if len(values) == 0:
+        return np.empty(0)
+    alpha = 2.0 / (window + 1)
+    decay = 1.0 - alpha
+    if decay <= 0:
+        # window 1: the average is the series itself
+        return values.astype(np.float64)
+    block = max(1, int(math.log(1e-8) / math.log(decay)))
+
+    out = np.empty_like(values, dtype=np.float64)
+    previous = values[0]
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        powers = decay ** np.arange(1, len(chunk) + 1)
+        out[start:start + len(chunk)] = powers * (previous + alpha * np.cumsum(chunk / powers))
+        previous = out[start + len(chunk) - 1]
+    return out
+
+
+def rolling_volatility(close: np.ndarray, window: int) -> np.ndarray:
+    """Standard deviation of log returns over each `window` returns
+
+    Running sums make this O(n) for any window. Returns are centred first so
+    the sum-of-squares form doesn't lose precision.
+    """
+    returns = np.diff(np.log(close))
+    window = max(window, 2)
+    if len(returns) < window:
+        return np.empty(0)
+
+    centred = returns - returns.mean()
+    sums = np.cumsum(np.concatenate(([0.0], centred)))
+    squares = np.cumsum(np.concatenate(([0.0], centred * centred)))
+    window_sum = sums[window:] - sums[:-window]
+    window_squares = squares[window:] - squares[:-window]
+    variance = (window_squares - window_sum * window_sum / window) / (window - 1)
+    return np.sqrt(np.clip(variance, 0, None))
+
+
+def _num(value) -> Optional[float]:
+    """JSON-safe float: NaN and missing values become None"""
+    if value is None:
+        return None
+    value = float(value)
+    return None if math.isnan(value) else round(value, 6)
+
+
+def _last(values: np.ndarray) -> Optional[float]:
+    return _num(values[-1]) if len(values) else None
+
+
+def spread_stats(series: Series) -> Dict[str, Optional[float]]:
+    spread = series.spread
+    valid = ~np.isnan(spread)
+    if not valid.any():
+        return {'mean': None, 'median': None, 'min': None, 'max': None, 'latest': None, 'mean_percent': None}
+    return {
+        'mean': _num(spread[valid].mean()),
+        'median': _num(np.median(spread[valid])),
+        'min': _num(spread[valid].min()),
+        'max': _num(spread[valid].max()),
+        'latest': _num(spread[valid][-1]),
+        'mean_percent': _num((spread[valid] / series.close[valid]).mean() * 100),
+    }
+
+
+def karat_summary(karat: int, series: Series, window: int, periods_per_year: float,
+                  include_series: bool) -> Dict[str, Any]:
+    """Moving averages, volatility and spread statistics for one karat"""
+    moving = sma(series.close, window)
+    smoothed = ema(series.close, window)
+    volatility = rolling_volatility(series.close, window)
+    latest_volatility = _last(volatility)
+
+    summary = {
+        'karat': karat,
+        'points': int(len(series.close)),
+        'start': datetime.utcfromtimestamp(series.ts[0]).isoformat() if len(series.ts) else None,
+        'end': datetime.utcfromtimestamp(series.ts[-1]).isoformat() if len(series.ts) else None,
+        'last_price': _last(series.close),
+        'sma': _last(moving),
+        'ema': _last(smoothed),
+        'volatility': latest_volatility,
+        'volatility_annualized': _num(latest_volatility * math.sqrt(periods_per_year))
+        if latest_volatility is not None else None,
+        'spread': spread_stats(series),
+    }
+
+    if include_series:
+        # Indicator arrays are right-aligned with the timestamps; pad the front
+        def pad(values: np.ndarray) -> List[Optional[float]]:
+            rounded = np.round(values, 6)
+            return [None] * (len(series.close) - len(values)) + \
+                np.where(np.isnan(rounded), None, rounded).tolist()
+
+        summary['series'] = {
+            'timestamp': series.ts.astype('datetime64[s]').astype(str).tolist(),
+            'close': pad(series.close),
+            'sma': pad(moving),
+            'ema': pad(smoothed),
+            'volatility': pad(volatility),
+        }
+    return summary
+
+
+def karat_ratios(series: Dict[int, Series]) -> List[Dict[str, Any]]:
+    """Observed price ratio of each karat pair against their fineness ratio"""
+    ratios = []
+    karats = sorted(k for k in series if len(series[k].close))
+    for i, high in enumerate(karats):
+        for low in karats[:i]:
+            _, hi_idx, lo_idx = np.intersect1d(series[high].ts, series[low].ts, return_indices=True)
+            expected = FINENESS[high] / FINENESS[low]
+            entry = {'pair': f"{high}/{low}", 'expected': round(expected, 6), 'points': int(len(hi_idx))}
+            if len(hi_idx):
+                observed = series[high].close[hi_idx] / series[low].close[lo_idx]
+                deviation = (observed / expected - 1) * 100
+                entry.update({
+                    'latest': _num(observed[-1]),
+                    'mean': _num(observed.mean()),
+                    'mean_deviation_percent': _num(deviation.mean()),
+                    'max_deviation_percent': _num(np.abs(deviation).max()),
+                })
+            ratios.append(entry)
+    return ratios
+
+
+def series_range(last_timestamp: datetime, days: int) -> tuple:
+    """(start, end) of the analysed range, anchored on the karat's newest price"""
+    return last_timestamp - timedelta(days=days), last_timestamp
@@ -0,0 +1,223 @@
+"""
+In-process response cache for hot read endpoints
+TTL + bounded LRU, invalidated by Postgres NOTIFY when new prices land
+"""
+
+import time
+import asyncio
+import logging
+import functools
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+# Channel the gold_prices trigger notifies on (see sql/create_triggers.sql)
+PRICES_CHANNEL = 'gold_prices_changed'
+
+# Backoff between attempts to re-open a lost LISTEN connection, in seconds
+RECONNECT_DELAY = 1.0
+RECONNECT_MAX_DELAY = 60.0
+
+
+def _freeze(value: Any) -> Hashable:
+    """Make list query parameters (e.g. karat=18&karat=21) usable as a key"""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after `ttl` seconds"""
+
+    def __init__(self, ttl: float = 300, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        # Bumped on every invalidation so in-flight loads never repopulate stale data
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Return (found, value) for a live entry"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return False, None
+
+        self._entries.move_to_end(key)
+        return True, value
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry when full"""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry and forget in-flight loads so later callers reload"""
+        self._entries.clear()
+        self._inflight.clear()
+        self._generation += 1
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value or run `loader` once for concurrent misses"""
+        found, value = self.get(key)
+        if found:
+            self.hits += 1
+            return value
+
+        # Another request is already loading this key - wait for its result
+        if key in self._inflight:
+            self.hits += 1
+            future = self._inflight[key]
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The loading request was cancelled, not this one: load it here
+                if future.cancelled() and not asyncio.current_task().cancelling():
+                    return await self.get_or_load(key, loader)
+                raise
+
+        self.misses += 1
+        generation = self._generation
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+
+        try:
+            value = await loader()
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a failure without waiters isn't logged as unhandled
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            if generation == self._generation:
+                self.set(key, value)
+            return value
+        finally:
+            # Cancelled loader: wake the waiters instead of leaving them hanging
+            if not future.done():
+                future.cancel()
+            # clear() may have replaced this load with a newer one
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def cached(self, name: str):
+        """Decorator caching an async endpoint by name and keyword arguments"""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                key = (name, _freeze(args), _freeze(sorted(kwargs.items())))
+                return await self.get_or_load(key, lambda: func(*args, **kwargs))
+            return wrapper
+        return decorator
+
+
+class CacheInvalidator:
+    """Clears a cache whenever Postgres sends a NOTIFY on PRICES_CHANNEL
+
+    `on_change` callbacks run after each clear, so other consumers (the live
+    price stream) share this one LISTEN connection. A lost connection is
+    re-opened with exponential backoff; NOTIFYs sent meanwhile are gone, so a
+    reconnect counts as a change.
+    """
+
+    def __init__(self, cache: TTLCache, database_url: str, channel: str = PRICES_CHANNEL,
+                 on_change: Iterable[Callable[[], None]] = ()):
+        self.cache = cache
+        self.database_url = database_url
+        self.channel = channel
+        self.on_change = list(on_change)
+        self.conn: Optional[asyncpg.Connection] = None
+        self.reconnects = 0
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    async def start(self):
+        """Open a dedicated LISTEN connection"""
+        self._stopping = False
+        try:
+            await self._listen()
+        except Exception as e:
+            # The TTL still bounds staleness, so keep serving without push invalidation
+            logger.warning(f"Cache invalidation listener unavailable: {e}")
+            self._schedule_reconnect()
+
+    async def stop(self):
+        self._stopping = True
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+            await asyncio.gather(self._reconnect_task, return_exceptions=True)
+            self._reconnect_task = None
+        if self.conn and not self.conn.is_closed():
+            await self.conn.remove_listener(self.channel, self._on_notify)
+            await self.conn.close()
+        self.conn = None
+
+    async def _listen(self):
+        conn = await asyncpg.connect(self.database_url)
+        try:
+            await conn.add_listener(self.channel, self._on_notify)
+        except BaseException:
+            await conn.close()
+            raise
+        conn.add_termination_listener(self._on_terminate)
+        self.conn = conn
+        logger.info(f"Listening for cache invalidations on '{self.channel}'")
+
+    def _on_notify(self, connection, pid, channel, payload):
+        logger.debug(f"Invalidating cache on {channel} ({payload})")
+        self._changed()
+
+    def _changed(self):
+        self.cache.clear()
+        for callback in self.on_change:
+            callback()
+
+    def _on_terminate(self, connection):
+        if self._stopping or connection is not self.conn:
+            return
+        logger.warning("Cache invalidation listener disconnected; falling back to TTL expiry")
+        self.conn = None
+        self.cache.clear()
+        self._schedule_reconnect()
+
+    def _schedule_reconnect(self):
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self):
+        delay = RECONNECT_DELAY
+        while not self._stopping:
+            await asyncio.sleep(delay)
+            try:
+                await self._listen()
+            except Exception as e:
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+                logger.warning(f"Cache invalidation listener reconnect failed, retrying in {delay:.0f}s: {e}")
+                continue
+
+            # Prices may have changed while nobody was listening
+            self.reconnects += 1
+            self._changed()
+            return
@@ -0,0 +1,202 @@
+"""
+Bulk export of raw gold_prices rows
+CSV streams straight out of COPY ... TO STDOUT and NDJSON is built by
+Postgres and read through a server-side cursor, so memory stays flat however
+much history is exported. Run as `python -m src.export` for file exports,
+including Parquet (needs pyarrow).
+"""
+
+import os
+import sys
+import asyncio
+import logging
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('csv', 'ndjson')
+MEDIA_TYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+EXPORT_COLUMNS = ['id', 'timestamp', 'karat', 'buy_price', 'sell_price', 'source', 'gold_type']
+
+# Bytes gathered before a chunk is handed to the client, and chunks buffered
+# ahead of a slow client before COPY is paused
+CHUNK_SIZE = 64 * 1024
+COPY_QUEUE_SIZE = 8
+
+# Rows per cursor round trip
+BATCH_SIZE = 5000
+
+
+def build_export_query(karats: Optional[List[int]] = None, sources: Optional[List[str]] = None,
+                       start: Optional[datetime] = None, end: Optional[datetime] = None,
+                       include_raw: bool = False) -> Tuple[str, list]:
+    """SELECT over gold_prices in timestamp order, with only the filters given
+
+    Leaving absent filters out of the SQL (rather than `$n IS NULL OR ...`)
+    keeps chunk exclusion working on the hypertable.
+    """
+    columns = EXPORT_COLUMNS + (['raw_text'] if include_raw else [])
+    conditions = []
+    args = []
+    for value, condition in (
+        (karats, 'karat = ANY(${}::int[])'),
+        (sources, 'source = ANY(${}::text[])'),
+        (start, 'timestamp >= ${}::timestamptz'),
+        (end, 'timestamp < ${}::timestamptz'),
+    ):
+        if value:
+            args.append(value)
+            conditions.append(condition.format(len(args)))
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    query = f"""
+        SELECT {', '.join(columns)}
+        FROM gold_prices
+        {where}
+        ORDER BY timestamp, karat, source
+    """
+    return query, args
+
+
+async def stream_csv(conn: asyncpg.Connection, query: str, args: list) -> AsyncIterator[bytes]:
+    """CSV with a header row, as produced by COPY, in CHUNK_SIZE pieces
+
+    COPY writes into a bounded queue from a separate task, so it waits while
+    the client is behind instead of buffering the table.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=COPY_QUEUE_SIZE)
+    buffer = bytearray()
+
+    async def write(data: bytes):
+        buffer.extend(data)
+        if len(buffer) >= CHUNK_SIZE:
+            await queue.put(bytes(buffer))
+            buffer.clear()
+
+    async def copy():
+        try:
+            await conn.copy_from_query(query, *args, output=write, format='csv', header=True)
+            if buffer:
+                await queue.put(bytes(buffer))
+            await queue.put(None)
+        except Exception as e:
+            await queue.put(e)
+
+    task = asyncio.create_task(copy())
+    try:
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+    finally:
+        # Client gone or finished: stop COPY before the connection is released
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+async def fetch_batches(conn: asyncpg.Connection, query: str, args: list,
+                        batch_size: int = BATCH_SIZE) -> AsyncIterator[List[asyncpg.Record]]:
+    """Rows through a server-side cursor, `batch_size` at a time"""
+    async with conn.transaction():
+        cursor = await conn.cursor(query, *args)
+        while True:
+            rows = await cursor.fetch(batch_size)
+            if not rows:
+                break
+            yield rows
+
+
+async def stream_ndjson(conn: asyncpg.Connection, query: str, args: list) -> AsyncIterator[bytes]:
+    """One JSON object per line; Postgres encodes the rows, Python only joins them"""
+    json_query = f"SELECT row_to_json(e)::text FROM ({query}) e"
+    async for rows in fetch_batches(conn, json_query, args):
+        yield ''.join(row[0] + '\n' for row in rows).encode()
+
+
+def stream_export(conn: asyncpg.Connection, fmt: str, query: str, args: list) -> AsyncIterator[bytes]:
+    if fmt == 'csv':
+        return stream_csv(conn, query, args)
+    return stream_ndjson(conn, query, args)
+
+
+async def write_parquet(conn: asyncpg.Connection, query: str, args: list, path: str,
+                        include_raw: bool = False) -> int:
+    """Write the export to a Parquet file, one row group per cursor batch"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    fields = [
+        ('id', pa.int64()),
+        ('timestamp', pa.timestamp('us', tz='UTC')),
+        ('karat', pa.int16()),
+        ('buy_price', pa.decimal128(12, 2)),
+        ('sell_price', pa.decimal128(12, 2)),
+        ('source', pa.string()),
+        ('gold_type', pa.string()),
+    ]
+    if include_raw:
+        fields.append(('raw_text', pa.string()))
+    schema = pa.schema(fields)
+
+    count = 0
+    with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+        async for rows in fetch_batches(conn, query, args, batch_size=50_000):
+            columns = list(zip(*rows))
+            writer.write_batch(pa.record_batch(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema
+            ))
+            count += len(rows)
+    return count
+
+
+async def main():
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Export raw gold prices")
+    arg_parser.add_argument('--format', choices=FORMATS + ('parquet',), default='csv')
+    arg_parser.add_argument('--output', default=None,
+                            help="Output file (default: stdout; required for parquet)")
+    arg_parser.add_argument('--karat', type=int, action='append', default=None,
+                            help="Only this karat (repeatable)")
+    arg_parser.add_argument('--source', action='append', default=None,
+                            help="Only this source (repeatable)")
+    arg_parser.add_argument('--start', type=datetime.fromisoformat, default=None,
+                            help="Only prices at or after this time (UTC)")
+    arg_parser.add_argument('--end', type=datetime.fromisoformat, default=None,
+                            help="Only prices before this time (UTC)")
+    arg_parser.add_argument('--raw', action='store_true', help="Include the source message text")
+    args = arg_parser.parse_args()
+
+    if args.format == 'parquet' and not args.output:
+        arg_parser.error("--output is required for parquet")
+
+    query, query_args = build_export_query(args.karat, args.source, args.start, args.end, args.raw)
+    conn = await asyncpg.connect(os.getenv('DATABASE_URL', 'postgresql://localhost/goldtracker'))
+    try:
+        if args.format == 'parquet':
+            count = await write_parquet(conn, query, query_args, args.output, args.raw)
+            logger.info(f"Exported {count} row(s) to {args.output}")
+            return
+
+        out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+        try:
+            async for chunk in stream_export(conn, args.format, query, query_args):
+                out.write(chunk)
+        finally:
+            if args.output:
+                out.close()
+    finally:
+        await conn.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,136 @@
+"""
+Server-side bucketing for price history
+Picks a bucket width for the requested range and builds the OHLC query
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import List, NamedTuple, Optional
+
+SUPPORTED_KARATS = [18, 21, 22, 24]
+
+# Upper bound on buckets per karat in one response
+MAX_HISTORY_POINTS = 1000
+
+
+class Bucket(NamedTuple):
+    """A bucket width and the relation it is computed from"""
+    name: str
+    width: timedelta
+    relation: str
+    time_column: str
+
+
+# Ordered from finest to coarsest. Sub-hour widths come from raw rows; the
+# bounded point count keeps those ranges short. Coarser widths re-aggregate
+# the continuous aggregates.
+BUCKETS = [
+    Bucket('5m', timedelta(minutes=5), 'gold_prices', 'timestamp'),
+    Bucket('15m', timedelta(minutes=15), 'gold_prices', 'timestamp'),
+    Bucket('1h', timedelta(hours=1), 'gold_prices_hourly', 'hour'),
+    Bucket('4h', timedelta(hours=4), 'gold_prices_hourly', 'hour'),
+    Bucket('1d', timedelta(days=1), 'historical_gold_prices_daily', 'date'),
+    Bucket('1w', timedelta(weeks=1), 'historical_gold_prices_daily', 'date'),
+]
+BUCKETS_BY_NAME = {bucket.name: bucket for bucket in BUCKETS}
+
+
+def choose_bucket(start: datetime, end: datetime, bucket: Optional[str] = None,
+                  points: Optional[int] = None) -> Bucket:
+    """Pick the finest bucket that honours the request and MAX_HISTORY_POINTS
+
+    Raises ValueError for an unknown bucket name, or for a range so long that
+    even the coarsest bucket would exceed MAX_HISTORY_POINTS.
+    """
+    span = end - start
+    target = min(points or MAX_HISTORY_POINTS, MAX_HISTORY_POINTS)
+    min_width = span / target
+
+    if bucket is not None:
+        if bucket not in BUCKETS_BY_NAME:
+            raise ValueError(f"Unknown bucket '{bucket}', expected one of {', '.join(BUCKETS_BY_NAME)}")
+        min_width = max(min_width, BUCKETS_BY_NAME[bucket].width)
+
+    for candidate in BUCKETS:
+        if candidate.width >= min_width:
+            return candidate
+
+    longest = BUCKETS[-1].width * MAX_HISTORY_POINTS
+    raise ValueError(f"Range too long, at most {longest.days} days")
+
+
+def build_history_query(bucket: Bucket) -> str:
+    """OHLC + average + count per (bucket, karat)
+
+    Parameters: $1 bucket width, $2 start, $3 end, $4 karats
+    """
+    col = bucket.time_column
+
+    if bucket.relation == 'gold_prices':
+        return """
+            SELECT
+                time_bucket($1::interval, timestamp) AS bucket,
+                karat,
+                first((buy_price + sell_price) / 2, timestamp) AS open_price,
+                MAX((buy_price + sell_price) / 2) AS high_price,
+                MIN((buy_price + sell_price) / 2) AS low_price,
+                last((buy_price + sell_price) / 2, timestamp) AS close_price,
+                AVG((buy_price + sell_price) / 2) AS avg_price,
+                COUNT(*) AS data_points
+            FROM gold_prices
+            WHERE timestamp >= time_bucket($1::interval, $2::timestamptz)
+              AND timestamp < $3
+              AND karat = ANY($4::int[])
+            GROUP BY bucket, karat
+            ORDER BY bucket, karat
+        """
+
+    return f"""
+        SELECT
+            time_bucket($1::interval, {col}) AS bucket,
+            karat,
+            first(open_price, {col}) AS open_price,
+            MAX(high_price) AS high_price,
+            MIN(low_price) AS low_price,
+            last(close_price, {col}) AS close_price,
+            SUM(sum_price) / NULLIF(SUM(price_points), 0) AS avg_price,
+            SUM(data_points) AS data_points
+        FROM {bucket.relation}
+        WHERE {col} >= time_bucket($1::interval, $2::timestamptz)
+          AND {col} < $3
+          AND karat = ANY($4::int[])
+        GROUP BY bucket, karat
+        ORDER BY bucket, karat
+    """
+
+
+def _as_float(value) -> Optional[float]:
+    """Convert a nullable numeric column"""
+    return float(value) if value is not None else None
+
+
+def serialize_history_row(row) -> dict:
+    """JSON-ready dict for one history bucket"""
+    return {
+        "timestamp": row['bucket'].isoformat(),
+        "karat": row['karat'],
+        "open": _as_float(row['open_price']),
+        "high": _as_float(row['high_price']),
+        "low": _as_float(row['low_price']),
+        "close": _as_float(row['close_price']),
+        "avg_price": _as_float(row['avg_price']),
+        "data_points": int(row['data_points'])
+    }
+
+
+def to_utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Normalise query datetimes to naive UTC like the rest of the API"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def resolve_karats(karats: Optional[List[int]]) -> List[int]:
+    """Requested karats, defaulting to all supported ones"""
+    if not karats:
+        return list(SUPPORTED_KARATS)
+    return [k for k in karats if k in SUPPORTED_KARATS]
@@ -3,18 +3,81 @@ FastAPI Backend for Gold Tracker
 Provides API endpoints for gold price data
 """
 
+import os
+import asyncio
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Dict, List, Optional
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel, Field
 import asyncpg
 
+from .alerts import DIRECTIONS, AlertEngine, TelegramDispatcher
+from .analytics import (
+    LAST_TIMESTAMPS_QUERY, MAX_ANALYTICS_POINTS, SERIES_QUERY, Series, karat_ratios, karat_summary, series_range
+)
+from .cache import TTLCache, CacheInvalidator
+from .responses import Payload, conditional, encode_payload
+from .export import FORMATS, MEDIA_TYPES, build_export_query, stream_export
+from .schema import migrate
+from .stream import PriceBroadcaster
+from .world import WorldPriceFeed, WorldQuote, create_provider
+from .history import (
+    BUCKETS_BY_NAME, MAX_HISTORY_POINTS, SUPPORTED_KARATS, build_history_query, choose_bucket, resolve_karats,
+    serialize_history_row, to_utc_naive
+)
+
 # Database connection pool
 db_pool: Optional[asyncpg.Pool] = None
 
+# Response cache for hot read endpoints, cleared when gold_prices changes
+response_cache = TTLCache(
+    ttl=float(os.getenv('CACHE_TTL_SECONDS', '300')),
+    max_entries=int(os.getenv('CACHE_MAX_ENTRIES', '256'))
+)
+cache_invalidator: Optional[CacheInvalidator] = None
+
+# Analytics results per karat and newest price timestamp. Also cleared on
+# NOTIFY: a backfill changes the series without moving the newest timestamp.
+analytics_cache = TTLCache(
+    ttl=float(os.getenv('ANALYTICS_CACHE_TTL_SECONDS', '3600')),
+    max_entries=int(os.getenv('ANALYTICS_CACHE_MAX_ENTRIES', '64'))
+)
+
+
+async def load_stream_prices() -> List[dict]:
+    return [price.model_dump(mode='json') for price in await get_current_prices()]
+
+
+# Pushes /prices/current to dashboard clients whenever gold_prices changes
+price_broadcaster = PriceBroadcaster(
+    load_stream_prices,
+    buffer_size=int(os.getenv('STREAM_CLIENT_BUFFER', '8')),
+    max_clients=int(os.getenv('STREAM_MAX_CLIENTS', '1000'))
+)
+
+# Each running export holds a pooled connection for its whole duration
+export_slots = asyncio.Semaphore(int(os.getenv('EXPORT_MAX_CONCURRENT', '2')))
+
+# Matches price moves against alert subscriptions, created once the pool exists
+alert_engine: Optional[AlertEngine] = None
+
+
+async def load_alert_prices() -> Dict[int, float]:
+    return {price.karat: price.current_price for price in await get_current_prices()}
+
+
+# Spot gold and USD/DZD, refreshed in the background and read from memory
+world_feed = WorldPriceFeed(
+    create_provider(),
+    refresh_interval=float(os.getenv('WORLD_REFRESH_SECONDS', '300')),
+    max_age=float(os.getenv('WORLD_MAX_AGE_SECONDS', '3600'))
+)
+
 
 # Pydantic models
 class GoldPriceResponse(BaseModel):
@@ -40,31 +103,142 @@ class PriceSummary(BaseModel):
 
 class WorldPrice(BaseModel):
     """International gold price"""
-    price_usd: float
-    price_dzd: float
-    premium_percent: float
+    price_usd: float = Field(..., description="Spot gold in USD per troy ounce")
+    price_dzd: float = Field(..., description="Spot 24K gold in DZD per gram")
+    premium_percent: Optional[float] = Field(None, description="Local 24K price over spot, in percent")
+    usd_dzd: float = Field(..., description="USD/DZD rate used")
+    updated_at: datetime
+    stale: bool = Field(False, description="Upstream failing; last good quote is older than allowed")
 
 
 class DashboardData(BaseModel):
     """Main dashboard data"""
     prices: List[PriceSummary]
-    world_price: WorldPrice
+    world_price: Optional[WorldPrice]
     last_update: datetime
 
 
+# Latest price per karat joined with its 24h AVG/MIN/MAX in one set-based query.
+# latest_prices holds one row per (karat, source), so this never touches the
+# full history except for the indexed 24h window. One-sided rows (stored
+# before the scrapers skipped them) have no mid price and are ignored.
+CURRENT_PRICES_QUERY = """
+    WITH latest AS (
+        SELECT DISTINCT ON (karat)
+            karat,
+            (buy_price + sell_price) / 2 AS current_price,
+            timestamp AS last_updated
+        FROM latest_prices
+        WHERE karat IN (18, 21, 22, 24)
+          AND buy_price IS NOT NULL AND sell_price IS NOT NULL
+        ORDER BY karat, timestamp DESC
+    )
+    SELECT
+        l.karat,
+        l.current_price,
+        l.last_updated,
+        s.avg_24h,
+        s.low_24h,
+        s.high_24h
+    FROM latest l
+    LEFT JOIN LATERAL (
+        SELECT 
+            AVG((g.buy_price + g.sell_price) / 2) AS avg_24h,
+            MIN((g.buy_price + g.sell_price) / 2) AS low_24h,
+            MAX((g.buy_price + g.sell_price) / 2) AS high_24h
+        FROM gold_prices g
+        WHERE g.karat = l.karat
+          AND g.timestamp >= $1
+    ) s ON TRUE
+    ORDER BY l.karat
+"""
+
+
+def build_price_summary(row) -> Optional[PriceSummary]:
+    """Build a PriceSummary from a CURRENT_PRICES_QUERY row, None without a mid price"""
+    if row['current_price'] is None:
+        return None
+    current = float(row['current_price'])
+    
+    avg_24h = float(row['avg_24h'] or current)
+    low_24h = float(row['low_24h'] or current)
+    high_24h = float(row['high_24h'] or current)
+    
+    change_24h = current - avg_24h
+    change_percent = (change_24h / avg_24h * 100) if avg_24h > 0 else 0
+    
+    return PriceSummary(
+        karat=row['karat'],
+        current_price=round(current, 2),
+        change_24h=round(change_24h, 2),
+        change_percent=round(change_percent, 2),
+        high_24h=round(high_24h, 2),
+        low_24h=round(low_24h, 2),
+        last_updated=row['last_updated']
+    )
+
+
+def latest_update(prices: List[PriceSummary]) -> Optional[datetime]:
+    """Timestamp of the newest price"""
+    return max((price.last_updated for price in prices), default=None)
+
+
+def build_world_price(quote: WorldQuote, prices: List[PriceSummary], stale: bool) -> WorldPrice:
+    """World quote plus the local premium over it
+    
+    The premium compares the local 24K price per gram with spot. Without a
+    24K quote the purest karat available is scaled up to 24K.
+    """
+    premium = None
+    if prices and quote.gram_dzd > 0:
+        purest = max(prices, key=lambda p: p.karat)
+        local_24k = purest.current_price * 24 / purest.karat
+        premium = round((local_24k / quote.gram_dzd - 1) * 100, 2)
+    
+    return WorldPrice(
+        price_usd=round(quote.price_usd, 2),
+        price_dzd=round(quote.gram_dzd, 2),
+        premium_percent=premium,
+        usd_dzd=round(quote.usd_dzd, 4),
+        updated_at=datetime.utcfromtimestamp(quote.fetched_at),
+        stale=stale
+    )
+
+
 # Lifespan for database connection
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage database connection pool lifecycle"""
-    global db_pool
+    global db_pool, cache_invalidator, alert_engine
     
-    import os
     database_url = os.getenv('DATABASE_URL', 'postgresql://localhost/goldtracker')
     
     try:
         db_pool = await asyncpg.create_pool(database_url, min_size=2, max_size=10)
+        if os.getenv('RUN_MIGRATIONS', '1') == '1':
+            async with db_pool.acquire() as conn:
+                await migrate(conn)
+        alert_engine = AlertEngine(
+            db_pool,
+            load_alert_prices,
+            TelegramDispatcher(os.getenv('BOT_TOKEN'), rate=float(os.getenv('ALERT_SEND_RATE', '30'))),
+            cooldown=float(os.getenv('ALERT_COOLDOWN_SECONDS', '3600')),
+            batch_size=int(os.getenv('ALERT_BATCH_SIZE', '500'))
+        )
+        await alert_engine.start()
+        cache_invalidator = CacheInvalidator(
+            response_cache, database_url, on_change=[analytics_cache.clear, price_broadcaster.notify, alert_engine.notify]
+        )
+        await cache_invalidator.start()
+        world_feed.start()
         yield
     finally:
+        await world_feed.stop()
+        await price_broadcaster.stop()
+        if alert_engine:
+            await alert_engine.stop()
+        if cache_invalidator:
+            await cache_invalidator.stop()
         if db_pool:
             await db_pool.close()
 
@@ -94,156 +268,282 @@ async def root():
     return {
         "status": "ok",
         "service": "Gold Tracker API",
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.utcnow().isoformat(),
+        "cache": response_cache.stats(),
+        "analytics_cache": analytics_cache.stats(),
+        "stream": price_broadcaster.stats(),
+        "alerts": alert_engine.stats() if alert_engine else None,
+        "world": world_feed.stats()
     }
 
 
-@app.get("/api/v1/prices/current", response_model=List[PriceSummary], tags=["Prices"])
-async def get_current_prices():
-    """Get current prices for all karats"""
+@response_cache.cached("prices_current")
+async def get_current_prices() -> List[PriceSummary]:
+    """Current price and 24h stats per karat, shared by the endpoints below"""
     
     if not db_pool:
         raise HTTPException(status_code=503, detail="Database not available")
     
+    # 24h window stats for every karat in a single round-trip
+    yesterday = datetime.utcnow() - timedelta(hours=24)
+    
     async with db_pool.acquire() as conn:
-        # Get latest prices from view
-        latest = await conn.fetch("""
-            SELECT karat, current_price, last_updated
-            FROM latest_gold_prices
-            ORDER BY karat
-        """)
-        
-        if not latest:
-            # Return empty if no data
-            return []
-        
-        # Get 24h ago prices for comparison
-        yesterday = datetime.utcnow() - timedelta(hours=24)
-        
-        prices = []
-        for row in latest:
-            karat = row['karat']
-            current = float(row['current_price'])
-            last_updated = row['last_updated']
-            
-            # Get 24h stats
-            stats = await conn.fetchrow("""
-                SELECT 
-                    AVG((buy_price + sell_price) / 2) AS avg_24h,
-                    MIN((buy_price + sell_price) / 2) AS low_24h,
-                    MAX((buy_price + sell_price) / 2) AS high_24h
-                FROM gold_prices
-                WHERE karat = $1
-                  AND timestamp >= $2
-            """, karat, yesterday)
-            
-            avg_24h = float(stats['avg_24h'] or current)
-            low_24h = float(stats['low_24h'] or current)
-            high_24h = float(stats['high_24h'] or current)
-            
-            change_24h = current - avg_24h
-            change_percent = (change_24h / avg_24h * 100) if avg_24h > 0 else 0
-            
-            prices.append(PriceSummary(
-                karat=karat,
-                current_price=round(current, 2),
-                change_24h=round(change_24h, 2),
-                change_percent=round(change_percent, 2),
-                high_24h=round(high_24h, 2),
-                low_24h=round(low_24h, 2),
-                last_updated=last_updated
-            ))
-        
-        return prices
+        rows = await conn.fetch(CURRENT_PRICES_QUERY, yesterday)
+    
+    summaries = (build_price_summary(row) for row in rows)
+    return [summary for summary in summaries if summary is not None]
+
+
+@app.get("/api/v1/prices/current", response_model=List[PriceSummary], tags=["Prices"])
+@conditional
+@response_cache.cached("prices_current_payload")
+async def get_current_prices_response() -> Payload:
+    """Get current prices for all karats"""
+    
+    prices = await get_current_prices()
+    return encode_payload(prices)
+
+
+@app.get("/api/v1/prices/stream", tags=["Prices"])
+async def stream_prices():
+    """Stream current prices as Server-Sent Events
+    
+    Sends the current prices on connect, then a `prices` event (same shape as
+    /prices/current) each time new prices are stored.
+    """
+    
+    # The slot is taken here, not when the body starts streaming, so
+    # concurrent connects can't overshoot max_clients
+    subscriber = price_broadcaster.subscribe()
+    if subscriber is None:
+        raise HTTPException(status_code=503, detail="Too many stream clients")
+    
+    return StreamingResponse(
+        price_broadcaster.events(subscriber),
+        media_type="text/event-stream",
+        # No proxy buffering, or events would arrive in batches
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Frees the slot even if the client left before the stream started
+        background=BackgroundTask(price_broadcaster.unsubscribe, subscriber)
+    )
 
 
 @app.get("/api/v1/prices/history", response_model=List[dict], tags=["Prices"])
+@conditional
+@response_cache.cached("prices_history")
 async def get_price_history(
-    karat: Optional[int] = Query(None, description="Filter by gold karat"),
-    days: int = Query(30, description="Number of days", ge=1, le=365),
-    granularity: str = Query("daily", description="daily or hourly")
-):
-    """Get historical prices with daily or hourly granularity"""
+    karat: Optional[List[int]] = Query(None, description="Filter by gold karat (repeatable)"),
+    start: Optional[datetime] = Query(None, description="Range start (defaults to end - days)"),
+    end: Optional[datetime] = Query(None, description="Range end (defaults to now)"),
+    days: int = Query(30, description="Number of days when start is not given", ge=1, le=3650),
+    bucket: Optional[str] = Query(None, description="Bucket width: 5m, 15m, 1h, 4h, 1d or 1w"),
+    points: Optional[int] = Query(None, description="Target number of buckets", ge=1, le=MAX_HISTORY_POINTS),
+    granularity: str = Query("daily", description="daily or hourly (used when bucket and points are omitted)")
+) -> Payload:
+    """Get OHLC history bucketed server-side
+    
+    The bucket width is the finest of `bucket`, range / `points` and
+    range / MAX_HISTORY_POINTS, so the payload stays bounded for any range.
+    """
     
     if not db_pool:
         raise HTTPException(status_code=503, detail="Database not available")
     
+    end = to_utc_naive(end) or datetime.utcnow()
+    start = to_utc_naive(start) or end - timedelta(days=days)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    
+    if bucket is None and points is None:
+        bucket = "1h" if granularity == "hourly" else "1d"
+    
+    try:
+        chosen = choose_bucket(start, end, bucket, points)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     async with db_pool.acquire() as conn:
-        if granularity == "hourly" and days <= 7:
-            # Use hourly data for last 7 days
-            view_name = "gold_prices_hourly"
-            date_col = "hour"
-        else:
-            # Use daily data for longer periods
-            view_name = "historical_gold_prices_daily"
-            date_col = "date"
-        
-        query = f"""
-            SELECT 
-                {date_col} AS timestamp,
-                karat,
-                avg_price,
-                data_points
-            FROM {view_name}
-            WHERE timestamp >= NOW() - INTERVAL '{days} days'
-        """
-        
-        if karat:
-            query += f" AND karat = {karat}"
-        
-        query += f" ORDER BY timestamp DESC, karat"
-        
-        rows = await conn.fetch(query)
-        
-        return [
-            {
-                "timestamp": row['timestamp'].isoformat(),
-                "karat": row['karat'],
-                "avg_price": float(row['avg_price']),
-                "data_points": row['data_points']
-            }
-            for row in rows
-        ]
+        rows = await conn.fetch(
+            build_history_query(chosen),
+            chosen.width, start, end, resolve_karats(karat)
+        )
+    
+    return encode_payload([serialize_history_row(row) for row in rows])
+
+
+@app.get("/api/v1/prices/export", tags=["Prices"])
+async def export_prices(
+    fmt: str = Query("csv", alias="format", description="csv or ndjson"),
+    karat: Optional[List[int]] = Query(None, description="Filter by gold karat (repeatable)"),
+    source: Optional[List[str]] = Query(None, description="Filter by source (repeatable)"),
+    start: Optional[datetime] = Query(None, description="Range start (defaults to the first price)"),
+    end: Optional[datetime] = Query(None, description="Range end (defaults to the latest price)"),
+    raw: bool = Query(False, description="Include the source message text")
+):
+    """Export raw prices as a streamed CSV or NDJSON download
+    
+    Rows are streamed from Postgres as the client reads them, so any range,
+    up to the whole history, is exported in constant memory.
+    """
+    
+    if not db_pool:
+        raise HTTPException(status_code=503, detail="Database not available")
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
+    
+    query, args = build_export_query(karat, source, to_utc_naive(start), to_utc_naive(end), raw)
+    
+    # The slot is taken here, not when the body starts streaming, so
+    # concurrent exports can't overshoot EXPORT_MAX_CONCURRENT. acquire()
+    # doesn't suspend on a free slot, so nothing runs between the two.
+    if export_slots.locked():
+        raise HTTPException(status_code=503, detail="Too many exports in progress")
+    await export_slots.acquire()
+    released = False
+    
+    def release_slot():
+        nonlocal released
+        if not released:
+            released = True
+            export_slots.release()
+    
+    async def body():
+        try:
+            async with db_pool.acquire() as conn:
+                async for chunk in stream_export(conn, fmt, query, args):
+                    yield chunk
+        finally:
+            release_slot()
+    
+    filename = f"gold_prices_{datetime.utcnow():%Y%m%d_%H%M%S}.{fmt}"
+    return StreamingResponse(
+        body(),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        # Frees the slot even if the client left before the body started
+        background=BackgroundTask(release_slot)
+    )
 
 
 @app.get("/api/v1/prices/world", response_model=WorldPrice, tags=["Prices"])
 async def get_world_price():
-    """Get international gold price comparison"""
+    """Get international gold price comparison
     
-    # TODO: Fetch from external API (goldrate24.com, etc.)
-    return WorldPrice(
-        price_usd=2850.50,
-        price_dzd=39600,
-        premium_percent=2.3  # Algeria premium over world price
-    )
+    Served from the background-refreshed quote and the cached current prices,
+    so it never waits on the upstream price source.
+    """
+    
+    quote = world_feed.quote()
+    if quote is None:
+        raise HTTPException(status_code=503, detail="World price not available yet")
+    
+    return build_world_price(quote, await get_current_prices(), world_feed.is_stale())
+
+
+@app.get("/api/v1/analytics", tags=["Analytics"])
+async def get_analytics(
+    karat: Optional[List[int]] = Query(None, description="Filter by gold karat (repeatable)"),
+    days: int = Query(30, description="Number of days before each karat's latest price", ge=1, le=3650),
+    bucket: str = Query("1h", description="Bucket width: 5m, 15m, 1h, 4h, 1d or 1w"),
+    window: int = Query(24, description="Moving average and volatility window, in buckets", ge=2, le=1000),
+    series: bool = Query(False, description="Include the per-bucket series")
+):
+    """Get moving averages, volatility, spreads and karat ratios
+    
+    Each karat's series is loaded as NumPy arrays and analysed in one pass.
+    Results are memoised per karat until a newer price arrives.
+    """
+    
+    if not db_pool:
+        raise HTTPException(status_code=503, detail="Database not available")
+    if bucket not in BUCKETS_BY_NAME:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown bucket '{bucket}', expected one of {', '.join(BUCKETS_BY_NAME)}"
+        )
+    
+    width = BUCKETS_BY_NAME[bucket].width
+    if timedelta(days=days) / width > MAX_ANALYTICS_POINTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"days / bucket exceeds {MAX_ANALYTICS_POINTS} points, use a coarser bucket"
+        )
+    periods_per_year = timedelta(days=365) / width
+    
+    async with db_pool.acquire() as conn:
+        last_timestamps = {
+            row['karat']: row['last_timestamp']
+            for row in await conn.fetch(LAST_TIMESTAMPS_QUERY, resolve_karats(karat))
+        }
+    
+    def load_karat(karat: int, last_timestamp: datetime):
+        async def loader():
+            start, end = series_range(last_timestamp, days)
+            async with db_pool.acquire() as conn:
+                row = await conn.fetchrow(SERIES_QUERY, width, karat, start, end)
+            loaded = Series.from_row(row)
+            return loaded, karat_summary(karat, loaded, window, periods_per_year, series)
+        return loader
+    
+    results = {}
+    for k, last_timestamp in sorted(last_timestamps.items()):
+        key = ('analytics', k, bucket, days, window, series, last_timestamp)
+        results[k] = await analytics_cache.get_or_load(key, load_karat(k, last_timestamp))
+    
+    return {
+        "bucket": bucket,
+        "window": window,
+        "karats": [summary for _, summary in results.values()],
+        "ratios": karat_ratios({k: loaded for k, (loaded, _) in results.items()})
+    }
 
 
 @app.get("/api/v1/dashboard", response_model=DashboardData, tags=["Dashboard"])
-async def get_dashboard_data():
-    """Get all data for the dashboard"""
+@conditional
+@response_cache.cached("dashboard")
+async def get_dashboard_data() -> Payload:
+    """Get all data for the dashboard
+    
+    last_update is the newest price's timestamp, so an unchanged dashboard
+    keeps its ETag.
+    """
     
     prices = await get_current_prices()
-    world = await get_world_price()
+    quote = world_feed.quote()
+    world = build_world_price(quote, prices, world_feed.is_stale()) if quote else None
+    last_update = latest_update(prices)
     
-    return DashboardData(
+    return encode_payload(DashboardData(
         prices=prices,
         world_price=world,
-        last_update=datetime.utcnow()
-    )
+        last_update=last_update or datetime.utcnow()
+    ))
 
 
 @app.get("/api/v1/alerts/subscribe", tags=["Alerts"])
 async def subscribe_alerts(
     karat: int = Query(18),
-    threshold: float = Query(..., description="Price threshold in DZD"),
+    threshold: float = Query(..., description="Price threshold in DZD", gt=0),
     direction: str = Query("above", description="'above' or 'below'"),
-    telegram_user_id: str = Query(..., description="Telegram user ID for notifications")
+    telegram_user_id: str = Query(..., description="Telegram user ID for notifications", max_length=64)
 ):
-    """Subscribe to price alerts"""
+    """Subscribe to price alerts
+    
+    The alert fires when the karat's current price crosses the threshold in
+    the given direction, then stays quiet for the cooldown period.
+    """
+    
+    if not alert_engine:
+        raise HTTPException(status_code=503, detail="Database not available")
+    if karat not in SUPPORTED_KARATS:
+        raise HTTPException(status_code=400, detail=f"karat must be one of {SUPPORTED_KARATS}")
+    if direction not in DIRECTIONS:
+        raise HTTPException(status_code=400, detail="direction must be 'above' or 'below'")
     
-    # TODO: Implement alert subscription
+    subscription = await alert_engine.subscribe(telegram_user_id, karat, direction, threshold)
     return {
         "status": "subscribed",
+        "id": subscription.id,
         "karat": karat,
         "threshold": threshold,
         "direction": direction,
@@ -251,6 +551,21 @@ async def subscribe_alerts(
     }
 
 
+@app.delete("/api/v1/alerts/{alert_id}", tags=["Alerts"])
+async def unsubscribe_alert(
+    alert_id: int,
+    telegram_user_id: str = Query(..., description="Telegram user ID that owns the alert")
+):
+    """Cancel a price alert"""
+    
+    if not alert_engine:
+        raise HTTPException(status_code=503, detail="Database not available")
+    if not await alert_engine.unsubscribe(alert_id, telegram_user_id):
+        raise HTTPException(status_code=404, detail="Alert not found")
+    return {"status": "unsubscribed", "id": alert_id}
+
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    # Run from api/ with: python -m src.main
+    uvicorn.run("src.main:app", host="0.0.0.0", port=8000, reload=True)
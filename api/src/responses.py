@@ -0,0 +1,74 @@
+"""
+Pre-serialised JSON responses with conditional GET
+Endpoints cache an encoded Payload (orjson bytes plus ETag) instead of
+models, so a cache hit costs no serialisation and a client that already has
+the body gets a bodiless 304.
+
+There is no Last-Modified / If-Modified-Since: every body also changes
+without a new price (the 24h window sliding, a new world quote), so no price
+timestamp dates it correctly. The ETag is a digest of the body itself.
+"""
+
+import hashlib
+import inspect
+import functools
+from typing import Any, Dict, NamedTuple
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+
+class Payload(NamedTuple):
+    body: bytes
+    etag: str
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Type {type(obj).__name__} is not JSON serializable")
+
+
+def encode_payload(content: Any) -> Payload:
+    """Serialise once; the ETag is a digest of the body"""
+    body = orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+    digest = hashlib.blake2b(body, digest_size=8).hexdigest()
+    return Payload(body, f'"{digest}"')
+
+
+def not_modified(request: Request, payload: Payload) -> bool:
+    """If-None-Match, compared weakly"""
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return payload.etag in tags
+
+
+def payload_response(request: Request, payload: Payload) -> Response:
+    # no-cache: clients may store the body but must revalidate every time
+    headers: Dict[str, str] = {'ETag': payload.etag, 'Cache-Control': 'no-cache'}
+
+    if not_modified(request, payload):
+        return Response(status_code=304, headers=headers)
+    return Response(payload.body, media_type='application/json', headers=headers)
+
+
+def conditional(func):
+    """Endpoint decorator turning a Payload-returning function into a response
+
+    Adds a `request` parameter to the signature FastAPI sees, so it can sit
+    between @app.get and @cache.cached without entering the cache key.
+    """
+    @functools.wraps(func)
+    async def wrapper(request: Request, **kwargs):
+        return payload_response(request, await func(**kwargs))
+
+    signature = inspect.signature(func)
+    request_param = inspect.Parameter('request', inspect.Parameter.POSITIONAL_OR_KEYWORD, annotation=Request)
+    wrapper.__signature__ = signature.replace(parameters=[request_param, *signature.parameters.values()])
+    return wrapper
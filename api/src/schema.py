@@ -0,0 +1,116 @@
+"""
+Database schema migrations for Gold Tracker
+Applies the SQL files in api/sql/ in order and records them in schema_migrations
+"""
+
+import os
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+SQL_DIR = Path(__file__).resolve().parent.parent / 'sql'
+
+# Ordered migrations: (name, sql file). Never reorder or edit applied entries,
+# append a new file instead.
+MIGRATIONS = [
+    ('001_create_tables', 'create_tables.sql'),
+    ('002_create_views', 'create_views.sql'),
+    ('003_create_triggers', 'create_triggers.sql'),
+    ('004_create_rollups', 'create_rollups.sql'),
+    ('005_create_latest_prices', 'create_latest_prices.sql'),
+    ('006_create_scrape_checkpoints', 'create_scrape_checkpoints.sql'),
+    ('007_create_channel_messages', 'create_channel_messages.sql'),
+    ('008_add_message_text', 'add_message_text.sql'),
+    ('009_create_alert_subscriptions', 'create_alert_subscriptions.sql'),
+]
+
+# Migrations that create continuous aggregates. Those start empty and the
+# refresh policies only cover a recent window, so history is materialised once
+# after they are applied.
+ROLLUP_MIGRATIONS = {'004_create_rollups'}
+
+# Continuous aggregates that refresh_rollups() knows about
+ROLLUPS = ['gold_prices_hourly', 'historical_gold_prices_daily']
+
+# Arbitrary key so concurrent API workers don't migrate at the same time
+MIGRATION_LOCK_ID = 724_001
+
+
+async def migrate(conn: asyncpg.Connection) -> int:
+    """Apply pending migrations, returns the number applied"""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            name TEXT PRIMARY KEY,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+    """)
+
+    await conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_ID)
+    try:
+        applied = {row['name'] for row in await conn.fetch("SELECT name FROM schema_migrations")}
+
+        count = 0
+        refresh_needed = False
+        for name, filename in MIGRATIONS:
+            if name in applied:
+                continue
+
+            logger.info(f"Applying migration {name}")
+            sql = (SQL_DIR / filename).read_text()
+            async with conn.transaction():
+                await conn.execute(sql)
+                await conn.execute("INSERT INTO schema_migrations (name) VALUES ($1)", name)
+            count += 1
+            refresh_needed = refresh_needed or name in ROLLUP_MIGRATIONS
+
+        if refresh_needed:
+            await refresh_rollups(conn)
+
+        return count
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+
+
+async def refresh_rollups(conn: asyncpg.Connection, start: Optional[datetime] = None,
+                          end: Optional[datetime] = None):
+    """Re-materialise the rollups over [start, end) after an out-of-window backfill
+
+    Must not run inside a transaction block.
+    """
+    for rollup in ROLLUPS:
+        logger.info(f"Refreshing {rollup} from {start or 'beginning'} to {end or 'now'}")
+        await conn.execute(
+            "CALL refresh_continuous_aggregate($1::regclass, $2::timestamptz, $3::timestamptz)",
+            rollup, start, end
+        )
+
+
+async def main():
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Gold Tracker schema migrations")
+    arg_parser.add_argument('--refresh-days', type=int, default=None,
+                            help="Also refresh the rollups over the last N days")
+    args = arg_parser.parse_args()
+
+    conn = await asyncpg.connect(os.getenv('DATABASE_URL', 'postgresql://localhost/goldtracker'))
+    try:
+        count = await migrate(conn)
+        print(f"Applied {count} migration(s)")
+
+        if args.refresh_days:
+            await refresh_rollups(conn, datetime.utcnow() - timedelta(days=args.refresh_days))
+            print("Rollups refreshed")
+    finally:
+        await conn.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,136 @@
+"""
+Live price stream for the dashboard (Server-Sent Events)
+One LISTEN connection reports price changes; each change is loaded once and
+fanned out to every subscriber through a small per-client buffer
+"""
+
+import json
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class Subscriber:
+    """One connected client and its bounded queue of pending events
+
+    Every event is a full snapshot, so when a slow client's buffer is full the
+    oldest event is dropped: it would be superseded anyway.
+    """
+
+    def __init__(self, buffer_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.dropped = 0
+
+    def push(self, event: str):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+
+class PriceBroadcaster:
+    """Fans out price snapshots from `loader` to every SSE subscriber
+
+    notify() is called for each change notification. A burst of notifications
+    (e.g. a bulk backfill) collapses into one load after `debounce` seconds,
+    so database work follows price changes, not the number of clients.
+    """
+
+    def __init__(self, loader: Callable[[], Awaitable[Any]], buffer_size: int = 8,
+                 max_clients: int = 1000, debounce: float = 0.2, keepalive: float = 15):
+        self.loader = loader
+        self.buffer_size = buffer_size
+        self.max_clients = max_clients
+        self.debounce = debounce
+        self.keepalive = keepalive
+        self.subscribers: Set[Subscriber] = set()
+        self.published = 0
+        self._event_id = 0
+        self._latest: Optional[str] = None
+        self._dirty = False
+        self._task: Optional[asyncio.Task] = None
+        # Clients connecting together share one snapshot load
+        self._load_lock = asyncio.Lock()
+
+    def notify(self):
+        """Schedule a reload and broadcast; safe to call from a LISTEN callback"""
+        self._latest = None
+        if not self.subscribers:
+            return
+        self._dirty = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def subscribe(self) -> Optional[Subscriber]:
+        """Reserve a client slot, or None when max_clients are connected
+
+        Synchronous, so concurrent connects can't both take the last slot.
+        """
+        if len(self.subscribers) >= self.max_clients:
+            return None
+        subscriber = Subscriber(self.buffer_size)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'clients': len(self.subscribers),
+            'max_clients': self.max_clients,
+            'published': self.published,
+            'dropped': sum(s.dropped for s in self.subscribers),
+        }
+
+    async def events(self, subscriber: Subscriber) -> AsyncIterator[str]:
+        """SSE stream for a subscribed client: the current snapshot, then every change"""
+        try:
+            yield 'retry: 5000\n\n'
+            snapshot = await self._snapshot()
+            if snapshot:
+                yield snapshot
+
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscriber.queue.get(), self.keepalive)
+                except asyncio.TimeoutError:
+                    # Comment line: keeps proxies from closing an idle connection
+                    yield ': keepalive\n\n'
+        finally:
+            self.unsubscribe(subscriber)
+
+    async def _snapshot(self) -> Optional[str]:
+        async with self._load_lock:
+            if self._latest is None:
+                try:
+                    self._latest = self._format(await self.loader())
+                except Exception as e:
+                    logger.error(f"Price stream snapshot failed: {e}")
+                    return None
+            return self._latest
+
+    def _format(self, data: Any) -> str:
+        """Serialise once; the same text goes to every client"""
+        self._event_id += 1
+        return f"id: {self._event_id}\nevent: prices\ndata: {json.dumps(data, default=str)}\n\n"
+
+    async def _refresh(self):
+        while self._dirty:
+            await asyncio.sleep(self.debounce)
+            self._dirty = False
+            self._latest = None
+            event = await self._snapshot()
+            if event is None:
+                continue
+            for subscriber in list(self.subscribers):
+                subscriber.push(event)
+            self.published += 1
@@ -0,0 +1,216 @@
+"""
+International gold price and USD/DZD rate feed
+Providers are polled by a background task and read from memory, so requests
+never wait on an upstream call. A circuit breaker stops hammering a failing
+source and the last good quote keeps being served, marked stale.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, NamedTuple, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+TROY_OUNCE_GRAMS = 31.1034768
+
+
+class WorldQuote(NamedTuple):
+    """Spot gold in USD per troy ounce and the USD/DZD rate"""
+    price_usd: float
+    usd_dzd: float
+    fetched_at: float  # time.time()
+
+    @property
+    def gram_dzd(self) -> float:
+        """24K spot price per gram in DZD"""
+        return self.price_usd / TROY_OUNCE_GRAMS * self.usd_dzd
+
+
+class WorldPriceProvider(ABC):
+    """Source of world quotes; fetch() may be slow or fail"""
+
+    name = 'provider'
+
+    @abstractmethod
+    async def fetch(self) -> WorldQuote:
+        ...
+
+    async def close(self):
+        pass
+
+
+class FakeProvider(WorldPriceProvider):
+    """Fixed quote for local runs and tests, with optional latency and failure"""
+
+    name = 'fake'
+
+    def __init__(self, price_usd: float = 2850.50, usd_dzd: float = 134.5,
+                 latency: float = 0, fail: bool = False):
+        self.price_usd = price_usd
+        self.usd_dzd = usd_dzd
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+
+    async def fetch(self) -> WorldQuote:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError("fake provider failure")
+        return WorldQuote(self.price_usd, self.usd_dzd, time.time())
+
+
+def _field(data: Any, path: str) -> float:
+    """Value at a dotted path in decoded JSON, e.g. 'rates.DZD'"""
+    for key in path.split('.'):
+        data = data[key]
+    return float(data)
+
+
+class HttpProvider(WorldPriceProvider):
+    """Spot price and FX rate from two JSON endpoints, fetched in parallel"""
+
+    name = 'http'
+
+    def __init__(self, gold_url: str, gold_field: str, fx_url: str, fx_field: str, timeout: float = 10):
+        self.gold_url = gold_url
+        self.gold_field = gold_field
+        self.fx_url = fx_url
+        self.fx_field = fx_field
+        self._client = httpx.AsyncClient(timeout=timeout)
+
+    async def fetch(self) -> WorldQuote:
+        gold, fx = await asyncio.gather(self._client.get(self.gold_url), self._client.get(self.fx_url))
+        gold.raise_for_status()
+        fx.raise_for_status()
+        return WorldQuote(_field(gold.json(), self.gold_field), _field(fx.json(), self.fx_field), time.time())
+
+    async def close(self):
+        await self._client.aclose()
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures; retries after `reset_timeout`"""
+
+    def __init__(self, threshold: int = 3, reset_timeout: float = 300):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self) -> bool:
+        """Closed, or open long enough to let one trial call through"""
+        return self.state != 'open'
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        # A failed half-open trial re-opens for another full timeout
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
+class WorldPriceFeed:
+    """Background-refreshed quote with stale-while-revalidate reads
+
+    quote() returns immediately with whatever is cached. A read after
+    `refresh_interval` also starts a refresh in the background (at most one
+    at a time). Quotes older than `max_age` are still served but reported
+    as stale.
+    """
+
+    def __init__(self, provider: WorldPriceProvider, refresh_interval: float = 300,
+                 max_age: float = 3600, breaker: Optional[CircuitBreaker] = None):
+        self.provider = provider
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.breaker = breaker or CircuitBreaker()
+        self.refreshes = 0
+        self.failures = 0
+        self._quote: Optional[WorldQuote] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._ticker: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Fetch the first quote and keep refreshing in the background"""
+        self._ticker = asyncio.create_task(self._tick())
+
+    async def stop(self):
+        for task in (self._ticker, self._refresh_task):
+            if task:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._ticker = self._refresh_task = None
+        await self.provider.close()
+
+    def quote(self) -> Optional[WorldQuote]:
+        """Cached quote (None before the first success); never waits"""
+        if self._quote is None or self.age() > self.refresh_interval:
+            self._refresh_soon()
+        return self._quote
+
+    def age(self) -> float:
+        return time.time() - self._quote.fetched_at if self._quote else float('inf')
+
+    def is_stale(self) -> bool:
+        return self.age() > self.max_age
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'provider': self.provider.name,
+            'age': round(self.age(), 1) if self._quote else None,
+            'breaker': self.breaker.state,
+            'refreshes': self.refreshes,
+            'failures': self.failures,
+        }
+
+    def _refresh_soon(self):
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self.refresh())
+
+    async def refresh(self):
+        """Fetch one quote unless the breaker is open; failures keep the old one"""
+        if not self.breaker.allow():
+            return
+        try:
+            self._quote = await self.provider.fetch()
+            self.refreshes += 1
+            self.breaker.record_success()
+        except Exception as e:
+            self.failures += 1
+            self.breaker.record_failure()
+            logger.warning(f"World price refresh failed ({self.breaker.state}): {e}")
+
+    async def _tick(self):
+        while True:
+            self._refresh_soon()
+            await asyncio.sleep(self.refresh_interval)
+
+
+def create_provider() -> WorldPriceProvider:
+    """Provider selected by WORLD_PROVIDER ('fake' unless set to 'http')"""
+    if os.getenv('WORLD_PROVIDER', 'fake') != 'http':
+        return FakeProvider()
+    return HttpProvider(
+        gold_url=os.getenv('WORLD_GOLD_URL', 'https://api.gold-api.com/price/XAU'),
+        gold_field=os.getenv('WORLD_GOLD_FIELD', 'price'),
+        fx_url=os.getenv('WORLD_FX_URL', 'https://open.er-api.com/v6/latest/USD'),
+        fx_field=os.getenv('WORLD_FX_FIELD', 'rates.DZD'),
+    )
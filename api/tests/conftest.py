@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The API is a package run from api/ (uvicorn src.main:app); import it the same way
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,128 @@
+import asyncio
+import contextlib
+import itertools
+
+import pytest
+
+from src.alerts import AlertEngine, ThresholdIndex
+
+
+@pytest.fixture
+def index():
+    index = ThresholdIndex()
+    for sub_id, threshold in enumerate([30000, 31000, 31000, 32000, 33000], start=1):
+        index.add(threshold, sub_id)
+    return index
+
+
+def test_above_includes_the_new_price(index):
+    # Rising from 30000 to exactly 31000 crosses 31000 but not 30000
+    assert index.above(30000, 31000) == [2, 3]
+
+
+def test_above_excludes_the_old_price(index):
+    assert index.above(31000, 32500) == [4]
+
+
+def test_below_includes_the_new_price(index):
+    # Falling from 33000 to exactly 31000 crosses 32000 and both 31000s, not 33000
+    assert index.below(31000, 33000) == [2, 3, 4]
+
+
+def test_below_excludes_the_old_price(index):
+    assert index.below(29000, 30000) == []
+
+
+def test_equal_thresholds_fire_together(index):
+    assert index.above(30500, 31500) == [2, 3]
+    assert index.below(30500, 31500) == [2, 3]
+
+
+def test_outside_every_threshold(index):
+    assert index.above(33000, 40000) == []
+    assert index.below(20000, 30000) == []
+
+
+def test_remove_leaves_equal_thresholds(index):
+    index.remove(31000, 2)
+    index.remove(31000, 99)
+    assert index.above(30000, 31000) == [3]
+    assert len(index) == 4
+
+
+class FakeConnection:
+    def __init__(self):
+        self.ids = itertools.count(1)
+
+    async def fetch(self, query, *args):
+        return []
+
+    async def fetchval(self, query, *args):
+        return next(self.ids)
+
+
+class FakePool:
+    def __init__(self):
+        self.conn = FakeConnection()
+
+    @contextlib.asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+def engine(prices):
+    async def loader():
+        return dict(prices)
+    return AlertEngine(FakePool(), loader, dispatcher=None, debounce=0)
+
+
+def test_match_both_directions():
+    alerts = engine({18: 30000.0})
+
+    async def run():
+        await alerts.subscribe('u1', 18, 'above', 31000)
+        await alerts.subscribe('u2', 18, 'below', 29000)
+
+        assert [sub.telegram_user_id for sub in alerts.match(18, 31000)] == ['u1']
+        assert alerts.match(18, 32000) == []
+        assert [sub.telegram_user_id for sub in alerts.match(18, 28000)] == ['u2']
+
+    asyncio.run(run())
+
+
+def test_first_match_without_a_prior_price_fires_nothing():
+    # No price for the karat yet, e.g. the loader failed at startup
+    alerts = engine({})
+    asyncio.run(alerts.subscribe('u1', 21, 'above', 30000))
+
+    assert alerts.match(21, 35000) == []
+    assert alerts.last_prices[21] == 35000
+
+
+def test_first_subscriber_is_matched_from_the_price_at_subscription():
+    # No price for the karat yet, e.g. the loader failed at startup
+    prices = {18: 30000.0}
+    alerts = engine(prices)
+
+    async def run():
+        await alerts.subscribe('u1', 18, 'above', 31000)
+
+    asyncio.run(run())
+    assert [sub.id for sub in alerts.match(18, 31500)] == [1]
+
+
+def test_price_moves_without_subscribers_are_tracked():
+    prices = {18: 30000.0}
+    alerts = engine(prices)
+
+    async def run():
+        await alerts.start()
+        # Prices move while nobody is subscribed
+        prices[18] = 35000.0
+        alerts.notify()
+        await alerts._task
+        await alerts.subscribe('u1', 18, 'above', 32000)
+
+    asyncio.run(run())
+    # Already above the threshold when subscribing: no crossing
+    assert alerts.match(18, 35500) == []
@@ -0,0 +1,69 @@
+import math
+
+import numpy as np
+import pytest
+
+from src.analytics import ema, rolling_volatility, sma
+
+
+@pytest.fixture(scope='module')
+def prices():
+    rng = np.random.default_rng(7)
+    return 30000 * np.exp(np.cumsum(rng.normal(0, 0.01, 500)))
+
+
+def naive_sma(values, window):
+    return [sum(values[i:i + window]) / window for i in range(len(values) - window + 1)]
+
+
+def naive_ema(values, window):
+    alpha = 2 / (window + 1)
+    out = [values[0]]
+    for value in values[1:]:
+        out.append((1 - alpha) * out[-1] + alpha * value)
+    return out
+
+
+def naive_volatility(close, window):
+    window = max(window, 2)
+    returns = [math.log(b / a) for a, b in zip(close, close[1:])]
+    out = []
+    for i in range(len(returns) - window + 1):
+        chunk = returns[i:i + window]
+        mean = sum(chunk) / window
+        out.append(math.sqrt(sum((r - mean) ** 2 for r in chunk) / (window - 1)))
+    return out
+
+
+@pytest.mark.parametrize('window', [1, 2, 7, 30, 500])
+def test_sma_matches_naive_loop(prices, window):
+    np.testing.assert_allclose(sma(prices, window), naive_sma(list(prices), window), rtol=1e-9)
+
+
+def test_sma_shorter_than_window(prices):
+    assert len(sma(prices[:5], 6)) == 0
+
+
+@pytest.mark.parametrize('window', [1, 2, 7, 30, 200])
+def test_ema_matches_naive_loop(prices, window):
+    # Long windows decay slowly and span several cumsum blocks
+    np.testing.assert_allclose(ema(prices, window), naive_ema(list(prices), window), rtol=1e-9)
+
+
+def test_ema_empty():
+    assert len(ema(np.array([]), 10)) == 0
+
+
+@pytest.mark.parametrize('window', [1, 2, 7, 30, 499])
+def test_rolling_volatility_matches_naive_loop(prices, window):
+    np.testing.assert_allclose(
+        rolling_volatility(prices, window), naive_volatility(list(prices), window), rtol=1e-6, atol=1e-12
+    )
+
+
+def test_rolling_volatility_of_a_flat_series_is_zero():
+    assert np.all(rolling_volatility(np.full(50, 30000.0), 10) == 0)
+
+
+def test_rolling_volatility_shorter_than_window(prices):
+    assert len(rolling_volatility(prices[:10], 10)) == 0
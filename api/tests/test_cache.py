@@ -0,0 +1,226 @@
+import asyncio
+
+import pytest
+
+from src import cache
+from src.cache import CacheInvalidator, TTLCache
+
+
+class Loader:
+    """Counts calls and returns the call number once released"""
+
+    def __init__(self):
+        self.calls = 0
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        call = self.calls
+        self.started.set()
+        await self.release.wait()
+        return call
+
+
+def test_concurrent_misses_load_once():
+    async def run():
+        store = TTLCache()
+        loader = Loader()
+        tasks = [asyncio.create_task(store.get_or_load('k', loader)) for _ in range(5)]
+        await loader.started.wait()
+        loader.release.set()
+
+        assert await asyncio.gather(*tasks) == [1] * 5
+        assert loader.calls == 1
+        assert (store.misses, store.hits) == (1, 4)
+        assert await store.get_or_load('k', loader) == 1
+    asyncio.run(run())
+
+
+def test_clear_during_load_does_not_repopulate():
+    async def run():
+        store = TTLCache()
+        stale = Loader()
+        first = asyncio.create_task(store.get_or_load('k', stale))
+        await stale.started.wait()
+        store.clear()
+
+        # Callers after the clear don't wait on the stale load
+        fresh = Loader()
+        fresh.calls = 1
+        second = asyncio.create_task(store.get_or_load('k', fresh))
+        await fresh.started.wait()
+        stale.release.set()
+        assert await first == 1
+        assert store.get('k') == (False, None)
+
+        fresh.release.set()
+        assert await second == 2
+        assert store.get('k') == (True, 2)
+    asyncio.run(run())
+
+
+def test_failed_load_reaches_waiters_and_is_not_cached():
+    async def run():
+        store = TTLCache()
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def failing():
+            started.set()
+            await release.wait()
+            raise RuntimeError('db down')
+
+        tasks = [asyncio.create_task(store.get_or_load('k', failing)) for _ in range(2)]
+        await started.wait()
+        release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert [str(r) for r in results] == ['db down', 'db down']
+        assert store.get('k') == (False, None)
+    asyncio.run(run())
+
+
+def test_cancelled_loader_hands_the_load_to_a_waiter():
+    async def run():
+        store = TTLCache()
+        loader = Loader()
+        leader = asyncio.create_task(store.get_or_load('k', loader))
+        await loader.started.wait()
+        waiter = asyncio.create_task(store.get_or_load('k', loader))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        await asyncio.sleep(0)
+        loader.release.set()
+        assert await waiter == 2
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_leaves_the_load_running():
+    async def run():
+        store = TTLCache()
+        loader = Loader()
+        leader = asyncio.create_task(store.get_or_load('k', loader))
+        await loader.started.wait()
+        waiter = asyncio.create_task(store.get_or_load('k', loader))
+        await asyncio.sleep(0)
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        loader.release.set()
+        assert await leader == 1 and loader.calls == 1
+    asyncio.run(run())
+
+
+def test_entries_expire_and_least_recently_used_are_evicted(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+    store = TTLCache(ttl=10, max_entries=2)
+    store.set('a', 1)
+    store.set('b', 2)
+    store.get('a')
+    store.set('c', 3)
+    assert [store.get(key)[0] for key in 'abc'] == [True, False, True]
+
+    now[0] += 11
+    assert store.get('a') == (False, None)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.listeners = {}
+        self.on_terminate = None
+        self.closed = False
+
+    async def add_listener(self, channel, callback):
+        self.listeners[channel] = callback
+
+    async def remove_listener(self, channel, callback):
+        self.listeners.pop(channel, None)
+
+    def add_termination_listener(self, callback):
+        self.on_terminate = callback
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """asyncpg.connect failing `failures` times, and the backoff delays slept"""
+    state = {'failures': 0, 'connections': [], 'delays': []}
+    real_sleep = asyncio.sleep
+
+    async def connect(url):
+        if state['failures']:
+            state['failures'] -= 1
+            raise OSError('connection refused')
+        conn = FakeConnection()
+        state['connections'].append(conn)
+        return conn
+
+    async def sleep(delay):
+        state['delays'].append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(cache.asyncpg, 'connect', connect)
+    monkeypatch.setattr(cache.asyncio, 'sleep', sleep)
+    return state
+
+
+def test_notify_clears_the_cache_and_runs_callbacks(backend):
+    async def run():
+        store = TTLCache()
+        changes = []
+        invalidator = CacheInvalidator(store, 'postgres://', on_change=[lambda: changes.append(1)])
+        await invalidator.start()
+        store.set('k', 1)
+
+        conn, = backend['connections']
+        conn.listeners[cache.PRICES_CHANNEL](conn, 1, cache.PRICES_CHANNEL, '')
+        assert store.get('k') == (False, None) and changes == [1]
+        await invalidator.stop()
+        assert conn.closed
+    asyncio.run(run())
+
+
+def test_lost_listener_reconnects_with_backoff(backend, monkeypatch):
+    monkeypatch.setattr(cache, 'RECONNECT_MAX_DELAY', 4.0)
+
+    async def run():
+        store = TTLCache()
+        changes = []
+        invalidator = CacheInvalidator(store, 'postgres://', on_change=[lambda: changes.append(1)])
+        await invalidator.start()
+        store.set('k', 1)
+
+        backend['failures'] = 4
+        first, = backend['connections']
+        first.on_terminate(first)
+        assert store.get('k') == (False, None)
+        await invalidator._reconnect_task
+
+        assert backend['delays'] == [1.0, 2.0, 4.0, 4.0, 4.0]
+        assert invalidator.conn is backend['connections'][-1] is not first
+        # NOTIFYs may have been missed while disconnected
+        assert invalidator.reconnects == 1 and changes == [1]
+        await invalidator.stop()
+    asyncio.run(run())
+
+
+def test_listener_unavailable_at_startup_keeps_retrying(backend):
+    async def run():
+        backend['failures'] = 1
+        invalidator = CacheInvalidator(TTLCache(), 'postgres://')
+        await invalidator.start()
+        assert invalidator.conn is None
+        await invalidator._reconnect_task
+        assert invalidator.conn is not None and backend['delays'] == [1.0]
+        await invalidator.stop()
+    asyncio.run(run())
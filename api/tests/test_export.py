@@ -0,0 +1,70 @@
+import asyncio
+import contextlib
+
+import pytest
+from fastapi import HTTPException
+
+from src import main
+
+
+class FakePool:
+    @contextlib.asynccontextmanager
+    async def acquire(self):
+        yield object()
+
+
+async def fake_stream_export(conn, fmt, query, args):
+    yield b'id,timestamp\n'
+    yield b'1,2024-01-01\n'
+
+
+@pytest.fixture
+def exports(monkeypatch):
+    monkeypatch.setattr(main, 'db_pool', FakePool())
+    monkeypatch.setattr(main, 'stream_export', fake_stream_export)
+
+    def start(limit):
+        monkeypatch.setattr(main, 'export_slots', asyncio.Semaphore(limit))
+    return start
+
+
+def export():
+    return main.export_prices(fmt='csv', karat=None, source=None, start=None, end=None, raw=False)
+
+
+async def read(response):
+    body = b''.join([chunk async for chunk in response.body_iterator])
+    await response.background()
+    return body
+
+
+def test_export_over_the_limit_is_rejected(exports):
+    async def run():
+        exports(2)
+        results = await asyncio.gather(*(export() for _ in range(3)), return_exceptions=True)
+        rejected = [r for r in results if isinstance(r, HTTPException)]
+        assert len(rejected) == 1 and rejected[0].status_code == 503
+
+        # A finished export frees its slot, once
+        response = next(r for r in results if not isinstance(r, HTTPException))
+        assert await read(response) == b'id,timestamp\n1,2024-01-01\n'
+        assert main.export_slots._value == 1
+        await read(await export())
+        assert main.export_slots._value == 1
+
+    asyncio.run(run())
+
+
+def test_slot_is_freed_when_the_body_never_starts(exports):
+    async def run():
+        exports(1)
+        response = await export()
+        with pytest.raises(HTTPException):
+            await export()
+
+        # Client gone before streaming: only the background task runs
+        await response.background()
+        assert not main.export_slots.locked()
+        await export()
+
+    asyncio.run(run())
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.history import BUCKETS, MAX_HISTORY_POINTS, build_history_query, choose_bucket
+
+END = datetime(2026, 10, 1)
+
+
+@pytest.mark.parametrize('span,points,requested,expected', [
+    (timedelta(hours=6), None, None, '5m'),
+    (timedelta(days=1), None, None, '5m'),
+    (timedelta(days=4), None, None, '15m'),
+    (timedelta(days=7), None, None, '15m'),
+    (timedelta(days=30), None, None, '1h'),
+    (timedelta(days=90), None, None, '4h'),
+    (timedelta(days=365), None, None, '1d'),
+    (timedelta(days=5 * 365), None, None, '1w'),
+    # Fewer points asked for: coarser buckets
+    (timedelta(days=1), 24, None, '1h'),
+    (timedelta(days=30), 30, None, '1d'),
+    # More points than allowed are capped
+    (timedelta(days=30), 10 * MAX_HISTORY_POINTS, None, '1h'),
+    # A requested bucket is a floor, coarsened when it would exceed the cap
+    (timedelta(days=1), None, '4h', '4h'),
+    (timedelta(days=30), None, '5m', '1h'),
+])
+def test_choose_bucket(span, points, requested, expected):
+    assert choose_bucket(END - span, END, requested, points).name == expected
+
+
+@pytest.mark.parametrize('name,relation,time_column', [
+    ('5m', 'gold_prices', 'timestamp'),
+    ('15m', 'gold_prices', 'timestamp'),
+    ('1h', 'gold_prices_hourly', 'hour'),
+    ('4h', 'gold_prices_hourly', 'hour'),
+    ('1d', 'historical_gold_prices_daily', 'date'),
+    ('1w', 'historical_gold_prices_daily', 'date'),
+])
+def test_bucket_relation_and_query(name, relation, time_column):
+    bucket = choose_bucket(END - timedelta(days=1), END, name)
+    assert (bucket.relation, bucket.time_column) == (relation, time_column)
+
+    query = build_history_query(bucket)
+    assert f'FROM {relation}\n' in query
+    assert f'time_bucket($1::interval, {time_column})' in query
+
+
+def test_bucket_stays_within_max_points():
+    for days in (1, 3, 10, 41, 42, 166, 167, 999, 1001, 6999):
+        bucket = choose_bucket(END - timedelta(days=days), END)
+        assert timedelta(days=days) / bucket.width <= MAX_HISTORY_POINTS
+
+
+def test_range_too_long():
+    longest = BUCKETS[-1].width * MAX_HISTORY_POINTS
+    assert choose_bucket(END - longest, END).name == '1w'
+    with pytest.raises(ValueError, match=f'at most {longest.days} days'):
+        choose_bucket(END - longest - timedelta(days=1), END)
+
+
+def test_unknown_bucket():
+    with pytest.raises(ValueError, match="Unknown bucket '2h'"):
+        choose_bucket(END - timedelta(days=1), END, '2h')
@@ -0,0 +1,71 @@
+import asyncio
+import contextlib
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from src import main
+from src.main import build_price_summary
+
+
+def price_row(karat, current_price, avg_24h=None, low_24h=None, high_24h=None):
+    return {
+        'karat': karat,
+        'current_price': current_price,
+        'last_updated': datetime(2026, 10, 1, 12, 0, tzinfo=timezone.utc),
+        'avg_24h': avg_24h,
+        'low_24h': low_24h,
+        'high_24h': high_24h,
+    }
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def fetch(self, query, *args):
+        return self.rows
+
+
+class FakePool:
+    def __init__(self, rows):
+        self.conn = FakeConnection(rows)
+
+    @contextlib.asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    def install(rows):
+        monkeypatch.setattr(main, 'db_pool', FakePool(rows))
+        main.response_cache.clear()
+
+    yield install
+    main.response_cache.clear()
+
+
+def test_summary_uses_24h_stats():
+    summary = build_price_summary(price_row(21, Decimal('34650'), Decimal('34000'), Decimal('33900'), Decimal('34800')))
+    assert summary.current_price == 34650
+    assert summary.change_24h == 650
+    assert summary.change_percent == pytest.approx(1.91)
+    assert (summary.low_24h, summary.high_24h) == (33900, 34800)
+
+
+def test_summary_without_24h_stats_falls_back_to_current():
+    summary = build_price_summary(price_row(18, Decimal('29700.5')))
+    assert summary.change_24h == 0
+    assert summary.low_24h == summary.high_24h == 29700.5
+
+
+def test_summary_skips_one_sided_row():
+    assert build_price_summary(price_row(24, None)) is None
+
+
+def test_current_prices_drop_one_sided_rows(pool):
+    pool([price_row(18, Decimal('29700')), price_row(24, None)])
+    prices = asyncio.run(main.get_current_prices())
+    assert [price.karat for price in prices] == [18]
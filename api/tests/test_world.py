@@ -0,0 +1,135 @@
+import asyncio
+import time
+
+import pytest
+
+from src import world
+from src.world import CircuitBreaker, FakeProvider, WorldPriceFeed, WorldPriceProvider, WorldQuote
+
+
+class Clock:
+    """Stands in for time.monotonic in the breaker"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(world.time, 'monotonic', clock)
+    return clock
+
+
+def test_provider_must_implement_fetch():
+    class Incomplete(WorldPriceProvider):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_breaker_opens_after_threshold_failures(clock):
+    breaker = CircuitBreaker(threshold=3, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == 'closed' and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == 'open' and not breaker.allow()
+
+
+def test_breaker_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == 'closed'
+
+
+def test_breaker_half_opens_after_the_timeout(clock):
+    breaker = CircuitBreaker(threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    clock.now += 59
+    assert breaker.state == 'open'
+    clock.now += 1
+    assert breaker.state == 'half-open' and breaker.allow()
+
+
+def test_failed_half_open_trial_reopens(clock):
+    breaker = CircuitBreaker(threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    clock.now += 60
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    clock.now += 59
+    assert breaker.state == 'open'
+
+
+def test_successful_half_open_trial_closes(clock):
+    breaker = CircuitBreaker(threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    clock.now += 60
+    breaker.record_success()
+    assert breaker.state == 'closed' and breaker.failures == 0
+
+
+def test_quote_never_waits_for_a_slow_provider():
+    provider = FakeProvider(latency=0.2)
+    feed = WorldPriceFeed(provider, refresh_interval=300)
+
+    async def run():
+        started = time.perf_counter()
+        first = feed.quote()
+        elapsed = time.perf_counter() - started
+        await feed._refresh_task
+        return first, elapsed, feed.quote()
+
+    first, elapsed, second = asyncio.run(run())
+    assert first is None
+    assert elapsed < 0.05
+    assert second.price_usd == provider.price_usd
+
+
+def test_quote_serves_the_old_value_while_revalidating():
+    provider = FakeProvider(price_usd=3000, latency=0.05)
+    feed = WorldPriceFeed(provider, refresh_interval=60)
+    feed._quote = WorldQuote(2900, 134.5, time.time() - 120)
+
+    async def run():
+        served = [feed.quote(), feed.quote()]
+        # One refresh in flight, however many reads saw an old quote
+        await feed._refresh_task
+        return served
+
+    served = asyncio.run(run())
+    assert [quote.price_usd for quote in served] == [2900, 2900]
+    assert provider.calls == 1
+    assert feed.quote().price_usd == 3000
+
+
+def test_failures_keep_the_last_quote_and_mark_it_stale():
+    provider = FakeProvider(fail=True)
+    feed = WorldPriceFeed(provider, refresh_interval=60, max_age=600)
+    feed._quote = WorldQuote(2900, 134.5, time.time() - 900)
+
+    asyncio.run(feed.refresh())
+    assert feed._quote.price_usd == 2900
+    assert feed.is_stale()
+    assert feed.failures == 1
+
+
+def test_open_breaker_skips_the_provider():
+    provider = FakeProvider(fail=True)
+    feed = WorldPriceFeed(provider, breaker=CircuitBreaker(threshold=2, reset_timeout=300))
+
+    async def run():
+        for _ in range(5):
+            await feed.refresh()
+
+    asyncio.run(run())
+    assert provider.calls == 2
+    assert feed.stats()['breaker'] == 'open'
@@ -0,0 +1,87 @@
+"""
+Benchmark for OCR preprocessing
+
+Runs every image in a directory through the full-frame path and through the
+preprocessed path (crop to the channel's learned region, downsize, grayscale,
+binarise), and reports mean latency and extraction accuracy for each.
+
+Accuracy needs a labels file mapping image names to expected prices:
+    {"board.jpg": [{"karat": 18, "offer": 29600, "demand": 29800}]}
+
+Usage: python scripts/bench_ocr.py <image_dir> [--labels labels.json] [--channel NAME]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from ocr import GoldImageOCR, preload  # noqa: E402
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+
+def score(prices, expected) -> tuple:
+    """(matched, expected) karat/offer pairs for one image"""
+    found = {(p.karat, round(p.offer_price or 0)) for p in prices}
+    matched = sum(1 for e in expected if (e['karat'], round(e['offer'])) in found)
+    return matched, len(expected)
+
+
+def bench(name: str, images: list, labels: dict, channel: str, prepare: bool):
+    latencies = []
+    matched = total = extracted = 0
+    for path in images:
+        with open(path, 'rb') as f:
+            data = f.read()
+        start = time.perf_counter()
+        prices = GoldImageOCR.extract_from_image(data, channel, prepare=prepare, use_cache=False)
+        latencies.append(time.perf_counter() - start)
+
+        extracted += len(prices)
+        prices = GoldImageOCR.merge_cells(prices)
+        if os.path.basename(path) in labels:
+            hit, count = score(prices, labels[os.path.basename(path)])
+            matched += hit
+            total += count
+
+    accuracy = f"{matched / total:.0%} ({matched}/{total})" if total else 'n/a'
+    print(
+        f"{name:<12} mean {statistics.mean(latencies) * 1000:>8.0f} ms  "
+        f"p50 {statistics.median(latencies) * 1000:>8.0f} ms  "
+        f"{extracted:>5} prices  accuracy {accuracy}"
+    )
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Compare full-frame and preprocessed OCR")
+    arg_parser.add_argument('image_dir')
+    arg_parser.add_argument('--labels', default=None, help="Expected prices per image (JSON)")
+    arg_parser.add_argument('--channel', default=None, help="Channel whose learned region to crop to")
+    args = arg_parser.parse_args()
+
+    images = sorted(
+        os.path.join(args.image_dir, name) for name in os.listdir(args.image_dir)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    if not images:
+        print(f"No images in {args.image_dir}")
+        return
+
+    labels = {}
+    if args.labels:
+        with open(args.labels, encoding='utf-8') as f:
+            labels = json.load(f)
+
+    # Keep model loading out of the timings
+    preload(background=False)
+    print(f"{len(images)} image(s)")
+    bench('full-frame', images, labels, args.channel, prepare=False)
+    bench('prepared', images, labels, args.channel, prepare=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark for the message price parser
+
+Compares the old three-pass parser (one finditer per pattern, re.sub compiled
+per number) against the single-pass PatternSet on a synthetic bulk corpus,
+and reports throughput in messages/s and the number of rows each produces.
+
+Usage: python scripts/bench_parser.py [messages]
+"""
+
+import os
+import re
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from patterns import DEFAULT_PATTERNS, PatternSet  # noqa: E402
+
+MESSAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+ROUNDS = 3
+
+LEGACY_PATTERNS = {p.name: re.compile(p.regex, re.IGNORECASE) for p in DEFAULT_PATTERNS}
+
+
+def legacy_parse(message: str) -> list:
+    """The parser as it was: three scans, each re-reading the whole message"""
+    def number(text):
+        return float(re.sub(r'[\s,.]', '', text))
+
+    prices = []
+    for match in LEGACY_PATTERNS['range'].finditer(message):
+        if int(match.group(1)) in [18, 21, 22, 24]:
+            prices.append((int(match.group(1)), number(match.group(2)), number(match.group(3))))
+    for match in LEGACY_PATTERNS['single'].finditer(message):
+        if int(match.group(1)) in [18, 21, 22, 24]:
+            prices.append((int(match.group(1)), number(match.group(2)), None))
+    for match in LEGACY_PATTERNS['sabika'].finditer(message):
+        prices.append((18, number(match.group(1)), None))
+    return prices
+
+
+def build_corpus(size: int) -> list:
+    """Messages shaped like channel posts: price lists, single prices and chatter"""
+    rng = random.Random(42)
+    filler = [
+        'مرحبا بكم في محلنا', 'Bijouterie ouverte de 9h à 18h', 'أسعار اليوم',
+        'توصيل لجميع الولايات', 'Nouveaux modèles disponibles', '☎️ 0555 12 34 56',
+    ]
+
+    def price():
+        return f"{rng.randint(9, 40)} {rng.randint(0, 999):03d}"
+
+    corpus = []
+    for _ in range(size):
+        lines = [rng.choice(filler)]
+        kind = rng.random()
+        if kind < 0.4:
+            # Some channels drop the "k", which the old single pattern re-matched
+            suffix = rng.choice(['k', ''])
+            for karat in (18, 21, 22, 24):
+                lines.append(f"{karat}{suffix}: {price()} - {price()} DA")
+        elif kind < 0.7:
+            lines.append(f"سعر الـ {rng.choice([18, 21, 24])}: {price()} دج")
+            lines.append(f"السبيكة 750: {price()} دج")
+        lines.extend(rng.choice(filler) for _ in range(rng.randint(0, 4)))
+        corpus.append('\n'.join(lines))
+    return corpus
+
+
+def bench(name: str, parse, corpus: list):
+    best = float('inf')
+    rows = 0
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        rows = sum(len(parse(message)) for message in corpus)
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:<12} {len(corpus) / best:>12,.0f} msg/s  {best * 1000:>9.1f} ms  {rows:>8} rows")
+
+
+def main():
+    corpus = build_corpus(MESSAGES)
+    engine = PatternSet(DEFAULT_PATTERNS)
+    print(f"{MESSAGES} messages, best of {ROUNDS}")
+    bench('three-pass', legacy_parse, corpus)
+    bench('single-pass', engine.find, corpus)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""
+Bulk price writer for historical backfills
+Buffers GoldPrice rows, COPYs them into a staging table and merges them into
+gold_prices / latest_prices with one statement each
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from typing import List, Optional, TYPE_CHECKING
+
+import asyncpg
+
+if TYPE_CHECKING:
+    from scraper import GoldPrice
+
+logger = logging.getLogger(__name__)
+
+STAGING_TABLE = 'gold_prices_staging'
+
+STAGING_COLUMNS = ['seq', 'timestamp', 'karat', 'buy_price', 'sell_price', 'source', 'raw_text']
+
+# Session-local, emptied at the end of every merge transaction
+CREATE_STAGING_SQL = f"""
+    CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+        seq BIGINT NOT NULL,
+        timestamp TIMESTAMPTZ NOT NULL,
+        karat INTEGER NOT NULL,
+        buy_price NUMERIC(12, 2),
+        sell_price NUMERIC(12, 2),
+        source VARCHAR(100) NOT NULL,
+        raw_text TEXT
+    ) ON COMMIT DELETE ROWS
+"""
+
+# One row per conflict key; the last buffered price wins, matching what
+# sequential per-row upserts did.
+MERGE_GOLD_PRICES_SQL = f"""
+    INSERT INTO gold_prices (timestamp, karat, buy_price, sell_price, source, raw_text, gold_type)
+    SELECT DISTINCT ON (timestamp, karat, source)
+        timestamp, karat, buy_price, sell_price, source, raw_text, 'new'
+    FROM {STAGING_TABLE}
+    ORDER BY timestamp, karat, source, seq DESC
+    ON CONFLICT (timestamp, karat, source) DO UPDATE
+    SET buy_price = EXCLUDED.buy_price,
+        sell_price = EXCLUDED.sell_price
+"""
+
+MERGE_LATEST_PRICES_SQL = f"""
+    INSERT INTO latest_prices (karat, source, timestamp, buy_price, sell_price)
+    SELECT DISTINCT ON (karat, source)
+        karat, source, timestamp, buy_price, sell_price
+    FROM {STAGING_TABLE}
+    WHERE buy_price IS NOT NULL AND sell_price IS NOT NULL
+    ORDER BY karat, source, timestamp DESC, seq DESC
+    ON CONFLICT (karat, source) DO UPDATE
+    SET timestamp = EXCLUDED.timestamp,
+        buy_price = EXCLUDED.buy_price,
+        sell_price = EXCLUDED.sell_price,
+        updated_at = NOW()
+    WHERE latest_prices.timestamp <= EXCLUDED.timestamp
+"""
+
+
+class WriteUnit:
+    """One caller's unit of work (e.g. prices behind one checkpoint move)
+
+    Batches are flushed in the background and mix callers, so a caller
+    passes its unit to every add() and checks `failed` before committing.
+    """
+
+    def __init__(self):
+        self.failed = 0
+
+
+class BulkPriceWriter:
+    """Buffers prices and flushes them by size or age with COPY + merge
+
+    At most one flush runs at a time, in the background, so the caller keeps
+    fetching while the previous batch is written.
+    """
+
+    def __init__(self, conn: asyncpg.Connection, batch_size: int = 500, flush_interval: float = 2.0):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.failed = 0
+        self._buffer: List[tuple] = []
+        self._units: List[Optional[WriteUnit]] = []
+        self._seq = 0
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._ticker: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Create the staging table and start the periodic flush"""
+        await self.conn.execute(CREATE_STAGING_SQL)
+        self._ticker = asyncio.create_task(self._tick())
+
+    async def add(self, price: 'GoldPrice', unit: Optional[WriteUnit] = None):
+        """Buffer a price, handing a full batch to the background flush
+
+        If the batch holding it fails, `unit.failed` is incremented.
+        """
+        self._seq += 1
+        self._buffer.append((
+            self._seq, price.timestamp, price.karat, price.buy_price,
+            price.sell_price, price.source, price.raw_text
+        ))
+        self._units.append(unit)
+        if len(self._buffer) >= self.batch_size:
+            await self._schedule_flush()
+
+    async def flush(self):
+        """Write everything buffered so far and wait for it"""
+        await self._schedule_flush()
+        if self._flush_task:
+            await self._flush_task
+
+    async def close(self):
+        """Stop the periodic flush and write the remaining buffer"""
+        if self._ticker:
+            self._ticker.cancel()
+            try:
+                await self._ticker
+            except asyncio.CancelledError:
+                pass
+            self._ticker = None
+        await self.flush()
+
+    async def _schedule_flush(self):
+        async with self._flush_lock:
+            # The connection handles one merge at a time: wait for the previous one.
+            # Shielded so cancelling the ticker never aborts a write mid-flight.
+            if self._flush_task:
+                await asyncio.shield(self._flush_task)
+                self._flush_task = None
+
+            if not self._buffer:
+                return
+
+            batch, self._buffer = self._buffer, []
+            units, self._units = self._units, []
+            self._flush_task = asyncio.create_task(self._write(batch, units))
+
+    async def _write(self, batch: List[tuple], units: List[Optional[WriteUnit]]):
+        try:
+            async with self.conn.transaction():
+                await self.conn.copy_records_to_table(STAGING_TABLE, records=batch, columns=STAGING_COLUMNS)
+                await self.conn.execute(MERGE_GOLD_PRICES_SQL)
+                await self.conn.execute(MERGE_LATEST_PRICES_SQL)
+            self.written += len(batch)
+            logger.info(f"Flushed {len(batch)} prices ({self.written} total)")
+        except Exception as e:
+            self.failed += len(batch)
+            for unit, count in Counter(unit for unit in units if unit is not None).items():
+                unit.failed += count
+            logger.error(f"Error flushing {len(batch)} prices: {e}")
+
+    async def _tick(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self._buffer:
+                await self._schedule_flush()
@@ -0,0 +1,52 @@
+"""
+Channel registry for the scrapers
+Channels and their parsing profiles come from CHANNELS_FILE (JSON) when set
+"""
+
+import os
+import json
+import logging
+from dataclasses import dataclass
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ChannelConfig:
+    """A Telegram channel to track"""
+    username: str
+    profile: str = 'default'  # parser profile name
+    rate: float = 0.5  # requests per second allowed for this channel
+    burst: int = 3
+    enabled: bool = True
+
+
+DEFAULT_CHANNELS = [
+    ChannelConfig('BijouterieChalabi'),
+]
+
+
+def load_channels(path: Optional[str] = None) -> List[ChannelConfig]:
+    """Load enabled channels from a JSON file, falling back to DEFAULT_CHANNELS
+
+    The file holds a list of usernames or of ChannelConfig field objects:
+        ["BijouterieChalabi", {"username": "OtherJeweller", "profile": "default"}]
+    """
+    path = path or os.getenv('CHANNELS_FILE')
+    if not path:
+        return list(DEFAULT_CHANNELS)
+
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+
+    channels = []
+    for entry in entries:
+        if isinstance(entry, str):
+            channels.append(ChannelConfig(entry))
+        else:
+            channels.append(ChannelConfig(**entry))
+
+    enabled = [c for c in channels if c.enabled]
+    logger.info(f"Loaded {len(enabled)} channel(s) from {path}")
+    return enabled
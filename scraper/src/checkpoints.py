@@ -0,0 +1,113 @@
+"""
+Scrape checkpoints stored in the scrape_checkpoints table
+Lets backfills resume from the last processed message after a restart, and
+remembers processed messages (channel_messages, with their text) so they are
+not redone and can be re-parsed later
+"""
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import asyncpg
+
+
+@dataclass
+class Checkpoint:
+    """Progress of one scraper over one channel"""
+    channel: str
+    scraper: str  # 'web' or 'telegram'
+    last_message_id: Optional[int] = None
+    oldest_message_id: Optional[int] = None
+    backfill_complete: bool = False
+
+
+async def load_checkpoint(conn: asyncpg.Connection, channel: str, scraper: str) -> Checkpoint:
+    """Return the stored checkpoint, or an empty one for a new channel"""
+    row = await conn.fetchrow("""
+        SELECT last_message_id, oldest_message_id, backfill_complete
+        FROM scrape_checkpoints
+        WHERE channel = $1 AND scraper = $2
+    """, channel, scraper)
+
+    if not row:
+        return Checkpoint(channel, scraper)
+    return Checkpoint(
+        channel, scraper,
+        last_message_id=row['last_message_id'],
+        oldest_message_id=row['oldest_message_id'],
+        backfill_complete=row['backfill_complete']
+    )
+
+
+async def save_checkpoint(conn: asyncpg.Connection, checkpoint: Checkpoint):
+    """Insert or overwrite the stored checkpoint"""
+    await conn.execute("""
+        INSERT INTO scrape_checkpoints (channel, scraper, last_message_id, oldest_message_id, backfill_complete)
+        VALUES ($1, $2, $3, $4, $5)
+        ON CONFLICT (channel, scraper) DO UPDATE
+        SET last_message_id = EXCLUDED.last_message_id,
+            oldest_message_id = EXCLUDED.oldest_message_id,
+            backfill_complete = EXCLUDED.backfill_complete,
+            updated_at = NOW()
+    """, checkpoint.channel, checkpoint.scraper, checkpoint.last_message_id,
+        checkpoint.oldest_message_id, checkpoint.backfill_complete)
+
+
+def content_hash(text: Optional[str]) -> str:
+    """Stable hash of a message body, changes when the post is edited"""
+    return hashlib.sha1((text or '').encode('utf-8')).hexdigest()
+
+
+async def load_processed(conn: asyncpg.Connection, channel: str, message_ids: List[int]) -> Dict[int, str]:
+    """Content hashes of the given messages that were already processed
+
+    Rows recorded before message text was stored count as unprocessed, so a
+    reconcile run fills their text in.
+    """
+    rows = await conn.fetch("""
+        SELECT message_id, content_hash
+        FROM channel_messages
+        WHERE channel = $1 AND message_id = ANY($2::bigint[]) AND text IS NOT NULL
+    """, channel, message_ids)
+    return {row['message_id']: row['content_hash'] for row in rows}
+
+
+async def load_last_posts(conn: asyncpg.Connection, channels: List[str]) -> Dict[str, datetime]:
+    """Date of each channel's newest processed post (naive UTC), for channels with any"""
+    rows = await conn.fetch("""
+        SELECT c.channel, m.posted_at
+        FROM unnest($1::text[]) AS c(channel)
+        CROSS JOIN LATERAL (
+            SELECT posted_at
+            FROM channel_messages
+            WHERE channel = c.channel
+            ORDER BY message_id DESC
+            LIMIT 1
+        ) m
+    """, channels)
+    return {
+        row['channel']: row['posted_at'].astimezone(timezone.utc).replace(tzinfo=None)
+        for row in rows
+    }
+
+
+async def mark_processed(conn: asyncpg.Connection, channel: str,
+                         messages: Iterable[Tuple[int, datetime, Optional[str]]]):
+    """Record (message_id, posted_at, text) rows as processed, keeping the text
+
+    Posts without text (media only) are stored with '', as NULL marks a row
+    recorded before text was kept and load_processed would never skip them.
+    """
+    await conn.executemany("""
+        INSERT INTO channel_messages (channel, message_id, posted_at, content_hash, text)
+        VALUES ($1, $2, $3, $4, $5)
+        ON CONFLICT (channel, message_id) DO UPDATE
+        SET content_hash = EXCLUDED.content_hash,
+            text = EXCLUDED.text,
+            processed_at = NOW()
+    """, [
+        (channel, message_id, posted_at, content_hash(text), text or '')
+        for message_id, posted_at, text in messages
+    ])
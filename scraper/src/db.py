@@ -0,0 +1,74 @@
+"""
+Database access shared by the scraper entry points
+A tuned asyncpg pool and the price write statements. Every caller issues the
+same SQL text, so each connection prepares a statement once and reuses it
+from its statement cache.
+"""
+
+import os
+import logging
+from typing import Iterable, Optional, TYPE_CHECKING
+
+import asyncpg
+
+if TYPE_CHECKING:
+    from scraper import GoldPrice
+
+logger = logging.getLogger(__name__)
+
+INSERT_PRICE_SQL = """
+    INSERT INTO gold_prices (timestamp, karat, buy_price, sell_price, source, raw_text, gold_type)
+    VALUES ($1, $2, $3, $4, $5, $6, 'new')
+    ON CONFLICT (timestamp, karat, source) DO NOTHING
+"""
+
+# Keep latest_prices in step with gold_prices. The WHERE clause makes
+# backfills of older messages a no-op for rows that already hold newer data.
+UPSERT_LATEST_PRICE_SQL = """
+    INSERT INTO latest_prices (karat, source, timestamp, buy_price, sell_price)
+    VALUES ($1, $2, $3, $4, $5)
+    ON CONFLICT (karat, source) DO UPDATE
+    SET timestamp = EXCLUDED.timestamp,
+        buy_price = EXCLUDED.buy_price,
+        sell_price = EXCLUDED.sell_price,
+        updated_at = NOW()
+    WHERE latest_prices.timestamp <= EXCLUDED.timestamp
+"""
+
+
+async def create_pool(min_size: Optional[int] = None, max_size: Optional[int] = None,
+                      application_name: str = 'gold-scraper') -> asyncpg.Pool:
+    """Connection pool sized from DB_POOL_* unless the caller needs a floor
+
+    Settings are read here rather than at import, so they follow load_dotenv()
+    in whichever entry point calls this.
+    """
+    min_size = min_size if min_size is not None else int(os.getenv('DB_POOL_MIN_SIZE', '1'))
+    max_size = max(max_size if max_size is not None else int(os.getenv('DB_POOL_MAX_SIZE', '5')), min_size)
+    pool = await asyncpg.create_pool(
+        os.getenv('DATABASE_URL'),
+        min_size=min_size,
+        max_size=max_size,
+        statement_cache_size=int(os.getenv('DB_STATEMENT_CACHE_SIZE', '256')),
+        # Idle connections beyond min_size are closed rather than held forever
+        max_inactive_connection_lifetime=float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+        server_settings={'application_name': application_name},
+    )
+    logger.info(f"DB pool ready ({min_size}-{max_size} connections)")
+    return pool
+
+
+async def save_prices(conn: asyncpg.Connection, prices: Iterable['GoldPrice']):
+    """Insert prices and move latest_prices forward, one batch per statement"""
+    prices = list(prices)
+    if not prices:
+        return
+
+    await conn.executemany(INSERT_PRICE_SQL, [
+        (p.timestamp, p.karat, p.buy_price, p.sell_price, p.source, p.raw_text) for p in prices
+    ])
+    # One-sided prices (a lone offer, most OCR rows) have no mid price to serve
+    await conn.executemany(UPSERT_LATEST_PRICE_SQL, [
+        (p.karat, p.source, p.timestamp, p.buy_price, p.sell_price) for p in prices
+        if p.buy_price is not None and p.sell_price is not None
+    ])
@@ -2,9 +2,15 @@ import asyncio
 import os
 import logging
 from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
 import asyncpg
 from telethon import TelegramClient
-from scraper import GoldPriceParser, GoldPrice
+from scraper import get_parser
+from bulk_writer import BulkPriceWriter, WriteUnit
+from channels import ChannelConfig, load_channels
+from db import create_pool
+from checkpoints import content_hash, load_checkpoint, load_last_posts, load_processed, mark_processed, save_checkpoint
+from scheduler import ChannelScheduler, Throttle, TokenBucket
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -20,24 +26,117 @@ API_HASH = os.getenv('TELEGRAM_API_HASH')
 PHONE = os.getenv('TELEGRAM_PHONE')
 BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 DATABASE_URL = os.getenv('DATABASE_URL')
-CHANNEL_USERNAME = 'BijouterieChalabi'  # Target channel
 DAYS_TO_SCRAPE = 30
+# Channels backfilled at once, and the account-wide Telegram request budget
+CHANNEL_CONCURRENCY = int(os.getenv('CHANNEL_CONCURRENCY', '4'))
+TELEGRAM_RATE = float(os.getenv('TELEGRAM_RATE', '2'))
+# Keep polling all channels after the backfill instead of exiting
+POLL_CHANNELS = os.getenv('POLL_CHANNELS') == '1'
+# 'incremental' fetches only messages after each channel's high-water mark;
+# 'reconcile' re-walks DAYS_TO_SCRAPE but still skips unchanged messages
+SYNC_MODE = os.getenv('SYNC_MODE', 'incremental')
+# Messages per get_messages call (Telegram's maximum per request)
+SYNC_BATCH_SIZE = 100
+CHECKPOINT_NAME = 'telegram'
 
-async def get_db_connection():
-    return await asyncpg.connect(DATABASE_URL)
+# Last message id stored by an unfinished reconcile pass, per channel
+RECONCILE_PROGRESS: Dict[str, int] = {}
 
-async def save_price(conn, price: GoldPrice):
-    try:
-        await conn.execute("""
-            INSERT INTO gold_prices (timestamp, karat, buy_price, sell_price, source, raw_text, gold_type)
-            VALUES ($1, $2, $3, $4, $5, $6, 'new')
-            ON CONFLICT (timestamp, karat, source) DO UPDATE 
-            SET buy_price = EXCLUDED.buy_price,
-                sell_price = EXCLUDED.sell_price
-        """, price.timestamp, price.karat, price.buy_price, price.sell_price, price.source, price.raw_text)
-        logger.info(f"Saved price: {price.karat}k - {price.buy_price} DZD at {price.timestamp}")
-    except Exception as e:
-        logger.error(f"Error saving price: {e}")
+async def get_db_pool():
+    # The bulk writer holds one connection; channels share the rest for checkpoints
+    return await create_pool(min_size=2, application_name='gold-scraper-historical')
+
+async def process_batch(pool: asyncpg.Pool, writer: BulkPriceWriter, parser, channel: ChannelConfig,
+                        messages: list) -> Tuple[int, bool]:
+    """Parse messages not yet processed (or edited since), then record them
+
+    Returns (number processed, whether every price was written).
+    """
+    async with pool.acquire() as conn:
+        known = await load_processed(conn, channel.username, [m.id for m in messages])
+
+    fresh = []
+    unit = WriteUnit()
+    for message in messages:
+        if known.get(message.id) == content_hash(message.text):
+            continue
+        fresh.append((message.id, message.date, message.text))
+
+        if message.text:
+            for price in parser.parse_message(message.text, channel.username):
+                # Override timestamp with message timestamp
+                price.timestamp = message.date
+                await writer.add(price, unit)
+
+    if not fresh:
+        return 0, True
+
+    # Only remember messages once their prices are stored
+    await writer.flush()
+    if unit.failed:
+        logger.error(f"[{channel.username}] write failed, messages not marked processed")
+        return len(fresh), False
+
+    async with pool.acquire() as conn:
+        await mark_processed(conn, channel.username, fresh)
+    return len(fresh), True
+
+async def backfill_channel(client, pool: asyncpg.Pool, writer: BulkPriceWriter, channel: ChannelConfig,
+                           since: Optional[datetime], throttle: Throttle) -> Optional[datetime]:
+    """Save prices posted since the channel's high-water mark
+
+    Pages oldest first with one throttled get_messages call per
+    SYNC_BATCH_SIZE messages, moving the mark after each stored page, so a
+    run cut short by FloodWait resumes where it stopped. Without a mark
+    (first run) or with SYNC_MODE=reconcile the last DAYS_TO_SCRAPE days are
+    walked instead, skipping messages already processed.
+    Returns the date of the newest post seen.
+    """
+    async with pool.acquire() as conn:
+        checkpoint = await load_checkpoint(conn, channel.username, CHECKPOINT_NAME)
+    parser = get_parser(channel.profile)
+
+    reconcile = SYNC_MODE == 'reconcile'
+    if checkpoint.last_message_id is not None and not reconcile:
+        offset_id, offset_date = checkpoint.last_message_id, None
+        logger.info(f"[{channel.username}] syncing messages after #{offset_id}...")
+    else:
+        # A reconcile pass retried after FloodWait continues after its last page
+        offset_id = RECONCILE_PROGRESS.get(channel.username, 0) if reconcile else 0
+        offset_date = None if offset_id else datetime.utcnow() - timedelta(days=DAYS_TO_SCRAPE)
+        logger.info(f"[{channel.username}] scraping history from {offset_date or f'#{offset_id}'}...")
+
+    newest = None
+    seen = processed = 0
+    while True:
+        await throttle()
+        # reverse=True: ascending ids, offset_id / offset_date become lower bounds
+        page = await client.get_messages(
+            channel.username, limit=SYNC_BATCH_SIZE, reverse=True,
+            offset_id=offset_id, offset_date=offset_date
+        )
+        if not page:
+            RECONCILE_PROGRESS.pop(channel.username, None)
+            break
+
+        seen += len(page)
+        newest = page[-1].date.replace(tzinfo=None)
+        count, ok = await process_batch(pool, writer, parser, channel, list(page))
+        processed += count
+        if not ok:
+            # The mark stays before this page; the next run retries it
+            break
+
+        offset_id, offset_date = page[-1].id, None
+        if reconcile:
+            RECONCILE_PROGRESS[channel.username] = offset_id
+        if offset_id > (checkpoint.last_message_id or 0):
+            checkpoint.last_message_id = offset_id
+            async with pool.acquire() as conn:
+                await save_checkpoint(conn, checkpoint)
+
+    logger.info(f"[{channel.username}] {seen} message(s) fetched, {processed} processed")
+    return newest
 
 async def main():
     # Check if using bot token or phone number
@@ -63,35 +162,39 @@ async def main():
     else:
         await client.start(phone=PHONE)
     
-    conn = await get_db_connection()
-    parser = GoldPriceParser()
+    pool = await get_db_pool()
+    conn = await pool.acquire()
+    writer = BulkPriceWriter(conn)
+    await writer.start()
+    
+    channels = load_channels()
+    scheduler = ChannelScheduler(
+        channels,
+        lambda channel, since, throttle: backfill_channel(client, pool, writer, channel, since, throttle),
+        host_bucket=TokenBucket(TELEGRAM_RATE, TELEGRAM_RATE * 5),
+        concurrency=CHANNEL_CONCURRENCY
+    )
     
     try:
-        start_date = datetime.utcnow() - timedelta(days=DAYS_TO_SCRAPE)
-        logger.info(f"Scraping history from {start_date}...")
+        async with pool.acquire() as seed_conn:
+            scheduler.seed(await load_last_posts(seed_conn, [c.username for c in channels]))
+        logger.info(f"Backfilling {len(channels)} channel(s)...")
+        await scheduler.run_once()
+        
+        await writer.flush()
+        logger.info(f"Finished scraping. Total prices saved: {writer.written}")
         
-        count = 0
-        async for message in client.iter_messages(CHANNEL_USERNAME, limit=None, offset_date=datetime.utcnow()):
-            if message.date.replace(tzinfo=None) < start_date:
-                break
-            
-            if message.text:
-                # Use message date as timestamp
-                prices = parser.parse_message(message.text, CHANNEL_USERNAME)
-                
-                for price in prices:
-                    # Override timestamp with message timestamp
-                    price.timestamp = message.date
-                    await save_price(conn, price)
-                    count += 1
-                    
-        logger.info(f"Finished scraping. Total prices saved: {count}")
+        if POLL_CHANNELS:
+            logger.info("Polling channels for new posts...")
+            await scheduler.run_forever()
         
     except Exception as e:
         logger.error(f"Scraping error: {e}")
     finally:
+        await writer.close()
         await client.disconnect()
-        await conn.close()
+        await pool.release(conn)
+        await pool.close()
 
 if __name__ == '__main__':
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,172 @@
+"""
+Image preprocessing before OCR
+Crops to a channel's learned price-board region, downsizes, converts to
+grayscale and binarises, so detection and recognition see fewer pixels
+
+Learn a region: python src/image_prep.py learn CHANNEL image1.jpg image2.jpg ...
+"""
+
+import os
+import re
+import json
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Longest image side handed to the detector; larger photos are downsized
+OCR_MAX_SIDE = int(os.getenv('OCR_MAX_SIDE', '1280'))
+OCR_BINARIZE = os.getenv('OCR_BINARIZE', '1') == '1'
+# JSON {channel: [left, top, right, bottom]} as fractions of the image size
+OCR_REGIONS_FILE = os.getenv('OCR_REGIONS_FILE')
+
+# (left, top, right, bottom), each 0..1 of the image width / height
+Region = Tuple[float, float, float, float]
+
+# Boxes worth keeping when learning a region: prices and karat labels
+PRICE_BOX = re.compile(r'\d{4,6}|\b(?:18|21|22|24)\s*[kK]?\b|750|875|916|999')
+
+
+def load_regions(path: Optional[str] = None) -> Dict[str, Region]:
+    """Learned crop region per channel (lower-cased), empty without a file"""
+    path = path or OCR_REGIONS_FILE
+    if not path or not os.path.exists(path):
+        return {}
+
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+    return {channel.lower(): tuple(region) for channel, region in entries.items()}
+
+
+def save_region(channel: str, region: Region, path: Optional[str] = None):
+    """Store one channel's region, keeping the others"""
+    path = path or OCR_REGIONS_FILE
+    if not path:
+        raise ValueError("OCR_REGIONS_FILE is not set")
+
+    entries = {}
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            entries = json.load(f)
+    entries[channel] = [round(v, 4) for v in region]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(entries, f, indent=2)
+
+
+def learn_region(boxes: Iterable[Tuple[Sequence[Sequence[float]], int, int]],
+                 padding: float = 0.04) -> Optional[Region]:
+    """Padded union of price boxes from full-frame OCR runs
+
+    `boxes` holds (quad, image width, image height) for every box that held a
+    price or karat label, across as many sample images as available.
+    """
+    left = top = 1.0
+    right = bottom = 0.0
+    found = False
+    for quad, width, height in boxes:
+        xs = [p[0] / width for p in quad]
+        ys = [p[1] / height for p in quad]
+        left, top = min(left, min(xs)), min(top, min(ys))
+        right, bottom = max(right, max(xs)), max(bottom, max(ys))
+        found = True
+
+    if not found:
+        return None
+    return (
+        max(0.0, left - padding), max(0.0, top - padding),
+        min(1.0, right + padding), min(1.0, bottom + padding)
+    )
+
+
+def otsu_threshold(histogram: List[int]) -> int:
+    """Grey level that best separates a 256-bin histogram into two classes"""
+    total = sum(histogram)
+    weighted_total = sum(i * count for i, count in enumerate(histogram))
+    background = weighted_background = 0
+    best_level, best_variance = 127, 0.0
+
+    for level, count in enumerate(histogram):
+        background += count
+        if background == 0:
+            continue
+        foreground = total - background
+        if foreground == 0:
+            break
+
+        weighted_background += level * count
+        mean_background = weighted_background / background
+        mean_foreground = (weighted_total - weighted_background) / foreground
+        variance = background * foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_level, best_variance = level, variance
+    return best_level
+
+
+def preprocess(image: Image.Image, region: Optional[Region] = None, max_side: int = OCR_MAX_SIDE,
+               binarize: bool = OCR_BINARIZE) -> Image.Image:
+    """Crop, downsize, grayscale and binarise an image for OCR"""
+    if region:
+        width, height = image.size
+        left, top, right, bottom = region
+        image = image.crop((int(left * width), int(top * height), int(right * width), int(bottom * height)))
+
+    if max_side and max(image.size) > max_side:
+        scale = max_side / max(image.size)
+        image = image.resize(
+            (max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+            Image.Resampling.BILINEAR
+        )
+
+    image = image.convert('L')
+    if binarize:
+        threshold = otsu_threshold(image.histogram())
+        image = image.point([0] * (threshold + 1) + [255] * (255 - threshold))
+    return image
+
+
+def settings_key(region: Optional[Region] = None, max_side: int = OCR_MAX_SIDE,
+                 binarize: bool = OCR_BINARIZE) -> str:
+    """What preprocess() would do to an image, for cache keys"""
+    return f"region={list(region) if region else None};max_side={max_side};binarize={int(binarize)}"
+
+
+def to_ndarray(image: Image.Image):
+    """PaddleOCR input: grayscale as-is, colour as BGR"""
+    import numpy as np
+
+    if image.mode == 'L':
+        return np.asarray(image)
+    return np.asarray(image.convert('RGB'))[:, :, ::-1]
+
+
+def main():
+    import sys
+    from ocr import OCR_USE_ANGLE_CLS, get_engine
+
+    if len(sys.argv) < 4 or sys.argv[1] != 'learn':
+        print("Usage: python image_prep.py learn <channel> <image> [<image> ...]")
+        return
+
+    channel, paths = sys.argv[2], sys.argv[3:]
+    boxes = []
+    for path in paths:
+        image = Image.open(path)
+        result = get_engine().ocr(to_ndarray(image), cls=OCR_USE_ANGLE_CLS)
+        lines = result[0] if result and result[0] else []
+        for quad, (text, _) in lines:
+            if PRICE_BOX.search(text):
+                boxes.append((quad, image.width, image.height))
+
+    region = learn_region(boxes)
+    if not region:
+        print("No price boxes found; region not saved")
+        return
+    save_region(channel, region)
+    print(f"{channel}: {region} from {len(boxes)} box(es) in {len(paths)} image(s)")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
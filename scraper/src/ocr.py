@@ -5,22 +5,86 @@ Uses PaddleOCR for table recognition
 
 import os
 import re
+import time
+import bisect
 import logging
-from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass
+import threading
+from typing import List, Dict, NamedTuple, Optional, Sequence, Tuple, TYPE_CHECKING
+from dataclasses import dataclass, asdict
 from io import BytesIO
 
 from PIL import Image
-from paddleocr import PaddleOCR
+
+from image_prep import load_regions, preprocess, settings_key, to_ndarray
+from ocr_cache import get_cache
+
+if TYPE_CHECKING:
+    from paddleocr import PaddleOCR
 
 logger = logging.getLogger(__name__)
 
-# Initialize PaddleOCR (download models on first run)
-ocr = PaddleOCR(
-    use_angle_cls=True,
-    lang='en',  # Use 'ar' for Arabic if needed
-    show_log=False
-)
+# Inference settings, read when the engine is first built
+OCR_LANG = os.getenv('OCR_LANG', 'en')  # Use 'ar' for Arabic if needed
+OCR_USE_ANGLE_CLS = os.getenv('OCR_USE_ANGLE_CLS', '1') == '1'
+OCR_DET_LIMIT_SIDE_LEN = int(os.getenv('OCR_DET_LIMIT_SIDE_LEN', '960'))
+OCR_CPU_THREADS = int(os.getenv('OCR_CPU_THREADS', '4'))
+OCR_ENABLE_MKLDNN = os.getenv('OCR_ENABLE_MKLDNN', '0') == '1'
+# Build the engine in the background when the scraper starts
+OCR_PRELOAD = os.getenv('OCR_PRELOAD', '0') == '1'
+
+# Learned price-board region per channel (see image_prep.py)
+REGIONS = load_regions()
+
+# Process-wide PaddleOCR instance, created on first use (models download then)
+_engine: Optional['PaddleOCR'] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> 'PaddleOCR':
+    """Return the shared PaddleOCR engine, loading it on first call"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                from paddleocr import PaddleOCR
+
+                start = time.perf_counter()
+                _engine = PaddleOCR(
+                    use_angle_cls=OCR_USE_ANGLE_CLS,
+                    lang=OCR_LANG,
+                    det_limit_side_len=OCR_DET_LIMIT_SIDE_LEN,
+                    cpu_threads=OCR_CPU_THREADS,
+                    enable_mkldnn=OCR_ENABLE_MKLDNN,
+                    show_log=False
+                )
+                logger.info(f"OCR engine loaded in {time.perf_counter() - start:.1f}s")
+    return _engine
+
+
+def preload(background: bool = True) -> Optional[threading.Thread]:
+    """Load the engine and run one warm-up inference
+
+    In the background by default, so startup isn't delayed and the first
+    real image doesn't pay the cold start.
+    """
+    def load():
+        try:
+            import numpy as np
+
+            engine = get_engine()
+            start = time.perf_counter()
+            engine.ocr(np.full((64, 256, 3), 255, dtype=np.uint8), cls=OCR_USE_ANGLE_CLS)
+            logger.info(f"OCR engine warmed up in {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            logger.warning(f"OCR preload failed: {e}")
+
+    if not background:
+        load()
+        return None
+
+    thread = threading.Thread(target=load, name='ocr-preload', daemon=True)
+    thread.start()
+    return thread
 
 
 @dataclass
@@ -33,6 +97,38 @@ class OCRPrice:
     confidence: float
 
 
+class OCRBox(NamedTuple):
+    """One recognised text box, as an axis-aligned rectangle"""
+    text: str
+    confidence: float
+    left: float
+    top: float
+    right: float
+    bottom: float
+
+    @property
+    def cx(self) -> float:
+        return (self.left + self.right) / 2
+
+    @property
+    def cy(self) -> float:
+        return (self.top + self.bottom) / 2
+
+    @classmethod
+    def from_line(cls, quad: Sequence[Sequence[float]], text: str, confidence: float) -> 'OCRBox':
+        xs = [p[0] for p in quad]
+        ys = [p[1] for p in quad]
+        return cls(text, confidence, min(xs), min(ys), max(xs), max(ys))
+
+
+# Prices like 29600, 29600.00, 29 600 or 29,600
+PRICE_TOKEN = re.compile(r'(?<!\d)(\d{4,6}|\d{1,3}[ ,.]\d{3})(?:[.,]\d{1,2})?(?!\d)')
+# Karat labels as whole numbers only, so 31800 never reads as 18k, and not
+# next to / - . or :, so dates and times (24/01, 18-02, 18:30) don't either
+KARAT_TOKEN = re.compile(r'(?<![\d/.:-])(18|21|22|24|750|875|916|999)(?![\d/.:-])')
+PURITY_KARATS = {750: 18, 875: 21, 916: 22, 999: 24}
+
+
 class GoldImageOCR:
     """Extract gold prices from images using OCR"""
     
@@ -44,103 +140,194 @@ class GoldImageOCR:
     }
     
     @classmethod
-    def extract_from_image(cls, image_data: bytes) -> List[OCRPrice]:
-        """Extract prices from image bytes"""
+    def extract_from_image(cls, image_data: bytes, channel: Optional[str] = None,
+                           prepare: bool = True, use_cache: bool = True) -> List[OCRPrice]:
+        """Extract prices from image bytes
+
+        With `prepare` the image is cropped to the channel's learned region,
+        downsized and binarised first (image_prep.preprocess). Reposted images
+        are answered from the OCR cache (ocr_cache.py) without running the model.
+        """
         try:
             # Load image
             image = Image.open(BytesIO(image_data))
-            
-            # Run OCR
-            result = ocr.ocr(image, cls=True)
-            
-            if not result or not result[0]:
-                return []
-            
-            # Extract text with positions
-            texts = []
-            for line in result[0]:
-                bbox, (text, confidence) = line
-                texts.append({
-                    'text': text,
-                    'confidence': confidence,
-                    'y': bbox[0][1]  # Y position for sorting
-                })
-            
-            # Sort by Y position (top to bottom)
-            texts.sort(key=lambda x: x['y'])
-            
+
+            region = REGIONS.get((channel or '').lower()) if prepare else None
+            cache = get_cache() if use_cache else None
+            lines = None
+            if cache:
+                # Boxes are in the coordinates of the image the model saw
+                variant = f"channel={channel};" + (settings_key(region) if prepare else 'raw')
+                keys = cache.keys(image_data, image, variant)
+                lines = cache.get(keys)
+
+            if lines is None:
+                if prepare:
+                    image = preprocess(image, region)
+
+                # Run OCR
+                result = get_engine().ocr(to_ndarray(image), cls=OCR_USE_ANGLE_CLS)
+                lines = [
+                    [[[float(x), float(y)] for x, y in quad], text, float(confidence)]
+                    for quad, (text, confidence) in (result[0] if result and result[0] else [])
+                ]
+                # Raw boxes are cached, so parser fixes apply to cached images too
+                if cache:
+                    cache.put(keys, lines)
+
             # Parse prices from OCR results
-            return cls._parse_ocr_results(texts)
+            return cls._parse_ocr_results([OCRBox.from_line(*line) for line in lines])
             
         except Exception as e:
             logger.error(f"OCR error: {e}")
             return []
     
     @classmethod
-    def extract_from_file(cls, filepath: str) -> List[OCRPrice]:
+    def extract_from_file(cls, filepath: str, channel: Optional[str] = None,
+                          prepare: bool = True) -> List[OCRPrice]:
         """Extract prices from image file"""
         with open(filepath, 'rb') as f:
-            return cls.extract_from_image(f.read())
+            return cls.extract_from_image(f.read(), channel, prepare)
     
     @classmethod
-    def _parse_ocr_results(cls, texts: List[Dict]) -> List[OCRPrice]:
-        """Parse OCR text results into prices"""
+    def _parse_ocr_results(cls, boxes: List[OCRBox]) -> List[OCRPrice]:
+        """Rebuild the price table from box positions, one OCRPrice per cell
+
+        Boxes are grouped into rows by vertical centre and price boxes into
+        columns by horizontal overlap (both a sort plus a sweep). Header
+        keywords name the offer/demand columns, and each row's karat label
+        applies to the prices on that row.
+        """
+        if not boxes:
+            return []
+
+        # Only rows naming a karat are table rows; dates and phone numbers elsewhere
+        # would otherwise widen the price columns
+        rows = [(cls._row_karat(row), row) for row in cls._cluster_rows(boxes)]
+        rows = [(karat, row) for karat, row in rows if karat is not None]
+        price_boxes = [box for _, row in rows for box in row if PRICE_TOKEN.search(box.text)]
+        columns = cls._cluster_columns(price_boxes)
+        roles = cls._column_roles(boxes, columns)
+
         prices = []
-        
-        # Combine all text for pattern matching
-        full_text = ' '.join([t['text'] for t in texts])
-        
-        # Look for price patterns
-        # Pattern: numbers that look like prices (4-6 digits, possibly with decimals)
-        price_pattern = re.compile(r'(\d{4,6}(?:\.\d{1,2})?)')
-        
-        matches = price_pattern.findall(full_text)
-        
-        if len(matches) >= 2:
-            # Assume first two numbers are offer/demand
-            try:
-                offer = float(matches[0])
-                demand = float(matches[1])
-                
+        for karat, row in rows:
+            label = ' '.join(box.text for box in row if not PRICE_TOKEN.search(box.text))
+            for box in sorted(row, key=lambda b: b.left):
+                match = PRICE_TOKEN.search(box.text)
+                if not match:
+                    continue
+                role = roles.get(cls._column_of(box, columns))
+                if role is None:
+                    continue
+
+                value = float(re.sub(r'[ ,.]', '', match.group(1)))
                 prices.append(OCRPrice(
-                    karat=None,  # Determine from context
-                    offer_price=offer,
-                    demand_price=demand,
-                    raw_text=full_text[:200],
-                    confidence=sum(t['confidence'] for t in texts) / len(texts)
+                    karat=karat,
+                    offer_price=value if role == 'offer' else None,
+                    demand_price=value if role == 'demand' else None,
+                    raw_text=f"{label} {box.text}".strip(),
+                    confidence=box.confidence
                 ))
-            except ValueError:
-                pass
-        
-        # Look for karat-specific prices
-        for text_item in texts:
-            text = text_item['text'].lower()
-            
-            # Check for karat indicators
-            karat = None
-            if '18' in text or '750' in text:
-                karat = 18
-            elif '21' in text or '875' in text:
-                karat = 21
-            elif '22' in text or '916' in text:
-                karat = 22
-            elif '24' in text or '999' in text:
-                karat = 24
-            
-            if karat:
-                # Look for associated price
-                price_match = price_pattern.search(text)
-                if price_match:
-                    prices.append(OCRPrice(
-                        karat=karat,
-                        offer_price=float(price_match.group(1)),
-                        demand_price=None,
-                        raw_text=text,
-                        confidence=text_item['confidence']
-                    ))
         
         return prices
 
+    @staticmethod
+    def merge_cells(prices: List[OCRPrice]) -> List[OCRPrice]:
+        """One OCRPrice per karat with both sides, from per-cell results
+
+        The first (top-most) row wins when a karat appears twice; confidence
+        is that of the weakest cell used.
+        """
+        merged: Dict[int, OCRPrice] = {}
+        for price in prices:
+            if price.karat is None:
+                continue
+            current = merged.get(price.karat)
+            if current is None:
+                merged[price.karat] = OCRPrice(**asdict(price))
+                continue
+            if current.offer_price is None and price.offer_price is not None:
+                current.offer_price = price.offer_price
+            elif current.demand_price is None and price.demand_price is not None:
+                current.demand_price = price.demand_price
+            else:
+                continue
+            current.raw_text = f"{current.raw_text} | {price.raw_text}"
+            current.confidence = min(current.confidence, price.confidence)
+        return list(merged.values())
+
+    @staticmethod
+    def _cluster_rows(boxes: List[OCRBox]) -> List[List[OCRBox]]:
+        """Group boxes whose vertical centres lie within half a text height"""
+        heights = sorted(box.bottom - box.top for box in boxes)
+        tolerance = heights[len(heights) // 2] * 0.5
+
+        rows: List[List[OCRBox]] = []
+        row_cy = 0.0
+        for box in sorted(boxes, key=lambda b: b.cy):
+            if rows and box.cy - row_cy <= tolerance:
+                rows[-1].append(box)
+                row_cy += (box.cy - row_cy) / len(rows[-1])
+            else:
+                rows.append([box])
+                row_cy = box.cy
+        return rows
+
+    @staticmethod
+    def _cluster_columns(price_boxes: List[OCRBox]) -> List[Tuple[float, float]]:
+        """Merge the horizontal extents of price boxes into column intervals"""
+        columns: List[Tuple[float, float]] = []
+        for box in sorted(price_boxes, key=lambda b: b.left):
+            if columns and box.left <= columns[-1][1]:
+                columns[-1] = (columns[-1][0], max(columns[-1][1], box.right))
+            else:
+                columns.append((box.left, box.right))
+        return columns
+
+    @staticmethod
+    def _column_of(box: OCRBox, columns: List[Tuple[float, float]]) -> Optional[int]:
+        """Index of the column containing (or nearest to) the box centre"""
+        if not columns:
+            return None
+        index = bisect.bisect_right([left for left, _ in columns], box.cx) - 1
+        candidates = [i for i in (index, index + 1) if 0 <= i < len(columns)]
+        return min(
+            candidates,
+            key=lambda i: 0 if columns[i][0] <= box.cx <= columns[i][1]
+            else min(abs(box.cx - columns[i][0]), abs(box.cx - columns[i][1]))
+        )
+
+    @classmethod
+    def _column_roles(cls, boxes: List[OCRBox], columns: List[Tuple[float, float]]) -> Dict[int, str]:
+        """Map column index to 'offer' / 'demand' from header keywords"""
+        roles: Dict[int, str] = {}
+        for box in boxes:
+            text = box.text.lower()
+            for role in ('offer', 'demand'):
+                if any(keyword in text for keyword in cls.KEYWORDS[role]):
+                    column = cls._column_of(box, columns)
+                    if column is not None:
+                        roles.setdefault(column, role)
+
+        # No usable headers: read columns left to right as offer, demand
+        if not roles:
+            return {i: role for i, role in zip(range(len(columns)), ('offer', 'demand'))}
+        # One header found on a two-column board: the other column is the other side
+        if len(roles) == 1 and len(columns) == 2:
+            (known, role), = roles.items()
+            roles[1 - known] = 'demand' if role == 'offer' else 'offer'
+        return roles
+
+    @staticmethod
+    def _row_karat(row: List[OCRBox]) -> Optional[int]:
+        """Karat named on a row, ignoring digits that belong to prices"""
+        for box in sorted(row, key=lambda b: b.left):
+            match = KARAT_TOKEN.search(PRICE_TOKEN.sub(' ', box.text))
+            if match:
+                value = int(match.group(1))
+                return PURITY_KARATS.get(value, value)
+        return None
+
 
 # Test function
 def test_ocr(image_path: str):
@@ -0,0 +1,173 @@
+"""
+OCR result cache for reposted price-board images
+Keeps the recognised boxes of each image, keyed by an exact content hash plus
+the settings it was read with (channel, crop region, preprocessing). A
+recompressed copy also resolves when its dHash is within a couple of bits and
+a downscaled thumbnail matches pixel for pixel, so a board whose layout stayed
+but whose prices changed is read again. Stored in SQLite on the sessions
+volume and shared by every OCR worker process, with LRU eviction.
+"""
+
+import os
+import time
+import json
+import zlib
+import sqlite3
+import hashlib
+import logging
+from typing import List, NamedTuple, Optional
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Empty disables the cache
+OCR_CACHE_FILE = os.getenv('OCR_CACHE_FILE', os.path.join('sessions', 'ocr_cache.sqlite3'))
+OCR_CACHE_MAX_ENTRIES = int(os.getenv('OCR_CACHE_MAX_ENTRIES', '5000'))
+# dHash grid side (bits = side^2) and the Hamming distance still counted as a recompression
+OCR_CACHE_HASH_SIZE = int(os.getenv('OCR_CACHE_HASH_SIZE', '16'))
+OCR_CACHE_MAX_DISTANCE = int(os.getenv('OCR_CACHE_MAX_DISTANCE', '2'))
+# Confirming thumbnail: side in pixels and the largest per-pixel grey-level
+# difference allowed. At 96px a changed digit moves whole thumbnail pixels by
+# far more than JPEG noise does.
+OCR_CACHE_THUMB_SIZE = int(os.getenv('OCR_CACHE_THUMB_SIZE', '96'))
+OCR_CACHE_THUMB_TOLERANCE = int(os.getenv('OCR_CACHE_THUMB_TOLERANCE', '12'))
+
+SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS ocr_lines (
+        exact_hash TEXT NOT NULL,
+        variant TEXT NOT NULL,
+        dhash TEXT NOT NULL,
+        thumbnail BLOB NOT NULL,
+        lines TEXT NOT NULL,
+        last_used REAL NOT NULL,
+        PRIMARY KEY (exact_hash, variant)
+    )
+"""
+
+
+class CacheKeys(NamedTuple):
+    exact: str
+    variant: str  # how the image was read: channel and preprocessing settings
+    dhash: int
+    thumbnail: bytes
+
+
+def exact_hash(image_data: bytes) -> str:
+    return hashlib.sha256(image_data).hexdigest()
+
+
+def dhash(image: Image.Image, size: int = OCR_CACHE_HASH_SIZE) -> int:
+    """Difference hash: one bit per horizontally adjacent pixel pair"""
+    small = image.convert('L').resize((size + 1, size), Image.Resampling.BILINEAR)
+    pixels = small.tobytes()
+    bits = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return bits
+
+
+def thumbnail(image: Image.Image, size: int = OCR_CACHE_THUMB_SIZE) -> bytes:
+    """Area-averaged grayscale pixels, which recompression barely moves"""
+    return image.convert('L').resize((size, size), Image.Resampling.BOX).tobytes()
+
+
+def same_thumbnail(a: bytes, b: bytes, tolerance: int = OCR_CACHE_THUMB_TOLERANCE) -> bool:
+    return len(a) == len(b) and all(abs(x - y) <= tolerance for x, y in zip(a, b))
+
+
+class OCRCache:
+    """SQLite-backed OCR results, matched exactly or as a confirmed recompression"""
+
+    def __init__(self, path: str, max_entries: int = OCR_CACHE_MAX_ENTRIES,
+                 max_distance: int = OCR_CACHE_MAX_DISTANCE):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Several worker processes share the file; WAL lets readers and one writer overlap
+        self.conn = sqlite3.connect(path, timeout=10)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        # Entries from before the settings were part of the key can't be trusted
+        self.conn.execute('DROP TABLE IF EXISTS ocr_results')
+        self.conn.execute(SCHEMA_SQL)
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_ocr_lines_last_used ON ocr_lines (last_used)')
+        self.conn.commit()
+
+    def keys(self, image_data: bytes, image: Image.Image, variant: str) -> CacheKeys:
+        return CacheKeys(exact_hash(image_data), variant, dhash(image), thumbnail(image))
+
+    def get(self, keys: CacheKeys) -> Optional[List[list]]:
+        """Cached OCR lines ([quad, text, confidence]) for an image, or None on a miss"""
+        exact = keys.exact
+        row = self.conn.execute(
+            'SELECT lines FROM ocr_lines WHERE exact_hash = ? AND variant = ?', (exact, keys.variant)
+        ).fetchone()
+        if row is None:
+            exact = self._recompressed(keys)
+            if exact is None:
+                return None
+            row = self.conn.execute(
+                'SELECT lines FROM ocr_lines WHERE exact_hash = ? AND variant = ?', (exact, keys.variant)
+            ).fetchone()
+
+        with self.conn:
+            self.conn.execute('UPDATE ocr_lines SET last_used = ? WHERE exact_hash = ? AND variant = ?',
+                              (time.time(), exact, keys.variant))
+        return json.loads(row[0])
+
+    def put(self, keys: CacheKeys, lines: List[list]):
+        """Store an image's OCR lines, evicting the least recently used entries"""
+        with self.conn:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO ocr_lines (exact_hash, variant, dhash, thumbnail, lines, last_used)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (keys.exact, keys.variant, format(keys.dhash, 'x'), zlib.compress(keys.thumbnail),
+                  json.dumps(lines), time.time()))
+            self.conn.execute("""
+                DELETE FROM ocr_lines WHERE rowid IN (
+                    SELECT rowid FROM ocr_lines ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+
+    def _recompressed(self, keys: CacheKeys) -> Optional[str]:
+        """Key of an entry that is the same picture re-encoded, if any
+
+        The dHash only shortlists: boards keep their layout when prices change,
+        so a candidate counts only if its thumbnail matches as well.
+        """
+        candidates = []
+        for exact, other in self.conn.execute(
+            'SELECT exact_hash, dhash FROM ocr_lines WHERE variant = ?', (keys.variant,)
+        ):
+            distance = (keys.dhash ^ int(other, 16)).bit_count()
+            if distance <= self.max_distance:
+                candidates.append((distance, exact))
+
+        for _, exact in sorted(candidates):
+            row = self.conn.execute(
+                'SELECT thumbnail FROM ocr_lines WHERE exact_hash = ? AND variant = ?', (exact, keys.variant)
+            ).fetchone()
+            if row and same_thumbnail(keys.thumbnail, zlib.decompress(row[0])):
+                return exact
+        return None
+
+
+_cache: Optional[OCRCache] = None
+_cache_opened = False
+
+
+def get_cache() -> Optional[OCRCache]:
+    """This process's cache connection, or None when disabled or unavailable"""
+    global _cache, _cache_opened
+    if not _cache_opened:
+        _cache_opened = True
+        if OCR_CACHE_FILE:
+            try:
+                _cache = OCRCache(OCR_CACHE_FILE)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"OCR cache unavailable: {e}")
+    return _cache
@@ -0,0 +1,193 @@
+"""
+OCR worker pool for photo messages
+Runs GoldImageOCR in dedicated processes behind a bounded queue, so the event
+loop keeps handling text messages while images are processed
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ocr import OCR_PRELOAD, GoldImageOCR, OCRPrice, preload
+
+logger = logging.getLogger(__name__)
+
+# Marks gold_prices rows read from images, so a text re-parse leaves them alone
+OCR_RAW_PREFIX = '[ocr] '
+
+# Returns the image bytes, e.g. a Telethon download; runs when a worker is free
+ImageLoader = Callable[[], Awaitable[bytes]]
+
+
+def _worker_main(conn):
+    """Worker process: OCR each image received on the pipe"""
+    # The engine lives here, so loading and warming it happens per worker
+    if OCR_PRELOAD:
+        preload(background=False)
+
+    while True:
+        try:
+            channel, image_data = conn.recv()
+        except EOFError:
+            return
+        conn.send(GoldImageOCR.extract_from_image(image_data, channel))
+
+
+class OCRWorker:
+    """One OCR process and the pipe to it; replaced when an image is abandoned"""
+
+    def __init__(self, ctx, index: int):
+        self.ctx = ctx
+        self.index = index
+        self.process = None
+        self.conn = None
+
+    def start(self):
+        self.conn, child = self.ctx.Pipe()
+        self.process = self.ctx.Process(
+            target=_worker_main, args=(child,), name=f'ocr-{self.index}', daemon=True
+        )
+        self.process.start()
+        child.close()
+
+    def stop(self):
+        if self.conn:
+            self.conn.close()
+        if self.process and self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+    def restart(self):
+        """Kill a busy or dead process and start a fresh one"""
+        self.stop()
+        self.start()
+
+    async def run(self, image_data: bytes, channel: Optional[str] = None) -> List[OCRPrice]:
+        """OCR one image; a timeout or cancel kills the process mid-inference"""
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self.conn.send, (channel, image_data))
+            await self._readable()
+            return self.conn.recv()
+        except (asyncio.CancelledError, EOFError, OSError):
+            self.restart()
+            raise
+
+    async def _readable(self):
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        fd = self.conn.fileno()
+        loop.add_reader(fd, lambda: ready.done() or ready.set_result(None))
+        try:
+            await ready
+        finally:
+            loop.remove_reader(fd)
+
+
+class OCRPool:
+    """Bounded queue of images served by `workers` OCR processes
+
+    submit() never blocks: when the queue is full the image is dropped. Each
+    image gets `timeout` seconds (download included), and cancelling its
+    future abandons it even mid-inference.
+    """
+
+    def __init__(self, workers: int = 1, queue_size: int = 16, timeout: float = 60):
+        self.workers = workers
+        self.timeout = timeout
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.processed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.dropped = 0
+        self._workers: List[OCRWorker] = []
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        # Spawned, not forked: the parent's event loop and sockets stay out of the workers
+        ctx = multiprocessing.get_context('spawn')
+        self._workers = [OCRWorker(ctx, i) for i in range(self.workers)]
+        for worker in self._workers:
+            worker.start()
+        self._tasks = [
+            asyncio.create_task(self._dispatch(worker), name=f"ocr-dispatch-{worker.index}")
+            for worker in self._workers
+        ]
+        logger.info(f"OCR pool started with {self.workers} worker(s)")
+
+    async def stop(self):
+        """Cancel queued and running images and stop the workers"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        while not self.queue.empty():
+            _, _, future = self.queue.get_nowait()
+            future.cancel()
+        for worker in self._workers:
+            worker.stop()
+        self._workers = []
+
+    def submit(self, load: ImageLoader, channel: Optional[str] = None) -> Optional[asyncio.Future]:
+        """Queue an image; returns a future of its prices, or None if the queue is full
+
+        `channel` selects the learned crop region for the image.
+        """
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((load, channel, future))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return None
+        return future
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'workers': self.workers,
+            'queue_depth': self.queue.qsize(),
+            'queue_size': self.queue.maxsize,
+            'processed': self.processed,
+            'failed': self.failed,
+            'timed_out': self.timed_out,
+            'dropped': self.dropped,
+        }
+
+    async def _run(self, worker: OCRWorker, load: ImageLoader, channel: Optional[str]) -> List[OCRPrice]:
+        return await worker.run(await load(), channel)
+
+    async def _dispatch(self, worker: OCRWorker):
+        while True:
+            load, channel, future = await self.queue.get()
+            try:
+                if future.cancelled():
+                    continue
+
+                task = asyncio.create_task(asyncio.wait_for(self._run(worker, load, channel), self.timeout))
+                future.add_done_callback(lambda f, t=task: t.cancel() if f.cancelled() else None)
+                # wait() rather than await, so a cancelled image doesn't stop the dispatcher
+                try:
+                    await asyncio.wait({task})
+                except asyncio.CancelledError:
+                    # Pool stopping: abandon the image and let its worker settle
+                    task.cancel()
+                    future.cancel()
+                    await asyncio.wait({task})
+                    raise
+
+                if future.done():
+                    continue
+                if task.cancelled():
+                    future.cancel()
+                elif task.exception():
+                    if isinstance(task.exception(), asyncio.TimeoutError):
+                        self.timed_out += 1
+                    else:
+                        self.failed += 1
+                    future.set_exception(task.exception())
+                else:
+                    self.processed += 1
+                    future.set_result(task.result())
+            finally:
+                self.queue.task_done()
@@ -0,0 +1,176 @@
+"""
+Single-pass price pattern engine
+Pattern sets are plain data, so each channel profile can bring its own formats
+"""
+
+import os
+import re
+import json
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_KARATS = (18, 21, 22, 24)
+
+# Thousands separators in prices like "29 600", "29,600" or "29.600"
+NUMBER_SEPARATORS = re.compile(r'[\s,.]')
+
+
+@dataclass(frozen=True)
+class PricePattern:
+    """One price format
+
+    Groups are numbered within `regex`; named groups and backreferences are
+    not allowed because the pattern is embedded in a combined regex.
+    """
+    name: str
+    regex: str
+    buy_group: int
+    sell_group: Optional[int] = None
+    karat_group: Optional[int] = None
+    karat: Optional[int] = None  # fixed karat for patterns without a karat group
+    ignore_case: bool = True
+
+
+class PriceMatch(NamedTuple):
+    karat: int
+    buy_price: float
+    sell_price: Optional[float]
+    raw_text: str
+    start: int
+    pattern: str
+
+
+# Most specific first: on overlap the earlier pattern wins
+DEFAULT_PATTERNS = [
+    # "18k: 29600 - 29800 DA" or similar
+    PricePattern(
+        'range',
+        r'(\d{2})[kK]?\s*[:=]?\s*(\d{1,3}[\s,.]?\d{3})\s*[-–]\s*(\d{1,3}[\s,.]?\d{3})\s*(?:DA|دج)?',
+        karat_group=1, buy_group=2, sell_group=3
+    ),
+    # "السبيكة 750" (Sabika/Lingot, always 18k)
+    PricePattern(
+        'sabika',
+        r'(?:السبيكة|سبيكة|sabika|lingot)\s*(?:750|18[kK])?\s*[:=]?\s*(\d{1,3}[\s,.]?\d{3})\s*(?:DA|دج)?',
+        karat=18, buy_group=1
+    ),
+    # "سعر الـ 18: 29700 دج"
+    PricePattern(
+        'single',
+        r'(?:سعر|prix)?\s*(?:الـ\s*)?(\d{2})\s*[:=]?\s*(\d{1,3}[\s,.]?\d{3})\s*(?:DA|دج)?',
+        karat_group=1, buy_group=2
+    ),
+]
+
+
+def parse_number(text: str) -> float:
+    """Parse a number string, handling spaces and commas"""
+    return float(NUMBER_SEPARATORS.sub('', text))
+
+
+class PatternSet:
+    """Price patterns compiled into one alternation and scanned in a single pass
+
+    At each position the earliest listed pattern wins. A less specific match
+    is re-checked against the more specific patterns over its span, so e.g.
+    the start of a range is never read as a single price.
+    """
+
+    def __init__(self, patterns: List[PricePattern]):
+        if not patterns:
+            raise ValueError("PatternSet needs at least one pattern")
+        self.patterns = list(patterns)
+
+        bodies = [f'(?i:{p.regex})' if p.ignore_case else p.regex for p in self.patterns]
+        self.regex = re.compile('|'.join(f'(?P<p{i}>{body})' for i, body in enumerate(bodies)))
+        self._compiled = [re.compile(body) for body in bodies]
+        # Group number of each pattern's wrapper; its own groups follow it
+        self._offsets = {f'p{i}': (i, self.regex.groupindex[f'p{i}']) for i in range(len(self.patterns))}
+
+    def find(self, text: str) -> List[PriceMatch]:
+        """All non-overlapping prices in `text`, in order of appearance"""
+        prices = []
+        # Next match of each more specific pattern, reused while it lies ahead
+        lookahead: Dict[int, Optional[re.Match]] = {}
+        pos = 0
+        while True:
+            m = self.regex.search(text, pos)
+            if not m:
+                return prices
+
+            # The wrapper group closes last, so lastgroup names the pattern
+            priority, offset = self._offsets[m.lastgroup]
+            match = m
+            for better in range(priority):
+                found = self._next_match(text, better, m.start(), lookahead)
+                if found and found.start() < m.end():
+                    priority, match, offset = better, found, 0
+                    break
+
+            price = self._to_price(match, offset, priority)
+            if price is None:
+                # Unsupported karat: let other patterns try from the next character
+                pos = match.start(offset) + 1
+                continue
+            prices.append(price)
+            pos = max(match.end(offset), match.start(offset) + 1)
+
+    def _next_match(self, text: str, priority: int, pos: int,
+                    lookahead: Dict[int, Optional[re.Match]]) -> Optional[re.Match]:
+        """First match of one pattern at or after pos with a supported karat"""
+        if priority in lookahead:
+            found = lookahead[priority]
+            if found is None or found.start() >= pos:
+                return found
+
+        found = self._compiled[priority].search(text, pos)
+        while found and self._karat(found, 0, priority) not in SUPPORTED_KARATS:
+            found = self._compiled[priority].search(text, found.start() + 1)
+        lookahead[priority] = found
+        return found
+
+    def _karat(self, match: re.Match, offset: int, priority: int) -> Optional[int]:
+        pattern = self.patterns[priority]
+        if pattern.karat_group:
+            return int(match.group(offset + pattern.karat_group))
+        return pattern.karat
+
+    def _to_price(self, match: re.Match, offset: int, priority: int) -> Optional[PriceMatch]:
+        karat = self._karat(match, offset, priority)
+        if karat not in SUPPORTED_KARATS:
+            return None
+
+        pattern = self.patterns[priority]
+        sell = match.group(offset + pattern.sell_group) if pattern.sell_group else None
+        return PriceMatch(
+            karat=karat,
+            buy_price=parse_number(match.group(offset + pattern.buy_group)),
+            sell_price=parse_number(sell) if sell else None,
+            raw_text=match.group(offset),
+            start=match.start(offset),
+            pattern=pattern.name
+        )
+
+
+def load_profiles(path: Optional[str] = None) -> Dict[str, PatternSet]:
+    """Pattern set per parser profile: 'default' plus any from a JSON file
+
+    The file (PARSER_PROFILES_FILE) maps profile names to PricePattern field
+    lists, most specific pattern first:
+        {"compact": [{"name": "range", "regex": "...", "karat_group": 1, "buy_group": 2, "sell_group": 3}]}
+    """
+    profiles = {'default': PatternSet(DEFAULT_PATTERNS)}
+    path = path or os.getenv('PARSER_PROFILES_FILE')
+    if not path:
+        return profiles
+
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+
+    for name, patterns in entries.items():
+        profiles[name] = PatternSet([PricePattern(**p) for p in patterns])
+    logger.info(f"Loaded {len(entries)} parser profile(s) from {path}")
+    return profiles
@@ -0,0 +1,149 @@
+"""
+Asyncio processing pipeline for the live scraper
+Stages are linked by bounded queues; each stage runs its own pool of workers
+"""
+
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# A stage handler receives one item and returns the items for the next stage
+StageHandler = Callable[[Any], Awaitable[Optional[Iterable[Any]]]]
+
+
+@dataclass
+class StageMetrics:
+    """Counters for one pipeline stage"""
+    processed: int = 0
+    failed: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+
+    def record(self, latency: float, ok: bool):
+        if ok:
+            self.processed += 1
+        else:
+            self.failed += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    @property
+    def avg_latency(self) -> float:
+        count = self.processed + self.failed
+        return self.total_latency / count if count else 0.0
+
+
+class Stage:
+    """A named handler with a bounded input queue and `workers` consumers"""
+
+    def __init__(self, name: str, handler: StageHandler, workers: int = 1, queue_size: int = 100):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.metrics = StageMetrics()
+        self.next: Optional['Stage'] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"{self.name}-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self):
+        while True:
+            item = await self.queue.get()
+            start = time.perf_counter()
+            outputs = None
+            ok = False
+            try:
+                outputs = await self.handler(item)
+                ok = True
+            except Exception as e:
+                logger.error(f"[{self.name}] error: {e}")
+            finally:
+                self.metrics.record(time.perf_counter() - start, ok)
+
+            try:
+                # Blocks when the next stage is full, which is the backpressure
+                if outputs and self.next:
+                    for output in outputs:
+                        await self.next.queue.put(output)
+            finally:
+                self.queue.task_done()
+
+
+class Pipeline:
+    """Chain of stages; submit() feeds the first one"""
+
+    def __init__(self, stages: List[Stage], metrics_interval: float = 300):
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+        self.stages = stages
+        self.metrics_interval = metrics_interval
+        self._metrics_task: Optional[asyncio.Task] = None
+
+        for stage, following in zip(stages, stages[1:]):
+            stage.next = following
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+        if self.metrics_interval:
+            self._metrics_task = asyncio.create_task(self._log_metrics())
+
+    async def submit(self, item: Any, stage: Optional[str] = None):
+        """Queue an item for the first (or the named) stage, waiting if it is full"""
+        target = self.stages[0]
+        if stage:
+            target = next(s for s in self.stages if s.name == stage)
+        await target.queue.put(item)
+
+    async def stop(self, drain: bool = True):
+        """Stop all workers, optionally after processing everything queued"""
+        if self._metrics_task:
+            self._metrics_task.cancel()
+            self._metrics_task = None
+
+        if drain:
+            for stage in self.stages:
+                await stage.queue.join()
+
+        for stage in self.stages:
+            await stage.stop()
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Queue depth and latency per stage"""
+        return {
+            stage.name: {
+                'queue_depth': stage.queue.qsize(),
+                'queue_size': stage.queue.maxsize,
+                'workers': stage.workers,
+                'processed': stage.metrics.processed,
+                'failed': stage.metrics.failed,
+                'avg_latency_ms': round(stage.metrics.avg_latency * 1000, 2),
+                'max_latency_ms': round(stage.metrics.max_latency * 1000, 2),
+            }
+            for stage in self.stages
+        }
+
+    async def _log_metrics(self):
+        while True:
+            await asyncio.sleep(self.metrics_interval)
+            for name, m in self.metrics().items():
+                logger.info(
+                    f"[{name}] depth {m['queue_depth']}/{m['queue_size']}, "
+                    f"processed {m['processed']}, failed {m['failed']}, "
+                    f"avg {m['avg_latency_ms']}ms, max {m['max_latency_ms']}ms"
+                )
@@ -0,0 +1,178 @@
+"""
+Streaming parser for t.me/s web preview pages
+Fed the response body chunk by chunk and yields each post once the next one
+starts (or the page ends), so only one post is ever buffered. The page is
+split on the post wrapper class and each post is read with a few regexes.
+"""
+
+import re
+import html
+import codecs
+from datetime import datetime
+from typing import AsyncIterator, List, NamedTuple, Optional
+
+import aiohttp
+
+# Bytes read from the response per feed() call
+CHUNK_SIZE = 16 * 1024
+
+BACKGROUND_URL = re.compile(r"background-image:url\('([^']+)'\)")
+
+# Every post starts with its wrapper div; the page is split on this
+POST_WRAP = 'class="tgme_widget_message_wrap'
+HISTORY = re.compile(r'class="[^"]*\btgme_channel_history\b')
+POST_ID = re.compile(r'data-post="[^"/]+/(\d+)"')
+DATETIME = re.compile(r'<time[^>]*\sdatetime="([^"]+)"')
+REPLY = re.compile(r'<a class="tgme_widget_message_reply\b.*?</a>', re.DOTALL)
+TEXT = re.compile(r'<div class="tgme_widget_message_text\b[^>]*>')
+PHOTO = re.compile(r'<a class="tgme_widget_message_photo_wrap\b[^>]*>')
+DIV = re.compile(r'<(/?)div[\s>]')
+LINE_BREAK = re.compile(r'<br\s*/?>')
+TAG = re.compile(r'<[^<>]*>')
+
+
+class PreviewPageError(Exception):
+    """The response was not a usable preview page (error page, redirect, layout change)"""
+
+
+class PreviewMessage(NamedTuple):
+    """A post from the web preview; text is empty for media-only posts"""
+    message_id: int
+    timestamp: datetime
+    text: str
+    photo_urls: List[str]
+
+
+def div_content(markup: str, start: int) -> str:
+    """Content of the div opened just before markup[start:], nested divs included"""
+    depth = 1
+    for match in DIV.finditer(markup, start):
+        depth += -1 if match.group(1) else 1
+        if not depth:
+            return markup[start:match.start()]
+    return markup[start:]
+
+
+class PreviewParser:
+    """Incremental post extractor; completed posts collect in `messages`
+
+    Each post is laid out like:
+    <div class="tgme_widget_message_wrap ..."><div class="tgme_widget_message ..." data-post="BijouterieChalabi/1234">
+      <a class="tgme_widget_message_reply" href="...">...quoted post...</a>
+      <div class="tgme_widget_message_text js-message_text" dir="auto">...</div>
+      <a class="tgme_widget_message_photo_wrap" style="background-image:url('...')">
+      <a class="tgme_widget_message_date" href="..."><time datetime="2024-01-01T12:00:00+00:00">
+    A post runs from its wrapper to the next one, or to the end of the page.
+    `history_seen` and `posts_seen` tell an empty history page apart from a
+    page that isn't a preview at all.
+    """
+
+    def __init__(self):
+        self.messages: List[PreviewMessage] = []
+        self.history_seen = False  # the tgme_channel_history container
+        self.posts_seen = 0        # post wrappers, parsed or not
+        # The open post (from its wrapper), or a tag that may still start one
+        self._buffer = ''
+        self._in_post = False
+        # Where the search for the next wrapper resumes in _buffer
+        self._scan = 0
+
+    def drain(self) -> List[PreviewMessage]:
+        messages, self.messages = self.messages, []
+        return messages
+
+    def feed(self, data: str):
+        buffer = self._buffer + data
+        scan = self._scan
+        while True:
+            found = buffer.find(POST_WRAP, scan)
+            if not self.history_seen and HISTORY.search(buffer, 0, found if found >= 0 else len(buffer)):
+                self.history_seen = True
+            if found < 0:
+                break
+
+            if self._in_post:
+                self._add_post(buffer[:found])
+            self.posts_seen += 1
+            self._in_post = True
+            buffer = buffer[found:]
+            scan = len(POST_WRAP)
+
+        if self._in_post:
+            # A wrapper may be cut at the end of this chunk
+            self._scan = max(scan, len(buffer) - len(POST_WRAP) + 1)
+        else:
+            # Between posts only a tag still arriving can matter
+            tag = buffer.rfind('<')
+            buffer = buffer[tag:] if tag >= 0 and buffer.find('>', tag) < 0 else ''
+            self._scan = 0
+        self._buffer = buffer
+
+    def close(self):
+        """End of input: the open post runs to the end of the page"""
+        if self._in_post:
+            self._add_post(self._buffer)
+        self._buffer = ''
+        self._in_post = False
+        self._scan = 0
+
+    def _add_post(self, post: str):
+        message = self._parse_post(post)
+        if message:
+            self.messages.append(message)
+
+    @staticmethod
+    def _parse_post(post: str) -> Optional[PreviewMessage]:
+        id_match = POST_ID.search(post)
+        date_match = DATETIME.search(post)
+        if not id_match or not date_match:
+            return None
+        try:
+            timestamp = datetime.fromisoformat(html.unescape(date_match.group(1)).replace('Z', '+00:00'))
+        except ValueError:
+            return None
+
+        # The post's own text, not the one quoted in a reply
+        reply = REPLY.search(post)
+        text_match = TEXT.search(post, reply.end() if reply else 0)
+        text = ''
+        if text_match:
+            content = LINE_BREAK.sub('\n', div_content(post, text_match.end()))
+            text = html.unescape(TAG.sub('', content)).strip()
+
+        photos = []
+        for photo in PHOTO.finditer(post):
+            match = BACKGROUND_URL.search(html.unescape(photo.group(0)))
+            if match:
+                photos.append(match.group(1))
+
+        return PreviewMessage(int(id_match.group(1)), timestamp, text, photos)
+
+
+async def stream_messages(response: aiohttp.ClientResponse) -> AsyncIterator[PreviewMessage]:
+    """Yield posts from a preview page response as its body arrives
+
+    Raises PreviewPageError once the body ends if it had no post history
+    container, or had posts of which none could be parsed. A page that ends
+    without yielding anything is therefore a real, empty history page.
+    """
+    decoder = codecs.getincrementaldecoder(response.charset or 'utf-8')(errors='replace')
+    parser = PreviewParser()
+    yielded = 0
+
+    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+        parser.feed(decoder.decode(chunk))
+        for message in parser.drain():
+            yielded += 1
+            yield message
+
+    parser.feed(decoder.decode(b'', final=True))
+    parser.close()
+    for message in parser.drain():
+        yielded += 1
+        yield message
+
+    if not parser.history_seen:
+        raise PreviewPageError(f"{response.url} is not a preview page")
+    if parser.posts_seen and not yielded:
+        raise PreviewPageError(f"{response.url}: {parser.posts_seen} post(s) but none parsed")
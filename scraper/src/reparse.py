@@ -0,0 +1,202 @@
+"""
+Re-parse stored channel messages with the current parser patterns
+Streams channel_messages through a server-side cursor, parses on every core
+and replaces each message's prices in bulk
+
+Usage: python src/reparse.py [--channel NAME] [--since 2024-01-01] [--dry-run]
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import asyncpg
+from dotenv import load_dotenv
+
+from bulk_writer import CREATE_STAGING_SQL, MERGE_GOLD_PRICES_SQL, STAGING_COLUMNS, STAGING_TABLE
+from channels import load_channels
+from db import create_pool
+from patterns import PatternSet, load_profiles
+
+load_dotenv()
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DATABASE_URL = os.getenv('DATABASE_URL')
+
+# Same rule as checkpoints.load_processed: NULL text is a row recorded before
+# text was stored (picked up by the next reconcile), '' a post without text
+MESSAGES_SQL = """
+    SELECT channel, posted_at, text
+    FROM channel_messages
+    WHERE text IS NOT NULL AND text <> ''
+      AND ($1::text[] IS NULL OR channel = ANY($1::text[]))
+      AND ($2::timestamptz IS NULL OR posted_at >= $2::timestamptz)
+    ORDER BY channel, posted_at, message_id
+"""
+
+# Prices are stamped with their post's date, so (source, timestamp) are the
+# rows a message produced. Rows read from its photo (ocr_pool.OCR_RAW_PREFIX)
+# don't come from the text and are kept.
+DELETE_MESSAGE_PRICES_SQL = """
+    DELETE FROM gold_prices g
+    USING unnest($1::text[], $2::timestamptz[]) AS m(source, timestamp)
+    WHERE g.source = m.source AND g.timestamp = m.timestamp
+      AND COALESCE(g.raw_text, '') NOT LIKE '[ocr] %'
+"""
+
+# Deleted rows may have been a source's latest, so rebuild it from gold_prices
+CLEAR_LATEST_PRICES_SQL = "DELETE FROM latest_prices WHERE source = ANY($1::text[])"
+
+REBUILD_LATEST_PRICES_SQL = """
+    INSERT INTO latest_prices (karat, source, timestamp, buy_price, sell_price)
+    SELECT DISTINCT ON (karat, source)
+        karat, source, timestamp, buy_price, sell_price
+    FROM gold_prices
+    WHERE source = ANY($1::text[])
+      AND buy_price IS NOT NULL AND sell_price IS NOT NULL
+    ORDER BY karat, source, timestamp DESC
+"""
+
+# (channel, posted_at, text) in, staging rows without seq out
+Message = Tuple[str, datetime, str]
+PriceRow = Tuple[datetime, int, float, Optional[float], str, str]
+
+# Set in each worker process by init_worker
+_profiles: Dict[str, PatternSet] = {}
+_channel_profiles: Dict[str, str] = {}
+
+
+def init_worker(channel_profiles: Dict[str, str]):
+    """Compile the pattern sets once per worker process"""
+    global _profiles, _channel_profiles
+    _profiles = load_profiles()
+    _channel_profiles = channel_profiles
+
+
+def parse_chunk(chunk: List[Message]) -> List[PriceRow]:
+    """Parse a chunk of messages (runs in a worker process)"""
+    rows = []
+    for channel, posted_at, text in chunk:
+        patterns = _profiles.get(_channel_profiles.get(channel.lower(), 'default'), _profiles['default'])
+        for match in patterns.find(text):
+            rows.append((posted_at, match.karat, match.buy_price, match.sell_price, channel, match.raw_text))
+    return rows
+
+
+async def read_chunks(conn: asyncpg.Connection, channels: Optional[List[str]],
+                      since: Optional[datetime], chunk_size: int):
+    """Yield lists of messages, never splitting posts that share a timestamp"""
+    chunk: List[Message] = []
+    async with conn.transaction():
+        async for record in conn.cursor(MESSAGES_SQL, channels, since, prefetch=chunk_size):
+            message = (record['channel'], record['posted_at'], record['text'])
+            if len(chunk) >= chunk_size and chunk[-1][:2] != message[:2]:
+                yield chunk
+                chunk = []
+            chunk.append(message)
+    if chunk:
+        yield chunk
+
+
+async def replace_prices(conn: asyncpg.Connection, chunk: List[Message], rows: List[PriceRow]):
+    """Swap the prices of every message in the chunk for the re-parsed rows"""
+    async with conn.transaction():
+        await conn.execute(
+            DELETE_MESSAGE_PRICES_SQL,
+            [channel for channel, _, _ in chunk],
+            [posted_at for _, posted_at, _ in chunk]
+        )
+        if rows:
+            await conn.copy_records_to_table(
+                STAGING_TABLE,
+                records=[(seq,) + row for seq, row in enumerate(rows)],
+                columns=STAGING_COLUMNS
+            )
+            await conn.execute(MERGE_GOLD_PRICES_SQL)
+
+
+async def reparse(channels: Optional[List[str]] = None, since: Optional[datetime] = None,
+                  workers: Optional[int] = None, chunk_size: int = 2000, dry_run: bool = False):
+    workers = workers or os.cpu_count() or 1
+    channel_profiles = {c.username.lower(): c.profile for c in load_channels()}
+
+    # One connection streams messages out, the other writes prices back
+    pool = await create_pool(min_size=2, max_size=2, application_name='gold-scraper-reparse')
+    reader = await pool.acquire()
+    writer = await pool.acquire()
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    messages = prices = 0
+    sources = set()
+
+    async def write(chunk: List[Message], rows: List[PriceRow]):
+        nonlocal messages, prices
+        if not dry_run:
+            await replace_prices(writer, chunk, rows)
+        messages += len(chunk)
+        prices += len(rows)
+        sources.update(channel for channel, _, _ in chunk)
+
+    try:
+        await writer.execute(CREATE_STAGING_SQL)
+        with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(channel_profiles,)) as executor:
+            # Enough chunks in flight to keep every worker busy while one is written
+            pending = deque()
+            async for chunk in read_chunks(reader, channels, since, chunk_size):
+                pending.append((chunk, loop.run_in_executor(executor, parse_chunk, chunk)))
+                if len(pending) >= workers * 2:
+                    done, future = pending.popleft()
+                    await write(done, await future)
+
+            while pending:
+                done, future = pending.popleft()
+                await write(done, await future)
+
+        if sources and not dry_run:
+            async with writer.transaction():
+                await writer.execute(CLEAR_LATEST_PRICES_SQL, sorted(sources))
+                await writer.execute(REBUILD_LATEST_PRICES_SQL, sorted(sources))
+    finally:
+        await pool.release(reader)
+        await pool.release(writer)
+        await pool.close()
+
+    elapsed = time.perf_counter() - start
+    rate = messages / elapsed if elapsed else 0
+    logger.info(
+        f"{'Parsed' if dry_run else 'Re-parsed'} {messages} message(s) into {prices} price(s) "
+        f"in {elapsed:.1f}s ({rate:,.0f} msg/s, {workers} worker(s))"
+    )
+
+
+def main():
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Re-parse stored channel messages")
+    arg_parser.add_argument('--channel', action='append', default=None,
+                            help="Only this channel (repeatable)")
+    arg_parser.add_argument('--since', type=datetime.fromisoformat, default=None,
+                            help="Only messages posted on or after this date")
+    arg_parser.add_argument('--workers', type=int, default=None,
+                            help="Parser processes (default: all cores)")
+    arg_parser.add_argument('--chunk-size', type=int, default=2000,
+                            help="Messages per worker task")
+    arg_parser.add_argument('--dry-run', action='store_true',
+                            help="Parse and report counts without writing")
+    args = arg_parser.parse_args()
+
+    if not DATABASE_URL:
+        logger.error("Missing DATABASE_URL")
+        return
+
+    asyncio.run(reparse(args.channel, args.since, args.workers, args.chunk_size, args.dry_run))
+
+
+if __name__ == '__main__':
+    main()
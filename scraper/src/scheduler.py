@@ -0,0 +1,206 @@
+"""
+Concurrent channel scheduler with per-channel and per-host rate limits
+Backfills or polls many channels at once while honouring Telegram FloodWait
+"""
+
+import time
+import heapq
+import asyncio
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from telethon.errors import FloodWaitError
+
+from channels import ChannelConfig
+
+logger = logging.getLogger(__name__)
+
+# Awaited by a task before every remote request (API call or page fetch)
+Throttle = Callable[[], Awaitable[None]]
+
+# Task run for one channel: (channel, newest post seen so far, throttle) -> newest post now
+ChannelTask = Callable[[ChannelConfig, Optional[datetime], Throttle], Awaitable[Optional[datetime]]]
+
+
+class RateLimited(Exception):
+    """Raised by a task when the remote asks us to back off (e.g. HTTP 429)"""
+
+    def __init__(self, seconds: float):
+        super().__init__(f"Rate limited for {seconds}s")
+        self.seconds = seconds
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens: float = 1):
+        """Wait until `tokens` are available and take them"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if self.blocked_until > now:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Block all acquirers for `seconds` (FloodWait / Retry-After)"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+
+class ChannelScheduler:
+    """Runs a task per channel with bounded concurrency
+
+    run_once() visits every channel (backfill); run_forever() keeps polling,
+    revisiting channels that posted recently more often than quiet ones.
+    Tasks call the throttle they are given before each request, which takes
+    a token from the channel's bucket and the host bucket. A rate-limited
+    task is re-run after the wait, so it should resume from its checkpoint.
+    """
+
+    def __init__(self, channels: List[ChannelConfig], task: ChannelTask,
+                 host_bucket: Optional[TokenBucket] = None, concurrency: int = 4,
+                 min_interval: float = 60, max_interval: float = 3600, max_retries: int = 3):
+        self.channels = channels
+        self.task = task
+        self.host_bucket = host_bucket
+        self.concurrency = concurrency
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_retries = max_retries
+        self.buckets: Dict[str, TokenBucket] = {
+            c.username: TokenBucket(c.rate, c.burst) for c in channels
+        }
+        self.last_post: Dict[str, Optional[datetime]] = {c.username: None for c in channels}
+
+    def seed(self, last_posts: Dict[str, datetime]):
+        """Start from stored post dates (e.g. load_last_posts)
+
+        A fresh process knows nothing about the channels, so without this the
+        first run_once and polls treat them all as silent.
+        """
+        for username, posted in last_posts.items():
+            if username in self.last_post and (self.last_post[username] is None or posted > self.last_post[username]):
+                self.last_post[username] = posted
+
+    def poll_interval(self, channel: ChannelConfig) -> float:
+        """Seconds until the next poll: a tenth of the channel's silence, clamped"""
+        last = self.last_post.get(channel.username)
+        if last is None:
+            return self.min_interval
+        age = (datetime.utcnow() - last).total_seconds()
+        return max(self.min_interval, min(self.max_interval, age / 10))
+
+    def throttle(self, channel: ChannelConfig) -> Throttle:
+        """Per-request rate limit for one channel"""
+        bucket = self.buckets[channel.username]
+
+        async def acquire():
+            await bucket.acquire()
+            if self.host_bucket:
+                await self.host_bucket.acquire()
+        return acquire
+
+    async def _run(self, channel: ChannelConfig) -> Optional[datetime]:
+        throttle = self.throttle(channel)
+        for _ in range(self.max_retries + 1):
+            try:
+                newest = await self.task(channel, self.last_post[channel.username], throttle)
+            except (FloodWaitError, RateLimited) as e:
+                # FloodWait applies to the whole account, so hold the host too
+                logger.warning(f"[{channel.username}] rate limited, waiting {e.seconds}s")
+                self.buckets[channel.username].pause(e.seconds)
+                if self.host_bucket:
+                    self.host_bucket.pause(e.seconds)
+                continue
+
+            if newest and (self.last_post[channel.username] is None or newest > self.last_post[channel.username]):
+                self.last_post[channel.username] = newest
+            return newest
+
+        logger.error(f"[{channel.username}] giving up after {self.max_retries} retries")
+        return None
+
+    async def run_once(self) -> Dict[str, Optional[datetime]]:
+        """Run the task once for every channel, most recently active first"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        ordered = sorted(
+            self.channels,
+            key=lambda c: self.last_post[c.username] or datetime.min,
+            reverse=True
+        )
+
+        async def guarded(channel: ChannelConfig):
+            async with semaphore:
+                try:
+                    return await self._run(channel)
+                except Exception as e:
+                    logger.error(f"[{channel.username}] failed: {e}")
+                    return None
+
+        results = await asyncio.gather(*(guarded(c) for c in ordered))
+        return {c.username: r for c, r in zip(ordered, results)}
+
+    async def run_forever(self):
+        """Poll channels indefinitely, each on its own recency-based interval"""
+        # (due time, tie-breaker, channel)
+        heap = [(time.monotonic(), i, c) for i, c in enumerate(self.channels)]
+        heapq.heapify(heap)
+        counter = len(heap)
+        wakeup = asyncio.Event()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        running = set()
+
+        async def poll(channel: ChannelConfig):
+            nonlocal counter
+            try:
+                await self._run(channel)
+            except Exception as e:
+                logger.error(f"[{channel.username}] poll failed: {e}")
+            finally:
+                semaphore.release()
+                counter += 1
+                heapq.heappush(heap, (time.monotonic() + self.poll_interval(channel), counter, channel))
+                wakeup.set()
+
+        while True:
+            if not heap:
+                await wakeup.wait()
+                wakeup.clear()
+                continue
+
+            due, _, channel = heap[0]
+            delay = due - time.monotonic()
+            if delay > 0:
+                wakeup.clear()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(heap)
+            await semaphore.acquire()
+            task = asyncio.create_task(poll(channel))
+            running.add(task)
+            task.add_done_callback(running.discard)
@@ -4,18 +4,24 @@ Scrapes gold prices from Algerian Telegram channels
 """
 
 import os
-import re
 import asyncio
 import logging
 from datetime import datetime
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 from dataclasses import dataclass
 
 from telethon import TelegramClient, events
 from telethon.tl.types import Message, MessageMediaPhoto
-import asyncpg
 from dotenv import load_dotenv
 
+from pipeline import Pipeline, Stage
+from channels import load_channels
+from checkpoints import mark_processed
+from db import create_pool, save_prices
+from ocr import GoldImageOCR
+from ocr_pool import OCR_RAW_PREFIX, OCRPool
+from patterns import DEFAULT_PATTERNS, PatternSet, load_profiles
+
 # Load environment variables
 load_dotenv()
 
@@ -30,13 +36,21 @@ logger = logging.getLogger(__name__)
 API_ID = os.getenv('TELEGRAM_API_ID')
 API_HASH = os.getenv('TELEGRAM_API_HASH')
 PHONE = os.getenv('TELEGRAM_PHONE')
-DATABASE_URL = os.getenv('DATABASE_URL')
 
-# Channels to monitor (add channel usernames here)
-# We monitor BijouterieChalabi specifically as requested
-CHANNELS = [
-    'BijouterieChalabi',
-]
+# Channels to monitor: BijouterieChalabi by default, or the list in CHANNELS_FILE
+CHANNEL_CONFIGS = load_channels()
+CHANNELS = [c.username for c in CHANNEL_CONFIGS]
+
+# Live pipeline tuning: receive -> parse -> persist
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '100'))
+PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', '1'))
+PERSIST_WORKERS = int(os.getenv('PERSIST_WORKERS', '4'))
+PIPELINE_METRICS_INTERVAL = float(os.getenv('PIPELINE_METRICS_INTERVAL', '300'))
+
+# Photo OCR runs in its own processes; OCR_WORKERS=0 turns it off
+OCR_WORKERS = int(os.getenv('OCR_WORKERS', '1'))
+OCR_QUEUE_SIZE = int(os.getenv('OCR_QUEUE_SIZE', '16'))
+OCR_TIMEOUT = float(os.getenv('OCR_TIMEOUT', '60'))
 
 @dataclass
 class GoldPrice:
@@ -59,84 +73,49 @@ class GoldPrice:
         }
 
 
+@dataclass
+class IncomingMessage:
+    """A channel post waiting to be parsed"""
+    text: str
+    source: str
+    date: datetime
+    message_id: int
+
+
 class GoldPriceParser:
-    """Parses gold prices from Telegram messages"""
-    
-    # Regex patterns for price extraction
-    PATTERNS = {
-        # Pattern: "18k: 29600 - 29800 DA" or similar
-        'range': re.compile(
-            r'(\d{2})[kK]?\s*[:=]?\s*(\d{1,3}[\s,.]?\d{3})\s*[-–]\s*(\d{1,3}[\s,.]?\d{3})\s*(?:DA|دج)?',
-            re.IGNORECASE
-        ),
-        # Pattern: "سعر الـ 18: 29700 دج"
-        'single': re.compile(
-            r'(?:سعر|prix)?\s*(?:الـ\s*)?(\d{2})\s*[:=]?\s*(\d{1,3}[\s,.]?\d{3})\s*(?:DA|دج)?',
-            re.IGNORECASE | re.UNICODE
-        ),
-        # Pattern: "السبيكة 750" (Sabika/Lingot 18k)
-        'sabika': re.compile(
-            r'(?:السبيكة|سبيكة|sabika|lingot)\s*(?:750|18[kK])?\s*[:=]?\s*(\d{1,3}[\s,.]?\d{3})\s*(?:DA|دج)?',
-            re.IGNORECASE | re.UNICODE
-        ),
-    }
-    
-    @classmethod
-    def parse_message(cls, message: str, source: str) -> List[GoldPrice]:
+    """Parses gold prices from Telegram messages with one profile's pattern set"""
+
+    def __init__(self, patterns: Optional[PatternSet] = None):
+        self.patterns = patterns or PatternSet(DEFAULT_PATTERNS)
+
+    def parse_message(self, message: str, source: str) -> List[GoldPrice]:
         """Extract gold prices from a message"""
-        prices = []
         now = datetime.utcnow()
-        
-        # Try range pattern
-        for match in cls.PATTERNS['range'].finditer(message):
-            karat = int(match.group(1))
-            buy = cls._parse_number(match.group(2))
-            sell = cls._parse_number(match.group(3))
-            
-            if karat in [18, 21, 22, 24]:
-                prices.append(GoldPrice(
-                    timestamp=now,
-                    karat=karat,
-                    buy_price=buy,
-                    sell_price=sell,
-                    source=source,
-                    raw_text=match.group(0)
-                ))
-        
-        # Try single price pattern
-        for match in cls.PATTERNS['single'].finditer(message):
-            karat = int(match.group(1))
-            price = cls._parse_number(match.group(2))
-            
-            if karat in [18, 21, 22, 24]:
-                prices.append(GoldPrice(
-                    timestamp=now,
-                    karat=karat,
-                    buy_price=price,
-                    sell_price=None,
-                    source=source,
-                    raw_text=match.group(0)
-                ))
-        
-        # Try sabika pattern (always 18k)
-        for match in cls.PATTERNS['sabika'].finditer(message):
-            price = cls._parse_number(match.group(1))
-            prices.append(GoldPrice(
+        return [
+            GoldPrice(
                 timestamp=now,
-                karat=18,
-                buy_price=price,
-                sell_price=None,
+                karat=match.karat,
+                buy_price=match.buy_price,
+                sell_price=match.sell_price,
                 source=source,
-                raw_text=match.group(0)
-            ))
-        
-        return prices
-    
-    @staticmethod
-    def _parse_number(text: str) -> float:
-        """Parse a number string, handling spaces and commas"""
-        cleaned = re.sub(r'[\s,.]', '', text)
-        return float(cleaned)
+                raw_text=match.raw_text
+            )
+            for match in self.patterns.find(message)
+        ]
+
+
+# Parser used for each channel profile (see channels.ChannelConfig.profile),
+# extended with the pattern sets in PARSER_PROFILES_FILE
+PARSER_PROFILES = {
+    name: GoldPriceParser(patterns) for name, patterns in load_profiles().items()
+}
+
+
+def get_parser(profile: str = 'default') -> GoldPriceParser:
+    """Return the parser for a channel profile, falling back to the default"""
+    if profile not in PARSER_PROFILES:
+        logger.warning(f"Unknown parser profile '{profile}', using default")
+    return PARSER_PROFILES.get(profile, PARSER_PROFILES['default'])
 
 
 class GoldScraper:
@@ -150,8 +129,14 @@ class GoldScraper:
             API_ID,
             API_HASH
         )
-        self.parser = GoldPriceParser()
+        self.channel_profiles = {c.username.lower(): c.profile for c in CHANNEL_CONFIGS}
         self.db_pool = None
+        self.pipeline = Pipeline([
+            Stage('parse', self.parse_stage, workers=PARSE_WORKERS, queue_size=PIPELINE_QUEUE_SIZE),
+            Stage('persist', self.persist_stage, workers=PERSIST_WORKERS, queue_size=PIPELINE_QUEUE_SIZE),
+        ], metrics_interval=PIPELINE_METRICS_INTERVAL)
+        self.ocr = OCRPool(OCR_WORKERS, OCR_QUEUE_SIZE, OCR_TIMEOUT) if OCR_WORKERS > 0 else None
+        self._ocr_tasks = set()
     
     async def start(self):
         """Start the Telegram client"""
@@ -165,47 +150,118 @@ class GoldScraper:
             logger.info("Starting Telegram client with phone number")
             await self.client.start(phone=PHONE)
             
-        self.db_pool = await asyncpg.create_pool(DATABASE_URL)
+        self.db_pool = await create_pool(application_name='gold-scraper-live')
+        if self.ocr:
+            self.ocr.start()
+        self.pipeline.start()
         logger.info("Telegram client & DB pool started successfully")
     
     async def stop(self):
         """Stop the Telegram client"""
         await self.client.disconnect()
+        if self.ocr:
+            await self.ocr.stop()
+            await asyncio.gather(*self._ocr_tasks, return_exceptions=True)
+        # Let queued messages reach the database before the pool goes away
+        await self.pipeline.stop(drain=True)
         if self.db_pool:
             await self.db_pool.close()
         logger.info("Telegram client stopped")
     
-    async def save_price(self, price: GoldPrice):
-        """Save price to database"""
+    async def save_message(self, message: IncomingMessage, prices: List[GoldPrice]):
+        """Save a post's prices, and its text for later re-parsing
+
+        Database errors propagate so the persist stage counts them as failed.
+        """
         if not self.db_pool:
             return
             
+        async with self.db_pool.acquire() as conn, conn.transaction():
+            await save_prices(conn, prices)
+            await mark_processed(conn, message.source, [(message.message_id, message.date, message.text)])
+        for price in prices:
+            logger.info(f"Saved price: {price.karat}k - {price.buy_price} DZD")
+
+    async def parse_stage(self, message: IncomingMessage) -> List[Tuple[IncomingMessage, List[GoldPrice]]]:
+        """Pipeline stage: extract prices from a queued message"""
+        parser = get_parser(self.channel_profiles.get((message.source or '').lower(), 'default'))
+        prices = parser.parse_message(message.text, message.source)
+        
+        if prices:
+            logger.info(f"Found {len(prices)} prices")
+        else:
+            logger.info("No prices found in message")
+        
+        # Stamp with the post date so time spent queued doesn't skew history
+        for price in prices:
+            price.timestamp = message.date
+        return [(message, prices)]
+    
+    async def persist_stage(self, item: Tuple[IncomingMessage, List[GoldPrice]]):
+        """Pipeline stage: write one message and its prices"""
+        message, prices = item
         try:
-            async with self.db_pool.acquire() as conn:
-                await conn.execute("""
-                    INSERT INTO gold_prices (timestamp, karat, buy_price, sell_price, source, raw_text, gold_type)
-                    VALUES ($1, $2, $3, $4, $5, $6, 'new')
-                    ON CONFLICT (timestamp, karat, source) DO NOTHING
-                """, price.timestamp, price.karat, price.buy_price, price.sell_price, price.source, price.raw_text)
-                logger.info(f"Saved price: {price.karat}k - {price.buy_price} DZD")
+            await self.save_message(message, prices)
         except Exception as e:
-            logger.error(f"Error saving price: {e}")
+            raise RuntimeError(f"saving message {message.message_id} from {message.source} failed: {e}") from e
+
+    def queue_photo(self, message: Message, source: str):
+        """Hand a photo to the OCR pool; its prices are persisted when ready"""
+        future = self.ocr.submit(lambda: message.download_media(file=bytes), channel=source)
+        if future is None:
+            logger.warning(f"OCR queue full, skipping photo from {source}")
+            return
+
+        incoming = IncomingMessage(
+            text=message.text or '',
+            source=source,
+            date=message.date,
+            message_id=message.id
+        )
+        future.add_done_callback(lambda f: self._on_ocr_done(f, incoming))
+
+    def _on_ocr_done(self, future: asyncio.Future, message: IncomingMessage):
+        if future.cancelled():
+            return
+        if future.exception():
+            error = future.exception()
+            logger.error(f"OCR failed for {message.source}/{message.message_id}: {type(error).__name__} {error}")
+            return
+
+        prices = [
+            GoldPrice(
+                timestamp=message.date,
+                karat=p.karat,
+                buy_price=p.offer_price,
+                sell_price=p.demand_price,
+                source=message.source,
+                raw_text=OCR_RAW_PREFIX + p.raw_text
+            )
+            for p in GoldImageOCR.merge_cells(future.result())
+            if p.offer_price
+        ]
+        logger.info(f"OCR found {len(prices)} prices in {message.source}/{message.message_id}")
+        if prices:
+            task = asyncio.create_task(self.pipeline.submit((message, prices), stage='persist'))
+            self._ocr_tasks.add(task)
+            task.add_done_callback(self._ocr_tasks.discard)
 
     def setup_handlers(self):
         """Setup event handlers for new messages"""
         @self.client.on(events.NewMessage(chats=CHANNELS))
         async def handler(event):
-            if event.message.text:
+            message = event.message
+            if message.text:
                 logger.info(f"New message from {event.chat.username}")
-                prices = self.parser.parse_message(event.message.text, event.chat.username)
-                
-                if prices:
-                    logger.info(f"Found {len(prices)} prices")
-                    for price in prices:
-                        await self.save_price(price)
-                else:
-                    logger.info("No prices found in message")
-
+                # Hand off and return; parsing and writes happen in the pipeline
+                await self.pipeline.submit(IncomingMessage(
+                    text=message.text,
+                    source=event.chat.username,
+                    date=message.date,
+                    message_id=message.id
+                ))
+            if self.ocr and isinstance(message.media, MessageMediaPhoto):
+                self.queue_photo(message, event.chat.username)
 
 async def main():
     """Main entry point"""
@@ -1,11 +1,17 @@
 import asyncio
 import os
-import re
 import logging
 from datetime import datetime
+from typing import AsyncIterator, NamedTuple, Optional
 import aiohttp
 import asyncpg
-from scraper import GoldPriceParser, GoldPrice
+from scraper import get_parser
+from bulk_writer import BulkPriceWriter, WriteUnit
+from channels import ChannelConfig, load_channels
+from db import create_pool
+from checkpoints import Checkpoint, load_checkpoint, load_last_posts, mark_processed, save_checkpoint
+from preview_parser import PreviewMessage, stream_messages
+from scheduler import ChannelScheduler, RateLimited, Throttle, TokenBucket
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -13,111 +19,224 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 DATABASE_URL = os.getenv('DATABASE_URL')
-CHANNEL = 'BijouterieChalabi'
-URL = f'https://t.me/s/{CHANNEL}'
+URL = 'https://t.me/s/{channel}'
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+# Channels fetched at once, and the request budget for the t.me host
+CHANNEL_CONCURRENCY = int(os.getenv('CHANNEL_CONCURRENCY', '4'))
+WEB_RATE = float(os.getenv('WEB_RATE', '1'))
+# The preview shows ~20 posts per page; pages are requested by ?before=<msg_id>
+PAGE_SIZE = 20
+CONCURRENT_PAGES = int(os.getenv('WEB_CONCURRENT_PAGES', '4'))
+MAX_PAGES_PER_RUN = int(os.getenv('WEB_MAX_PAGES', '200'))
+CHECKPOINT_NAME = 'web'
 
-async def get_db_connection():
-    return await asyncpg.connect(DATABASE_URL)
 
-async def save_price(conn, price: GoldPrice):
-    try:
-        await conn.execute("""
-            INSERT INTO gold_prices (timestamp, karat, buy_price, sell_price, source, raw_text, gold_type)
-            VALUES ($1, $2, $3, $4, $5, $6, 'new')
-            ON CONFLICT (timestamp, karat, source) DO UPDATE 
-            SET buy_price = EXCLUDED.buy_price,
-                sell_price = EXCLUDED.sell_price
-        """, price.timestamp, price.karat, price.buy_price, price.sell_price, price.source, price.raw_text)
-        logger.info(f"Saved: {price.karat}k - {price.buy_price} at {price.timestamp}")
-    except Exception as e:
-        logger.error(f"Error saving: {e}")
-
-async def fetch_history():
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    async with aiohttp.ClientSession(headers=headers) as session:
-        async with session.get(URL) as response:
-            html = await response.text()
-            logger.info(f"Total HTML length: {len(html)} bytes")
-            
-            # Dump a chunk around message wrap to debug structure
-            msg_start = html.find('tgme_widget_message')
-            if msg_start != -1:
-                logger.info(f"HTML Message Chunk: {html[msg_start:msg_start+1000]}")
-            else:
-                logger.warning("No 'tgme_widget_message' found in HTML")
-                # Check if we are redirected or blocked
-                logger.info(f"Full HTML: {html[:2000]}")
-            return html
-
-def parse_html(html):
-    # Extract message divs
-    # <div class="tgme_widget_message_text js-message_text" dir="auto">...</div>
-    # <a class="tgme_widget_message_date" href="https://t.me/BijouterieChalabi/1234"><time datetime="2024-01-01T12:00:00+00:00">...</time></a>
-    
-    # We need to associate text with date. They are usually in the same message container div.
-    # Using regex to find blocks might be fragile but let's try to match the structure.
-    
-    # Simple approach: Split by "tgme_widget_message_wrap"
-    messages = html.split('class="tgme_widget_message_wrap"')
-    parsed_data = []
-    
-    parser = GoldPriceParser()
-    
-    for msg in messages[1:]:  # Skip header
-        # Extract text
-        text_match = re.search(r'class="tgme_widget_message_text.*?>(.*?)</div>', msg, re.DOTALL)
-        if not text_match:
-            # Debug: Check why text extraction failed
-            if "tgme_widget_message_text" in msg:
-                logger.warning(f"Found message div but regex failed. Chunk: {msg[:100]}...")
-            continue
-        
-        raw_html_text = text_match.group(1)
-        # Clean HTML tags (br, b, etc)
-        clean_text = re.sub(r'<br\s*/>', '\n', raw_html_text)
-        clean_text = re.sub(r'<[^>]+>', '', clean_text)
-        
-        logger.info(f"Processing message: {clean_text[:50]}...")
-        
-        # Extract date
-        date_match = re.search(r'datetime="([^"]+)"', msg)
-        if not date_match:
-            continue
-            
-        timestamp_str = date_match.group(1)
-        try:
-            timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-        except:
-            continue
-            
-        # Parse prices
-        prices = parser.parse_message(clean_text, CHANNEL)
-        for p in prices:
-            p.timestamp = timestamp
-            parsed_data.append(p)
-            
-    return parsed_data
+async def get_db_pool():
+    # The bulk writer holds one connection; channels share the rest for checkpoints
+    return await create_pool(min_size=2, application_name='gold-scraper-web')
+
+async def fetch_messages(session: aiohttp.ClientSession, throttle: Throttle, channel: ChannelConfig,
+                         before: Optional[int] = None) -> AsyncIterator[PreviewMessage]:
+    """Yield the posts on one preview page while the body streams in
+
+    A page that yields nothing is a valid preview with no posts. HTTP errors
+    and anything that isn't a preview page raise instead, so a failed fetch
+    is never taken for the start of the channel.
+    """
+    await throttle()
+    params = {'before': str(before)} if before else None
+    async with session.get(URL.format(channel=channel.username), params=params) as response:
+        if response.status == 429:
+            raise RateLimited(float(response.headers.get('Retry-After', 30)))
+        response.raise_for_status()
+        async for message in stream_messages(response):
+            yield message
+
+
+class PageSpan(NamedTuple):
+    """Lowest and highest post id on a fetched page"""
+    lowest: int
+    highest: int
+
+
+class ChannelBackfill:
+    """Paginated, checkpointed backfill of one channel's web preview
+
+    Pages are addressed by ?before=<id>. Stepping cursors by PAGE_SIZE ids lets
+    a window of pages be fetched concurrently: a page always spans at least
+    PAGE_SIZE ids, so neighbouring pages overlap rather than leave gaps.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, pool: asyncpg.Pool, writer: BulkPriceWriter,
+                 throttle: Throttle, channel: ChannelConfig):
+        self.session = session
+        self.pool = pool
+        self.writer = writer
+        self.throttle = throttle
+        self.channel = channel
+        self.parser = get_parser(channel.profile)
+        self.seen = set()
+        # Posts whose prices are queued, recorded with their text on commit
+        self.pending = []
+        self.unit = WriteUnit()
+        self.pages = 0
+        self.newest: Optional[datetime] = None
+
+    async def run(self) -> Optional[datetime]:
+        """Fetch new posts, then continue the deep backfill; returns newest post date"""
+        async with self.pool.acquire() as conn:
+            checkpoint = await load_checkpoint(conn, self.channel.username, CHECKPOINT_NAME)
+
+        # Fresh channel: the first page starts the deep backfill. Otherwise
+        # only posts above the previous high-water mark are new.
+        first = await self._page(stop_id=checkpoint.last_message_id or 0)
+        if first is None:
+            return None
+        top = first.highest
+
+        if checkpoint.last_message_id is None:
+            if not await self._commit(checkpoint, last_message_id=top, oldest_message_id=first.lowest):
+                return self.newest
+        elif top > checkpoint.last_message_id:
+            # Posts since the last run, down to the previous high-water mark.
+            # The mark only moves once the whole gap is covered.
+            covered = await self._walk(first.lowest, stop_id=checkpoint.last_message_id)
+            if not covered or not await self._commit(checkpoint, last_message_id=top):
+                return self.newest
+
+        if not checkpoint.backfill_complete:
+            await self._deep_backfill(checkpoint)
+
+        return self.newest
+
+    async def _page(self, stop_id: int, before: Optional[int] = None) -> Optional[PageSpan]:
+        """Fetch one page, queueing its unseen posts in (stop_id, before) as they arrive
+
+        Returns the ids the page spanned, or None if it had no posts.
+        """
+        self.pages += 1
+        lowest = highest = None
+        async for message in fetch_messages(self.session, self.throttle, self.channel, before):
+            message_id = message.message_id
+            if lowest is None or message_id < lowest:
+                lowest = message_id
+            if highest is None or message_id > highest:
+                highest = message_id
+            if message_id > stop_id and (before is None or message_id < before):
+                await self._queue(message)
+
+        logger.debug(f"[{self.channel.username}] page before={before}: {lowest}..{highest}")
+        return PageSpan(lowest, highest) if lowest is not None else None
+
+    async def _queue(self, message: PreviewMessage):
+        """Parse a message and hand its prices to the writer, once per run"""
+        if message.message_id in self.seen:
+            return
+
+        self.seen.add(message.message_id)
+        self.pending.append((message.message_id, message.timestamp, message.text))
+        message_date = message.timestamp.replace(tzinfo=None)
+        if self.newest is None or message_date > self.newest:
+            self.newest = message_date
+
+        for price in self.parser.parse_message(message.text, self.channel.username):
+            price.timestamp = message.timestamp
+            await self.writer.add(price, self.unit)
+
+    async def _walk(self, before: int, stop_id: int, on_window=None) -> bool:
+        """Process posts with stop_id < id < before, a window of pages at a time
+
+        Returns False if the page budget ran out (or on_window refused) first.
+        """
+        while before - 1 > stop_id:
+            if self.pages >= MAX_PAGES_PER_RUN:
+                logger.info(f"[{self.channel.username}] page budget reached, resuming next run")
+                return False
+
+            cursors = [
+                before - i * PAGE_SIZE for i in range(CONCURRENT_PAGES)
+                if before - i * PAGE_SIZE - 1 > stop_id
+            ]
+            spans = await asyncio.gather(*(self._page(stop_id, before=cursor) for cursor in cursors))
+
+            # Pages overlap, so everything from `before` down to the lowest id
+            # returned is now covered. fetch_messages raises on anything but a
+            # real preview page, so an empty page means no older posts exist.
+            reached_start = None in spans
+            before = min([span.lowest for span in spans if span] + [before])
+
+            if on_window and not await on_window(before, reached_start):
+                return False
+            if reached_start:
+                return True
+        return True
+
+    async def _deep_backfill(self, checkpoint: Checkpoint):
+        async def on_window(before: int, reached_start: bool) -> bool:
+            return await self._commit(checkpoint, oldest_message_id=before, backfill_complete=reached_start)
+
+        await self._walk(checkpoint.oldest_message_id, stop_id=0, on_window=on_window)
+
+    async def _commit(self, checkpoint: Checkpoint, **changes) -> bool:
+        """Flush queued prices, then advance the checkpoint if they were all written"""
+        await self.writer.flush()
+        if self.unit.failed:
+            logger.error(f"[{self.channel.username}] write failed, checkpoint not advanced")
+            return False
+
+        for key, value in changes.items():
+            setattr(checkpoint, key, value)
+        async with self.pool.acquire() as conn, conn.transaction():
+            await mark_processed(conn, self.channel.username, self.pending)
+            await save_checkpoint(conn, checkpoint)
+        self.pending = []
+        self.unit = WriteUnit()
+        return True
+
+
+async def scrape_channel(session: aiohttp.ClientSession, pool: asyncpg.Pool, writer: BulkPriceWriter,
+                         channel: ChannelConfig, since: Optional[datetime],
+                         throttle: Throttle) -> Optional[datetime]:
+    """Incrementally backfill one channel, returns the newest post date seen"""
+    backfill = ChannelBackfill(session, pool, writer, throttle, channel)
+    newest = await backfill.run()
+    logger.info(f"[{channel.username}] {backfill.pages} page(s), {len(backfill.seen)} new post(s)")
+    return newest
 
 async def main():
     if not DATABASE_URL:
         logger.error("Missing DATABASE_URL")
         return
-        
-    conn = await get_db_connection()
+
+    pool = await get_db_pool()
+    conn = await pool.acquire()
+    writer = BulkPriceWriter(conn)
+    await writer.start()
     try:
-        logger.info("Fetching history from web preview...")
-        html = await fetch_history()
-        prices = parse_html(html)
-        
-        logger.info(f"Found {len(prices)} prices. Saving...")
-        for p in prices:
-            await save_price(conn, p)
-            
-        logger.info("Done.")
+        channels = load_channels()
+        logger.info(f"Fetching history from web preview for {len(channels)} channel(s)...")
+        # One pooled session for every page of every channel
+        connector = aiohttp.TCPConnector(limit=CONCURRENT_PAGES * CHANNEL_CONCURRENCY)
+        async with aiohttp.ClientSession(headers=HEADERS, connector=connector) as session:
+            scheduler = ChannelScheduler(
+                channels,
+                lambda channel, since, throttle: scrape_channel(session, pool, writer, channel, since, throttle),
+                # Shared t.me budget; a 429 on any channel pauses every channel
+                host_bucket=TokenBucket(WEB_RATE, WEB_RATE * 3),
+                concurrency=CHANNEL_CONCURRENCY
+            )
+            async with pool.acquire() as seed_conn:
+                scheduler.seed(await load_last_posts(seed_conn, [c.username for c in channels]))
+            await scheduler.run_once()
+
+        await writer.flush()
+        logger.info(f"Done. Saved {writer.written} prices.")
     finally:
-        await conn.close()
+        await writer.close()
+        await pool.release(conn)
+        await pool.close()
 
 if __name__ == '__main__':
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
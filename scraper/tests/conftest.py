@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Scraper modules import each other as top-level modules (run as scripts from src/)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
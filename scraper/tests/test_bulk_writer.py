@@ -0,0 +1,129 @@
+import asyncio
+import contextlib
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from bulk_writer import (CREATE_STAGING_SQL, MERGE_GOLD_PRICES_SQL, MERGE_LATEST_PRICES_SQL, STAGING_TABLE,
+                         BulkPriceWriter, WriteUnit)
+
+
+class FakeConnection:
+    """Records each COPY batch; `gate` holds writes until set, `fail` makes them raise"""
+
+    def __init__(self):
+        self.batches = []
+        self.statements = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.fail = False
+        self.writing = 0
+        self.max_writing = 0
+
+    async def execute(self, query):
+        self.statements.append(query)
+
+    @contextlib.asynccontextmanager
+    async def transaction(self):
+        self.writing += 1
+        self.max_writing = max(self.max_writing, self.writing)
+        try:
+            yield
+        finally:
+            self.writing -= 1
+
+    async def copy_records_to_table(self, table, records, columns):
+        assert table == STAGING_TABLE
+        await self.gate.wait()
+        if self.fail:
+            raise ConnectionError('connection lost')
+        self.batches.append([record[0] for record in records])
+
+
+def price(karat=18):
+    return SimpleNamespace(
+        timestamp=datetime(2024, 1, 1, tzinfo=timezone.utc), karat=karat,
+        buy_price=29600.0, sell_price=29800.0, source='chan', raw_text='18k 29600'
+    )
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_full_batch_is_flushed_in_the_background():
+    async def run():
+        conn = FakeConnection()
+        writer = BulkPriceWriter(conn, batch_size=3, flush_interval=3600)
+        await writer.start()
+        for _ in range(2):
+            await writer.add(price())
+        await settle()
+        assert conn.batches == []
+
+        await writer.add(price())
+        await settle()
+        assert conn.batches == [[1, 2, 3]]
+        assert conn.statements == [CREATE_STAGING_SQL, MERGE_GOLD_PRICES_SQL, MERGE_LATEST_PRICES_SQL]
+
+        await writer.add(price())
+        await writer.close()
+        assert conn.batches == [[1, 2, 3], [4]] and writer.written == 4
+    asyncio.run(run())
+
+
+def test_partial_batch_is_flushed_after_the_interval():
+    async def run():
+        conn = FakeConnection()
+        writer = BulkPriceWriter(conn, batch_size=100, flush_interval=0.01)
+        await writer.start()
+        await writer.add(price())
+        await asyncio.sleep(0.05)
+        assert conn.batches == [[1]]
+        await writer.close()
+        assert writer._ticker is None and conn.batches == [[1]]
+    asyncio.run(run())
+
+
+def test_one_write_at_a_time():
+    async def run():
+        conn = FakeConnection()
+        conn.gate.clear()
+        writer = BulkPriceWriter(conn, batch_size=2, flush_interval=3600)
+        await writer.start()
+        for _ in range(2):
+            await writer.add(price())
+        await writer.add(price())
+
+        # The next full batch waits for the write in flight
+        second = asyncio.create_task(writer.add(price()))
+        await settle()
+        assert not second.done() and conn.batches == []
+
+        conn.gate.set()
+        await second
+        await writer.close()
+        assert conn.batches == [[1, 2], [3, 4]] and conn.max_writing == 1
+    asyncio.run(run())
+
+
+def test_failed_batch_is_counted_against_its_units():
+    async def run():
+        conn = FakeConnection()
+        writer = BulkPriceWriter(conn, batch_size=3, flush_interval=3600)
+        await writer.start()
+        first, second = WriteUnit(), WriteUnit()
+
+        conn.fail = True
+        await writer.add(price(), first)
+        await writer.add(price(), second)
+        await writer.add(price(), first)
+        await writer.flush()
+        assert (first.failed, second.failed, writer.failed) == (2, 1, 3)
+
+        conn.fail = False
+        await writer.add(price(), second)
+        await writer.close()
+        assert (first.failed, second.failed, writer.written) == (2, 1, 1)
+    asyncio.run(run())
+
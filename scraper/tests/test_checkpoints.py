@@ -0,0 +1,40 @@
+import asyncio
+from datetime import datetime, timezone
+
+from checkpoints import content_hash, load_processed, mark_processed
+
+
+class FakeConnection:
+    """Keeps channel_messages rows in a dict, keyed on (channel, message_id)"""
+
+    def __init__(self):
+        self.rows = {}
+
+    async def executemany(self, query, args):
+        for channel, message_id, posted_at, digest, text in args:
+            self.rows[channel, message_id] = {'message_id': message_id, 'content_hash': digest, 'text': text}
+
+    async def fetch(self, query, channel, message_ids):
+        assert 'text IS NOT NULL' in query
+        return [
+            row for (row_channel, message_id), row in self.rows.items()
+            if row_channel == channel and message_id in message_ids and row['text'] is not None
+        ]
+
+
+POSTED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def test_media_only_posts_count_as_processed():
+    conn = FakeConnection()
+    asyncio.run(mark_processed(conn, 'chan', [(1, POSTED, None), (2, POSTED, '18k 29600')]))
+
+    assert conn.rows['chan', 1]['text'] == ''
+    known = asyncio.run(load_processed(conn, 'chan', [1, 2, 3]))
+    assert known == {1: content_hash(None), 2: content_hash('18k 29600')}
+
+
+def test_rows_without_stored_text_are_redone():
+    conn = FakeConnection()
+    conn.rows['chan', 1] = {'message_id': 1, 'content_hash': content_hash('18k 29600'), 'text': None}
+    assert asyncio.run(load_processed(conn, 'chan', [1])) == {}
@@ -0,0 +1,92 @@
+import pytest
+
+from ocr import KARAT_TOKEN, GoldImageOCR, OCRBox, OCRPrice
+
+
+def box(text, left, top, width=80, height=20, confidence=0.9):
+    return OCRBox.from_line(
+        [[left, top], [left + width, top], [left + width, top + height], [left, top + height]],
+        text, confidence
+    )
+
+
+def table(header, *rows, top=0):
+    """Boxes for a board laid out in 100px columns and 40px rows"""
+    boxes = [box(text, 100 * i, top) for i, text in enumerate(header) if text]
+    for r, row in enumerate(rows, start=1):
+        boxes += [box(text, 100 * i, top + 40 * r) for i, text in enumerate(row) if text]
+    return boxes
+
+
+def cells(prices):
+    return [(p.karat, p.offer_price, p.demand_price) for p in prices]
+
+
+@pytest.mark.parametrize('text,karat', [
+    ('18k', 18), ('Or 21K', 21), ('عيار 22', 22), ('24', 24), ('750', 750),
+    ('24/01', None), ('18-02-2024', None), ('2024-01-18', None), ('18:30', None),
+    ('1.18', None), ('31800', None),
+])
+def test_karat_token(text, karat):
+    match = KARAT_TOKEN.search(text)
+    assert (int(match.group(1)) if match else None) == karat
+
+
+def test_rows_columns_and_header_roles():
+    boxes = table(
+        ['Karat', 'Offre', 'Demande'],
+        ['18k', '29 600', '29800'],
+        ['21k', '34,600', '34800.00'],
+        ['750', '29500', ''],
+    )
+    assert cells(GoldImageOCR._parse_ocr_results(boxes)) == [
+        (18, 29600, None), (18, None, 29800),
+        (21, 34600, None), (21, None, 34800),
+        (18, 29500, None),
+    ]
+
+
+def test_headers_name_the_columns_in_any_order():
+    boxes = table(['', 'بيع', 'شراء'], ['18k', '29800', '29600'])
+    assert cells(GoldImageOCR._parse_ocr_results(boxes)) == [(18, None, 29800), (18, 29600, None)]
+
+
+def test_one_header_names_both_columns():
+    boxes = table(['', '', 'Demande'], ['24k', '40000', '40500'])
+    assert cells(GoldImageOCR._parse_ocr_results(boxes)) == [(24, 40000, None), (24, None, 40500)]
+
+
+def test_without_headers_columns_read_offer_then_demand():
+    boxes = table(['Prix du jour'], ['22k', '38000', '38400'])
+    assert cells(GoldImageOCR._parse_ocr_results(boxes)) == [(22, 38000, None), (22, None, 38400)]
+
+
+def test_dates_and_phone_numbers_are_not_rows():
+    boxes = table(
+        ['Karat', 'Offre', 'Demande'],
+        ['18k', '29600', '29800'],
+        ['24/01/2024', '0550 123', '18:30'],
+    )
+    # A wide date row would also have merged the two price columns
+    assert cells(GoldImageOCR._parse_ocr_results(boxes)) == [(18, 29600, None), (18, None, 29800)]
+
+
+def test_labels_and_confidence_are_kept():
+    boxes = table(['', 'Offre'], ['Or 18k', '29600'])
+    boxes[-1] = boxes[-1]._replace(confidence=0.5)
+    price, = GoldImageOCR._parse_ocr_results(boxes)
+    assert (price.raw_text, price.confidence) == ('Or 18k 29600', 0.5)
+
+
+def test_empty_image():
+    assert GoldImageOCR._parse_ocr_results([]) == []
+
+
+def test_merge_cells_pairs_sides_per_karat():
+    prices = GoldImageOCR._parse_ocr_results(table(
+        ['', 'Offre', 'Demande'],
+        ['18k', '29600', '29800'],
+        ['18k', '29000', '29200'],
+    ))
+    merged = GoldImageOCR.merge_cells(prices)
+    assert merged == [OCRPrice(18, 29600, 29800, '18k 29600 | 18k 29800', 0.9)]
@@ -0,0 +1,106 @@
+import json
+import random
+
+import pytest
+
+from patterns import DEFAULT_PATTERNS, SUPPORTED_KARATS, PatternSet, PricePattern, load_profiles
+
+
+@pytest.fixture(scope='module')
+def patterns():
+    return PatternSet(DEFAULT_PATTERNS)
+
+
+def prices(pattern_set, text):
+    return [(p.karat, p.buy_price, p.sell_price, p.pattern) for p in pattern_set.find(text)]
+
+
+def test_range(patterns):
+    assert prices(patterns, "18k: 29600 - 29800 DA") == [(18, 29600.0, 29800.0, 'range')]
+
+
+def test_single(patterns):
+    assert prices(patterns, "سعر الـ 18: 29700 دج") == [(18, 29700.0, None, 'single')]
+
+
+def test_sabika_is_18k(patterns):
+    assert prices(patterns, "السبيكة 750: 28 500 دج") == [(18, 28500.0, None, 'sabika')]
+
+
+def test_range_start_is_not_a_single_price(patterns):
+    # "single" matches the left half of the range first; "range" must win
+    assert prices(patterns, "21 34 600 - 34 800") == [(21, 34600.0, 34800.0, 'range')]
+
+
+def test_thousands_separators(patterns):
+    found = prices(patterns, "18k 29,600-29,800\n21k 34.600 - 34.800\n24: 39 600")
+    assert found == [
+        (18, 29600.0, 29800.0, 'range'),
+        (21, 34600.0, 34800.0, 'range'),
+        (24, 39600.0, None, 'single'),
+    ]
+
+
+def test_unsupported_karat_is_skipped(patterns):
+    assert prices(patterns, "25: 30 000 ثم 21: 34 650") == [(21, 34650.0, None, 'single')]
+
+
+@pytest.mark.parametrize('text', ["", "Tel 0555 12 34 56", "مرحبا بكم في محلنا"])
+def test_no_prices(patterns, text):
+    assert patterns.find(text) == []
+
+
+def test_matches_are_ordered_and_disjoint(patterns):
+    rng = random.Random(7)
+    fragments = [
+        "{k}k: {a} - {b} DA", "سعر الـ {k}: {a} دج", "السبيكة {a}", "Tel 0555 12 34 56",
+        "أسعار اليوم", "{k} {a}-{b}", "prix {k} = {a}",
+    ]
+    for _ in range(500):
+        text = '\n'.join(
+            rng.choice(fragments).format(
+                k=rng.choice([18, 19, 21, 22, 24, 30]),
+                a=f"{rng.randint(9, 40)} {rng.randint(0, 999):03d}",
+                b=f"{rng.randint(9, 40)},{rng.randint(0, 999):03d}",
+            )
+            for _ in range(rng.randint(1, 6))
+        )
+        end = 0
+        for match in patterns.find(text):
+            assert match.karat in SUPPORTED_KARATS
+            assert match.start >= end
+            assert text[match.start:match.start + len(match.raw_text)] == match.raw_text
+            end = match.start + len(match.raw_text)
+
+
+def test_every_range_line_is_found(patterns):
+    rng = random.Random(11)
+    for _ in range(200):
+        expected = [
+            (rng.choice(SUPPORTED_KARATS), rng.randint(9, 40) * 1000, rng.randint(9, 40) * 1000)
+            for _ in range(rng.randint(1, 4))
+        ]
+        text = '\n'.join(f"{k}k: {a} - {b} DA" for k, a, b in expected)
+        assert prices(patterns, text) == [(k, float(a), float(b), 'range') for k, a, b in expected]
+
+
+def test_fixed_karat_pattern():
+    pattern_set = PatternSet([PricePattern('lingot', r'lingot\s*(\d{5})', buy_group=1, karat=24)])
+    assert prices(pattern_set, "LINGOT 39600") == [(24, 39600.0, None, 'lingot')]
+
+
+def test_load_profiles(tmp_path):
+    path = tmp_path / 'profiles.json'
+    path.write_text(json.dumps({
+        'compact': [{'name': 'compact', 'regex': r'(\d{2})=(\d{5})', 'karat_group': 1, 'buy_group': 2}]
+    }))
+    profiles = load_profiles(str(path))
+    assert set(profiles) == {'default', 'compact'}
+    assert prices(profiles['compact'], "18=29600 21=34650") == [
+        (18, 29600.0, None, 'compact'), (21, 34650.0, None, 'compact')
+    ]
+
+
+def test_empty_pattern_set_is_rejected():
+    with pytest.raises(ValueError):
+        PatternSet([])
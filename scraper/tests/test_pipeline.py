@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+
+from pipeline import Pipeline, Stage
+
+
+class Handler:
+    """Records items; waits on `gate` first and raises for items in `fail`"""
+
+    def __init__(self, outputs=lambda item: None, fail=()):
+        self.outputs = outputs
+        self.fail = set(fail)
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.items = []
+
+    async def __call__(self, item):
+        await self.gate.wait()
+        if item in self.fail:
+            raise ValueError(f'bad item {item}')
+        self.items.append(item)
+        return self.outputs(item)
+
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def test_items_flow_through_every_stage():
+    async def run():
+        parse = Handler(lambda item: [item * 10, item * 10 + 1])
+        persist = Handler()
+        pipeline = Pipeline([Stage('parse', parse, workers=2), Stage('persist', persist, workers=2)], metrics_interval=0)
+        pipeline.start()
+        for item in range(3):
+            await pipeline.submit(item)
+        await pipeline.stop()
+
+        assert sorted(persist.items) == [0, 1, 10, 11, 20, 21]
+        metrics = pipeline.metrics()
+        assert metrics['parse']['processed'] == 3 and metrics['persist']['processed'] == 6
+    asyncio.run(run())
+
+
+def test_stop_drains_queued_items():
+    async def run():
+        persist = Handler()
+        persist.gate.clear()
+        pipeline = Pipeline([Stage('persist', persist)], metrics_interval=0)
+        pipeline.start()
+        for item in range(5):
+            await pipeline.submit(item)
+
+        stopping = asyncio.create_task(pipeline.stop())
+        await settle()
+        assert not stopping.done()
+
+        persist.gate.set()
+        await stopping
+        assert persist.items == [0, 1, 2, 3, 4]
+        assert all(not stage._tasks for stage in pipeline.stages)
+    asyncio.run(run())
+
+
+def test_stop_without_drain_leaves_the_queue():
+    async def run():
+        persist = Handler()
+        persist.gate.clear()
+        pipeline = Pipeline([Stage('persist', persist)], metrics_interval=0)
+        pipeline.start()
+        for item in range(3):
+            await pipeline.submit(item)
+        await settle()
+
+        # The worker is cancelled mid-item, the rest stay queued
+        await pipeline.stop(drain=False)
+        assert persist.items == [] and pipeline.metrics()['persist']['queue_depth'] == 2
+    asyncio.run(run())
+
+
+def test_full_downstream_queue_holds_back_upstream():
+    async def run():
+        parse = Handler(lambda item: [item])
+        persist = Handler()
+        persist.gate.clear()
+        pipeline = Pipeline([
+            Stage('parse', parse, queue_size=1),
+            Stage('persist', persist, queue_size=1),
+        ], metrics_interval=0)
+        pipeline.start()
+
+        # persist holds one item and queues one, parse blocks on a third
+        # and its own queue takes a fourth; the fifth submit must wait
+        for item in range(4):
+            await pipeline.submit(item)
+        blocked = asyncio.create_task(pipeline.submit(4))
+        await settle()
+        assert not blocked.done()
+        assert parse.items == [0, 1, 2] and persist.items == []
+
+        persist.gate.set()
+        await blocked
+        await pipeline.stop()
+        assert persist.items == [0, 1, 2, 3, 4]
+    asyncio.run(run())
+
+
+def test_failed_items_are_counted_and_skipped():
+    async def run():
+        parse = Handler(lambda item: [item], fail={2})
+        persist = Handler()
+        pipeline = Pipeline([Stage('parse', parse), Stage('persist', persist)], metrics_interval=0)
+        pipeline.start()
+        for item in range(4):
+            await pipeline.submit(item)
+        await pipeline.stop()
+
+        assert persist.items == [0, 1, 3]
+        assert pipeline.metrics()['parse']['failed'] == 1
+    asyncio.run(run())
+
+
+def test_submit_to_a_named_stage():
+    async def run():
+        parse, persist = Handler(lambda item: [item]), Handler()
+        pipeline = Pipeline([Stage('parse', parse), Stage('persist', persist)], metrics_interval=0)
+        pipeline.start()
+        await pipeline.submit('direct', stage='persist')
+        await pipeline.stop()
+        assert parse.items == [] and persist.items == ['direct']
+    asyncio.run(run())
+
+
+def test_pipeline_needs_a_stage():
+    with pytest.raises(ValueError):
+        Pipeline([])
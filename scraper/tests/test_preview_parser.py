@@ -0,0 +1,141 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from preview_parser import PreviewMessage, PreviewPageError, PreviewParser, stream_messages
+
+
+def post(message_id, body='', time='2024-01-01T12:00:00+00:00'):
+    return (
+        '<div class="tgme_widget_message_wrap js-widget_message_wrap">'
+        f'<div class="tgme_widget_message text_not_supported_wrap js-widget_message" data-post="chan/{message_id}">'
+        '<div class="tgme_widget_message_bubble">'
+        f'{body}'
+        '<div class="tgme_widget_message_footer"><div class="tgme_widget_message_info">'
+        f'<a class="tgme_widget_message_date" href="https://t.me/chan/{message_id}"><time datetime="{time}" class="time">12:00</time></a>'
+        '</div></div></div></div></div>'
+    )
+
+
+def text(content):
+    return f'<div class="tgme_widget_message_text js-message_text" dir="auto">{content}</div>'
+
+
+def page(*posts):
+    return (
+        '<!DOCTYPE html><html><head><script>var x = "<div>";</script></head><body>'
+        '<section class="tgme_channel_history js-message_history">'
+        + ''.join(posts) +
+        '</section><div class="tgme_footer">t.me</div></body></html>'
+    )
+
+
+def parse(markup, chunk_size=None):
+    parser = PreviewParser()
+    chunk_size = chunk_size or len(markup)
+    for start in range(0, len(markup), chunk_size):
+        parser.feed(markup[start:start + chunk_size])
+    parser.close()
+    return parser, parser.drain()
+
+
+SAMPLE = page(
+    post(101, text('<b>18k</b>: 29600 - 29800 DA<br/>21k: 34600')),
+    post(102, '<a class="tgme_widget_message_reply" href="https://t.me/chan/90">'
+              '<div class="tgme_widget_message_author">Chan</div>'
+              + text('quoted 24k 40000') + '</a>' + text('Prix &amp; tarifs : 22k &lt;38000&gt;')),
+    post(103, '<a class="tgme_widget_message_photo_wrap 103" href="https://t.me/chan/103" '
+              'style="width:800px;background-image:url(\'https://cdn.example/a.jpg?x=1&amp;y=2\')"></a>'),
+    post(104, text('outer <div class="inner">nested</div> tail') + '<div class="tgme_widget_message_views">1.2K</div>'),
+    post(105, text('no date'), time='not a date'),
+    post(106, text('last post')),
+)
+
+
+def test_posts_are_extracted():
+    parser, messages = parse(SAMPLE)
+    assert parser.history_seen and parser.posts_seen == 6
+    assert [m.message_id for m in messages] == [101, 102, 103, 104, 106]
+    assert messages[0] == PreviewMessage(
+        101, datetime(2024, 1, 1, 12, tzinfo=timezone.utc), '18k: 29600 - 29800 DA\n21k: 34600', []
+    )
+
+
+def test_reply_quote_is_not_the_post_text():
+    _, messages = parse(SAMPLE)
+    assert messages[1].text == 'Prix & tarifs : 22k <38000>'
+
+
+def test_media_only_post_has_photos_and_no_text():
+    _, messages = parse(SAMPLE)
+    assert messages[2].text == ''
+    assert messages[2].photo_urls == ['https://cdn.example/a.jpg?x=1&y=2']
+
+
+def test_nested_divs_stay_in_the_text():
+    _, messages = parse(SAMPLE)
+    assert messages[3].text == 'outer nested tail'
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 13, 31, 64, 257, 1024])
+def test_identical_output_for_any_chunk_size(chunk_size):
+    whole_parser, whole = parse(SAMPLE)
+    parser, messages = parse(SAMPLE, chunk_size)
+    assert messages == whole
+    assert (parser.history_seen, parser.posts_seen) == (whole_parser.history_seen, whole_parser.posts_seen)
+
+
+def test_posts_are_emitted_once_the_next_one_starts():
+    parser = PreviewParser()
+    first, second = post(1, text('one')), post(2, text('two'))
+    parser.feed(page(first)[:-10])
+    assert parser.drain() == []
+    parser.feed(second)
+    assert [m.message_id for m in parser.drain()] == [1]
+    parser.close()
+    assert [m.message_id for m in parser.drain()] == [2]
+
+
+def test_empty_history_page():
+    parser, messages = parse(page())
+    assert parser.history_seen and parser.posts_seen == 0 and messages == []
+
+
+class FakeContent:
+    def __init__(self, body):
+        self.body = body
+
+    async def iter_chunked(self, size):
+        # Small chunks split multi-byte characters and tags
+        for start in range(0, len(self.body), 5):
+            yield self.body[start:start + 5]
+
+
+class FakeResponse:
+    charset = 'utf-8'
+    url = 'https://t.me/s/chan'
+
+    def __init__(self, markup):
+        self.content = FakeContent(markup.encode('utf-8'))
+
+
+def stream(markup):
+    async def collect():
+        return [message async for message in stream_messages(FakeResponse(markup))]
+    return asyncio.run(collect())
+
+
+def test_stream_decodes_across_chunks():
+    messages = stream(page(post(7, text('سعر الذهب 18 قيراط'))))
+    assert [(m.message_id, m.text) for m in messages] == [(7, 'سعر الذهب 18 قيراط')]
+
+
+def test_stream_rejects_a_page_without_history():
+    with pytest.raises(PreviewPageError, match='not a preview page'):
+        stream('<html><body>Channel not found</body></html>')
+
+
+def test_stream_rejects_posts_that_cannot_be_parsed():
+    with pytest.raises(PreviewPageError, match='none parsed'):
+        stream(page(post(1, text('x'), time='bad')))
@@ -0,0 +1,133 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+import scheduler
+from channels import ChannelConfig
+from scheduler import ChannelScheduler, RateLimited, TokenBucket
+
+
+class Clock:
+    """Stands in for time.monotonic; the fake sleep moves it forward"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 6))
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(scheduler.time, 'monotonic', clock)
+    monkeypatch.setattr(scheduler.asyncio, 'sleep', clock.sleep)
+    return clock
+
+
+def acquire(bucket, times):
+    async def run():
+        for _ in range(times):
+            await bucket.acquire()
+    asyncio.run(run())
+
+
+def test_bucket_allows_a_burst_then_paces(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    acquire(bucket, 3)
+    assert clock.sleeps == []
+
+    acquire(bucket, 2)
+    assert clock.sleeps == [0.5, 0.5]
+
+
+def test_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate=1, capacity=2)
+    acquire(bucket, 2)
+    clock.now += 60
+    acquire(bucket, 3)
+    assert clock.sleeps == [1]
+
+
+def test_paused_bucket_blocks_until_the_wait_is_over(clock):
+    bucket = TokenBucket(rate=1, capacity=1)
+    bucket.pause(30)
+    acquire(bucket, 1)
+    assert clock.sleeps == [30]
+
+
+def channels(*names):
+    return [ChannelConfig(name, rate=1, burst=1) for name in names]
+
+
+def test_throttle_takes_from_the_channel_and_the_host(clock):
+    host = TokenBucket(rate=1, capacity=1)
+    runner = ChannelScheduler(channels('a', 'b'), task=None, host_bucket=host)
+    a, b = runner.channels
+
+    async def run():
+        await runner.throttle(a)()
+        # b's own bucket is full, but the host's token is gone
+        await runner.throttle(b)()
+        assert clock.sleeps == [1]
+        # a's bucket has refilled meanwhile, the host's has not
+        await runner.throttle(a)()
+    asyncio.run(run())
+    assert clock.sleeps == [1, 1]
+
+
+def test_rate_limited_task_pauses_channel_and_host(clock):
+    host = TokenBucket(rate=10, capacity=10)
+    calls = []
+
+    async def task(channel, since, throttle):
+        calls.append(channel.username)
+        if len(calls) == 1:
+            raise RateLimited(20)
+        await throttle()
+        return datetime(2024, 1, 2)
+
+    runner = ChannelScheduler(channels('a'), task, host_bucket=host)
+    result = asyncio.run(runner.run_once())
+
+    assert result == {'a': datetime(2024, 1, 2)} and calls == ['a', 'a']
+    assert clock.sleeps == [20]
+    assert host.blocked_until == runner.buckets['a'].blocked_until == 1020
+
+
+def test_run_once_starts_with_the_most_recently_active_seeded_channel(clock):
+    order = []
+
+    async def task(channel, since, throttle):
+        order.append((channel.username, since))
+        return since
+
+    runner = ChannelScheduler(channels('quiet', 'busy', 'new'), task, concurrency=1)
+    runner.seed({'quiet': datetime(2024, 1, 1), 'busy': datetime(2024, 3, 1), 'unknown': datetime(2024, 5, 1)})
+    asyncio.run(runner.run_once())
+
+    assert order == [('busy', datetime(2024, 3, 1)), ('quiet', datetime(2024, 1, 1)), ('new', None)]
+
+
+def test_seed_never_moves_a_channel_back(clock):
+    runner = ChannelScheduler(channels('a'), task=None)
+    runner.last_post['a'] = datetime(2024, 6, 1)
+    runner.seed({'a': datetime(2024, 1, 1)})
+    assert runner.last_post['a'] == datetime(2024, 6, 1)
+
+
+def test_poll_interval_follows_recency(clock):
+    runner = ChannelScheduler(channels('a'), task=None, min_interval=60, max_interval=3600)
+    channel = runner.channels[0]
+    assert runner.poll_interval(channel) == 60
+
+    runner.seed({'a': datetime.utcnow()})
+    assert runner.poll_interval(channel) == 60
+    runner.last_post['a'] = datetime(2000, 1, 1)
+    assert runner.poll_interval(channel) == 3600
@@ -56,20 +56,22 @@ export default function Dashboard() {
   }, []);
 
   useEffect(() => {
+    const baseUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+    // Remove trailing slash before appending API paths
+    const apiBase = baseUrl.replace(/\/$/, '');
+
     // Fetch prices from API
     async function fetchPrices() {
       try {
-        const baseUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
-        // Remove trailing slash and append API path
-        const apiUrl = baseUrl.replace(/\/$/, '') + '/api/v1/prices/current';
-        const response = await fetch(apiUrl);
-        
+        const response = await fetch(apiBase + '/api/v1/prices/current');
+
         if (!response.ok) {
           throw new Error(`HTTP error! status: ${response.status}`);
         }
-        
+
         const data = await response.json();
         setPrices(data);
+        setError(null);
         setLoading(false);
       } catch (err) {
         console.error('Failed to fetch prices:', err);
@@ -78,11 +80,42 @@ export default function Dashboard() {
       }
     }
 
-    fetchPrices();
-    
-    // Refresh every 60 seconds
-    const interval = setInterval(fetchPrices, 60000);
-    return () => clearInterval(interval);
+    // Polling every 60 seconds, when the stream is unavailable
+    let interval: ReturnType<typeof setInterval> | undefined;
+    function startPolling() {
+      fetchPrices();
+      interval = setInterval(fetchPrices, 60000);
+    }
+
+    if (typeof EventSource === 'undefined') {
+      startPolling();
+      return () => clearInterval(interval);
+    }
+
+    // The server sends current prices on connect, then again whenever they change.
+    // EventSource reconnects by itself after network errors, but gives up for
+    // good on an HTTP error (e.g. 503 when the server is full): poll instead.
+    const source = new EventSource(apiBase + '/api/v1/prices/stream');
+    source.addEventListener('prices', (event) => {
+      setPrices(JSON.parse((event as MessageEvent).data));
+      setError(null);
+      setLoading(false);
+    });
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED) {
+        source.close();
+        if (interval === undefined) {
+          startPolling();
+        }
+        return;
+      }
+      setError('Flux des prix interrompu, reconnexion en cours...');
+      setLoading(false);
+    };
+    return () => {
+      source.close();
+      clearInterval(interval);
+    };
   }, []);
 
   // Format price for display